@@ -0,0 +1,76 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#  #
+#          http://www.apache.org/licenses/LICENSE-2.0
+#  #
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+"""Miss-storm throughput of a single Sieve as the thread count grows.
+
+Every thread inserts distinct keys so each call takes the miss path and
+the insert lock. Run with::
+
+    python -m benchmarks.bench_contention --segments 1 16
+"""
+
+import argparse
+import threading
+import time
+
+from sieve_cache import create_region
+from sieve_cache import sieve
+
+
+def _run(threads: int, segments: int, calls: int) -> float:
+    region = create_region()
+    region.configure(backend="dogpile.cache.memory")
+    memo = sieve.Sieve(backend=region, segments=segments)
+
+    @memo.cache(max_size=1024)
+    def load(number):
+        return number
+
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(offset):
+        barrier.wait()
+        for number in range(offset, offset + calls):
+            load(number)
+
+    workers = [
+        threading.Thread(target=worker, args=(i * calls,))
+        for i in range(threads)
+    ]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return threads * calls / elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--segments", type=int, nargs="+", default=[1, 16])
+    parser.add_argument(
+        "--threads", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32]
+    )
+    parser.add_argument("--calls", type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    print(f"{'threads':>8} " + " ".join(
+        f"{'seg=%d ops/s' % s:>16}" for s in args.segments
+    ))
+    for threads in args.threads:
+        row = [_run(threads, s, args.calls) for s in args.segments]
+        print(f"{threads:>8} " + " ".join(f"{ops:>16,.0f}" for ops in row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#  #
+#          http://www.apache.org/licenses/LICENSE-2.0
+#  #
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+"""Insert tail latency on an all-hot cache, with and without a scan budget.
+
+Every entry is re-read between inserts so its visited bit is set, which
+is the worst case for the hand: an unbounded scan walks the whole list.
+Run with::
+
+    python -m benchmarks.bench_eviction_tail --max-scan 0 32
+"""
+
+import argparse
+import gc
+import statistics
+import time
+
+from sieve_cache import create_region
+from sieve_cache import sieve
+
+
+def _latencies(size: int, inserts: int, max_scan):
+    region = create_region()
+    region.configure(backend="dogpile.cache.memory")
+    memo = sieve.Sieve(backend=region, max_scan=max_scan)
+
+    @memo.cache(max_size=size)
+    def load(number):
+        return number
+
+    for number in range(size):
+        load(number)
+
+    store = memo._partitions[load].segments[0].store
+    clock = time.perf_counter
+    samples = []
+    # NOTE: Keep collector pauses out of the tail percentiles.
+    gc.collect()
+    gc.disable()
+    try:
+        for next_key in range(size, size + inserts):
+            # Touch the live entries so the whole cache is hot again.
+            for slot, key in enumerate(store.keys):
+                if key is not None:
+                    store.visited[slot] = 1
+            start = clock()
+            load(next_key)
+            samples.append(clock() - start)
+    finally:
+        gc.enable()
+    return samples
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--inserts", type=int, default=200)
+    parser.add_argument(
+        "--max-scan",
+        type=int,
+        nargs="+",
+        default=[0, 32],
+        help="scan budgets to compare; 0 means unbounded",
+    )
+    args = parser.parse_args(argv)
+
+    print(
+        f"{'max_scan':>9} {'p50 us':>10} {'p99 us':>10} "
+        f"{'p99.9 us':>10} {'max us':>10}"
+    )
+    for budget in args.max_scan:
+        samples = _latencies(args.size, args.inserts, budget or None)
+        row = [
+            statistics.median(samples),
+            _percentile(samples, 99),
+            _percentile(samples, 99.9),
+            max(samples),
+        ]
+        print(
+            f"{budget or 'none':>9} "
+            + " ".join(f"{value * 1e6:>10.1f}" for value in row)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#  #
+#          http://www.apache.org/licenses/LICENSE-2.0
+#  #
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+"""Per-call cost of cache key generation and of a full cache hit.
+
+Compares the default stringified SHA-1 keys, stringified BLAKE2b keys and
+the tuple keys of ``fast_keys``. Run with::
+
+    python -m benchmarks.bench_key_overhead
+"""
+
+import argparse
+import timeit
+
+import sieve_cache
+
+
+def _modes():
+    return {
+        "str + sha1": {},
+        "str + blake2b": {"key_mangler": sieve_cache.blake2b_mangle_key},
+        "tuple (fast_keys)": {"fast_keys": True},
+    }
+
+
+def _key_cost(options, number):
+    """Return the seconds to generate and mangle one key."""
+    memo = sieve_cache.create_sieve(backend="sieve_cache.memory", **options)
+    region = memo._backend
+
+    def load(user_id, page):
+        return user_id
+
+    generate = region.function_key_generator(memo.namespace, load)
+    mangle = region.key_mangler or (lambda key: key)
+    return timeit.timeit(
+        lambda: mangle(generate(12345, "profile")), number=number
+    ) / number
+
+
+def _hit_cost(options, number):
+    """Return the seconds of one cache hit through the decorator."""
+    memo = sieve_cache.create_sieve(backend="sieve_cache.memory", **options)
+
+    @memo.cache(max_size=16)
+    def load(user_id, page):
+        return user_id
+
+    load(12345, "profile")
+    return timeit.timeit(
+        lambda: load(12345, "profile"), number=number
+    ) / number
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=200_000)
+    args = parser.parse_args(argv)
+
+    print(f"{'mode':<20} {'key us':>10} {'hit us':>10}")
+    for name, options in _modes().items():
+        key = _key_cost(options, args.number)
+        hit = _hit_cost(options, args.number)
+        print(f"{name:<20} {key * 1e6:>10.3f} {hit * 1e6:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
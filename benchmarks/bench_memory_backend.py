@@ -0,0 +1,54 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#  #
+#          http://www.apache.org/licenses/LICENSE-2.0
+#  #
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+"""Set latency of ``InMemoryDriver`` as the number of live keys grows.
+
+Expiration is enabled so every set goes through the expiry index. The
+latency should stay flat instead of growing with the cache. Run with::
+
+    python -m benchmarks.bench_memory_backend
+"""
+
+import argparse
+import time
+
+from sieve_cache.backends.memory import InMemoryDriver
+
+
+def _set_latency(size: int, samples: int) -> float:
+    backend = InMemoryDriver({"expiration_time": 600})
+    backend.set_multi({f"fill:{i}": i for i in range(size)})
+
+    start = time.perf_counter()
+    for i in range(samples):
+        backend.set(f"sample:{i}", i)
+    return (time.perf_counter() - start) / samples
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[1_000, 10_000, 100_000, 1_000_000],
+    )
+    parser.add_argument("--samples", type=int, default=20_000)
+    args = parser.parse_args(argv)
+
+    print(f"{'live keys':>10} {'us/set':>10}")
+    for size in args.sizes:
+        latency = _set_latency(size, args.samples)
+        print(f"{size:>10} {latency * 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#  #
+#          http://www.apache.org/licenses/LICENSE-2.0
+#  #
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+"""Memory used by the SIEVE list metadata for a large number of entries.
+
+Compares a linked list of ``__dict__``-backed dataclass nodes (the layout
+``Node`` used to have) against ``sieve_cache.store.NodeStore``. Keys are
+allocated up front and excluded from the measurement. Run with::
+
+    python -m benchmarks.bench_node_memory --entries 1000000
+"""
+
+import argparse
+from dataclasses import dataclass
+import gc
+import tracemalloc
+import typing as ty
+
+from sieve_cache import node as _n
+from sieve_cache import store as _s
+
+
+@dataclass
+class _DictNode:
+    value: ty.Any
+    key: str
+    visited: bool = False
+    next: ty.Any = None
+    prev: ty.Any = None
+
+
+def _linked(node_cls, keys):
+    head = None
+    for key in keys:
+        node = node_cls(value=None, key=key)
+        node.next = head
+        if head is not None:
+            head.prev = node
+        head = node
+    return head
+
+
+def _store(keys):
+    store = _s.NodeStore()
+    head = _s.NIL
+    for key in keys:
+        slot = store.allocate(key)
+        store.next[slot] = head
+        if head != _s.NIL:
+            store.prev[head] = slot
+        head = slot
+    return store
+
+
+def _measure(build, keys) -> int:
+    gc.collect()
+    tracemalloc.start()
+    result = build(keys)
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return peak
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entries", type=int, default=1_000_000)
+    args = parser.parse_args(argv)
+
+    keys = [f"sieve:key:{i}" for i in range(args.entries)]
+    layouts = {
+        "dataclass (__dict__)": lambda k: _linked(_DictNode, k),
+        "dataclass (__slots__)": lambda k: _linked(_n.Node, k),
+        "NodeStore (arrays)": _store,
+    }
+    print(f"{'layout':<24} {'peak MiB':>10} {'bytes/entry':>12}")
+    for name, build in layouts.items():
+        peak = _measure(build, keys)
+        print(
+            f"{name:<24} {peak / 2**20:>10.1f} "
+            f"{peak / args.entries:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#  #
+#          http://www.apache.org/licenses/LICENSE-2.0
+#  #
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+"""Compare SIEVE with LRU and FIFO on generated or recorded key traces.
+
+Each trace is replayed through ``Sieve`` on every backend, through ``Sieve``
+with a TinyLFU admission filter, through ``functools.lru_cache`` and through
+a FIFO baseline, at every cache size. The ``scan`` workload shows what the
+admission filter buys.
+Every run replays the trace three times on a fresh cache: once for the hit
+ratio and throughput, once timing each request for the latency
+percentiles, and once under ``tracemalloc`` for the peak memory of the
+cache. Results are written as JSON so runs can be diffed between
+releases; a summary table goes to stderr. Run with::
+
+    python -m benchmarks.bench_policies --sizes 100 1000 --output out.json
+    python -m benchmarks.bench_policies --trace requests.log
+"""
+
+import argparse
+import functools
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import sieve_cache
+from sieve_cache import admission
+from sieve_cache import version
+
+from benchmarks import workloads
+
+BACKENDS = [
+    "sieve_cache.memory",
+    "dogpile.cache.memory",
+    "dogpile.cache.memory_pickle",
+]
+WORKLOADS = ["zipf", "scan", "loop"]
+
+
+def _fifo_cache(maxsize):
+    """Evict in insertion order, ignoring hits."""
+
+    def decorator(func):
+        entries = {}
+
+        @functools.wraps(func)
+        def wrapper(key):
+            try:
+                return entries[key]
+            except KeyError:
+                pass
+            value = entries[key] = func(key)
+            if len(entries) > maxsize:
+                del entries[next(iter(entries))]
+            return value
+
+        return wrapper
+
+    return decorator
+
+
+def _make(policy, backend, size):
+    """Return a cached identity function and its list of misses."""
+    misses = []
+
+    def load(key):
+        misses.append(key)
+        return key
+
+    if policy == "lru":
+        return functools.lru_cache(maxsize=size)(load), misses
+    if policy == "fifo":
+        return _fifo_cache(size)(load), misses
+    # NOTE: Tuple keys keep key generation from dominating the
+    # comparison; every benchmarked backend is local.
+    memo = sieve_cache.create_sieve(backend=backend, fast_keys=True)
+    policy = admission.TinyLFU(size) if policy == "sieve+tinylfu" else None
+    return memo.cache(max_size=size, admission=policy)(load), misses
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def _run(policy, backend, size, trace):
+    cached, misses = _make(policy, backend, size)
+    clock = time.perf_counter
+    gc.collect()
+    gc.disable()
+    try:
+        start = clock()
+        for key in trace:
+            cached(key)
+        elapsed = clock() - start
+
+        cached, _misses = _make(policy, backend, size)
+        samples = []
+        for key in trace:
+            start = clock()
+            cached(key)
+            samples.append(clock() - start)
+    finally:
+        gc.enable()
+
+    tracemalloc.start()
+    try:
+        cached, _misses = _make(policy, backend, size)
+        for key in trace:
+            cached(key)
+        _current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "policy": policy,
+        "backend": backend,
+        "size": size,
+        "requests": len(trace),
+        "hit_ratio": 1 - len(misses) / len(trace),
+        "ops_per_sec": len(trace) / elapsed,
+        "p50_us": _percentile(samples, 50) * 1e6,
+        "p99_us": _percentile(samples, 99) * 1e6,
+        "peak_bytes": peak,
+    }
+
+
+def _traces(args):
+    generators = {
+        "zipf": lambda: workloads.zipf(
+            args.keys, args.length, args.alpha, args.seed
+        ),
+        "scan": lambda: workloads.scan(
+            args.keys, args.length, args.alpha, seed=args.seed
+        ),
+        "loop": lambda: workloads.loop(args.keys, args.length),
+    }
+    traces = {name: generators[name]() for name in args.workloads}
+    for path in args.trace or ():
+        traces[path] = workloads.load_trace(path)
+    return traces
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--workloads", nargs="*", choices=WORKLOADS, default=WORKLOADS
+    )
+    parser.add_argument(
+        "--trace", nargs="+", help="trace files with one key per line"
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--backends", nargs="+", default=BACKENDS)
+    parser.add_argument("--keys", type=int, default=10_000)
+    parser.add_argument("--length", type=int, default=100_000)
+    parser.add_argument("--alpha", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--output", default="-", help="JSON output path, '-' for stdout"
+    )
+    args = parser.parse_args(argv)
+
+    runs = [("lru", None), ("fifo", None)]
+    runs.extend(("sieve", backend) for backend in args.backends)
+    runs.append(("sieve+tinylfu", BACKENDS[0]))
+
+    results = []
+    print(
+        f"{'workload':<12} {'policy':<34} {'size':>6} {'hit %':>7} "
+        f"{'kops/s':>8} {'p50 us':>7} {'p99 us':>7} {'peak KiB':>9}",
+        file=sys.stderr,
+    )
+    for workload, trace in _traces(args).items():
+        for size in args.sizes:
+            for policy, backend in runs:
+                result = _run(policy, backend, size, trace)
+                result["workload"] = workload
+                results.append(result)
+                name = f"{policy}:{backend}" if backend else policy
+                print(
+                    f"{workload[-12:]:<12} {name:<34} {size:>6} "
+                    f"{result['hit_ratio'] * 100:>7.2f} "
+                    f"{result['ops_per_sec'] / 1e3:>8.1f} "
+                    f"{result['p50_us']:>7.2f} {result['p99_us']:>7.2f} "
+                    f"{result['peak_bytes'] / 1024:>9.1f}",
+                    file=sys.stderr,
+                )
+
+    report = {
+        "meta": {
+            "sieve_cache": version.version_string(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "arguments": vars(args),
+        },
+        "results": results,
+    }
+    if args.output == "-":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#  #
+#          http://www.apache.org/licenses/LICENSE-2.0
+#  #
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+"""Key traces replayed by the benchmarks.
+
+Every generator is seeded, so the same arguments always produce the same
+trace.
+"""
+
+import itertools
+import random
+import typing as ty
+
+
+def zipf(
+    keys: int, length: int, alpha: float = 1.0, seed: int = 0
+) -> ty.List[int]:
+    """Draw ``length`` keys from ``range(keys)`` with Zipf popularity.
+
+    :param keys: Number of distinct keys.
+    :param length: Number of requests.
+    :param alpha: Skew; higher values concentrate traffic on fewer keys.
+    :param seed: Random seed.
+    """
+    weights = itertools.accumulate(
+        1.0 / (rank**alpha) for rank in range(1, keys + 1)
+    )
+    rng = random.Random(seed)
+    return rng.choices(range(keys), cum_weights=list(weights), k=length)
+
+
+def scan(
+    keys: int,
+    length: int,
+    alpha: float = 1.0,
+    scan_every: int = 1000,
+    scan_length: int = 500,
+    seed: int = 0,
+) -> ty.List[int]:
+    """Zipf traffic interrupted by sequential scans of one-off keys.
+
+    The scanned keys are never requested again, which is the pattern that
+    flushes the hot set out of an LRU.
+
+    :param keys: Number of distinct hot keys.
+    :param length: Number of requests.
+    :param alpha: Skew of the hot traffic.
+    :param scan_every: Number of hot requests between two scans.
+    :param scan_length: Number of keys in each scan.
+    :param seed: Random seed.
+    """
+    hot = zipf(keys, length, alpha, seed)
+    trace: ty.List[int] = []
+    cold = itertools.count(keys)
+    for start in range(0, length, scan_every):
+        trace.extend(hot[start:start + scan_every])
+        trace.extend(itertools.islice(cold, scan_length))
+    return trace[:length]
+
+
+def loop(keys: int, length: int) -> ty.List[int]:
+    """Cycle through ``range(keys)`` in order.
+
+    With a cache smaller than ``keys``, LRU and FIFO miss on every
+    request.
+    """
+    return list(itertools.islice(itertools.cycle(range(keys)), length))
+
+
+def load_trace(path: str) -> ty.List[str]:
+    """Read a trace file with one request per line.
+
+    Only the first whitespace separated field of each line is used as the
+    key, so the output of most request logs can be used after a ``cut``.
+    Blank lines and lines starting with ``#`` are skipped.
+    """
+    trace = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            fields = line.split()
+            if fields and not fields[0].startswith("#"):
+                trace.append(fields[0])
+    return trace
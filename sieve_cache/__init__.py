@@ -9,18 +9,51 @@
 #  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 #  License for the specific language governing permissions and limitations
 #  under the License.
-import ssl
+import hashlib
+import importlib
+import typing as ty
 
+import dogpile.cache
 from dogpile.cache import region as _region
 from dogpile.cache import util
 
-from sieve_cache import sieve
 from sieve_cache.common import exceptions
 
-__all__ = ["sieve", "create_sieve", "create_region", "function_key_generator"]
+if ty.TYPE_CHECKING:
+    from sieve_cache import serializers  # noqa: F401
+    from sieve_cache import sieve
+    from sieve_cache import tiered
+
+__all__ = [
+    "serializers",
+    "sieve",
+    "tiered",
+    "create_sieve",
+    "create_tiered_sieve",
+    "create_region",
+    "function_key_generator",
+    "tuple_function_key_generator",
+    "blake2b_mangle_key",
+]
+
+# NOTE: The entry point in pyproject.toml only exists once the package is
+# installed; register the backend explicitly so it always resolves.
+dogpile.cache.register_backend(
+    "sieve_cache.memory", "sieve_cache.backends.memory", "InMemoryDriver"
+)
+dogpile.cache.register_backend(
+    "sieve_cache.mmap", "sieve_cache.backends.mapped", "MmapDriver"
+)
+dogpile.cache.register_backend(
+    "sieve_cache.shared_memory",
+    "sieve_cache.backends.shared",
+    "SharedMemoryDriver",
+)
 
 _BACKENDS = [
     "sieve_cache.memory",
+    "sieve_cache.mmap",
+    "sieve_cache.shared_memory",
     "dogpile.cache.pymemcache",
     "dogpile.cache.memcached",
     "dogpile.cache.pylibmc",
@@ -32,8 +65,40 @@ _BACKENDS = [
     "dogpile.cache.null",
 ]
 
+# NOTE: Keys of these backends never leave the process, so they can be
+# any hashable object and need no mangling.
+_LOCAL_BACKENDS = (
+    "sieve_cache.memory",
+    "sieve_cache.mmap",
+    "dogpile.cache.memory",
+    "dogpile.cache.memory_pickle",
+    "dogpile.cache.null",
+)
+
+_PERSISTENT_BACKENDS = ("sieve_cache.mmap",)
+
+# NOTE: These backends are shared by several processes and evict by
+# themselves; deleting the entries one process evicts from its own lists
+# would throw away entries that are hot in the others.
+_SELF_EVICTING_BACKENDS = ("sieve_cache.shared_memory",)
+
 _DEFAULT_BACKEND = "dogpile.cache.null"
 
+# NOTE: Submodules pulling in asyncio, multiprocessing or a serialization
+# library are only imported when first used, which keeps ``import
+# sieve_cache`` cheap for processes that never build a cache.
+_LAZY_SUBMODULES = ("serializers", "sieve", "tiered")
+
+
+def __getattr__(name):
+    if name in _LAZY_SUBMODULES:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_SUBMODULES))
+
 
 def create_sieve(
     backend=_DEFAULT_BACKEND,
@@ -41,6 +106,9 @@ def create_sieve(
     config_prefix="cache.sieve",
     backend_arguments=None,
     namespace=None,
+    fast_keys=False,
+    key_mangler=None,
+    serializer=None,
     **configs,
 ):
     """Create a new Sieve instance.
@@ -48,15 +116,113 @@ def create_sieve(
     :param backend: The backend to use. Default is 'memory'.
     :param config_prefix: The prefix to use for configuration options.
     :param namespace: The namespace to use for the cache.
+    :param fast_keys: Key entries by a tuple of the function arguments,
+        like :func:`functools.lru_cache`, instead of stringifying and
+        hashing them on every call. Only supported by local backends, and
+        the arguments must be hashable.
+    :param key_mangler: Mangles string keys before they reach the backend.
+        Defaults to SHA-1; :func:`blake2b_mangle_key` is a cheaper option.
+    :param serializer: A :class:`sieve_cache.serializers.Serializer` used
+        for every value instead of the backend's default. Values it
+        cannot serialize are returned uncached.
     :param configs: Additional configuration options.
     :param backend_arguments: A dictionary of backend-specific arguments.
     :return: A new Sieve instance.
     """
-    region = create_region()
+    from sieve_cache import sieve
+
+    region = _configure_region(
+        backend,
+        config_prefix=config_prefix,
+        backend_arguments=backend_arguments,
+        fast_keys=fast_keys,
+        key_mangler=key_mangler,
+        serializer=serializer,
+        **configs,
+    )
+    # NOTE: Entries of a persistent backend outlive the process that
+    # inserted them; adopt them so they are evicted like the others.
+    return sieve.Sieve(
+        backend=region,
+        namespace=namespace,
+        adopt=backend in _PERSISTENT_BACKENDS,
+        backend_evicts=backend in _SELF_EVICTING_BACKENDS,
+        local_backend=backend in _LOCAL_BACKENDS,
+    )
+
+
+def create_tiered_sieve(
+    backend=_DEFAULT_BACKEND,
+    *,
+    config_prefix="cache.sieve",
+    backend_arguments=None,
+    namespace=None,
+    bus=None,
+    l1_expiration_time=None,
+    key_mangler=None,
+    serializer=None,
+    **configs,
+):
+    """Create a TieredSieve with an in-process L1 in front of ``backend``.
+
+    :param backend: The backend used as L2.
+    :param config_prefix: The prefix to use for configuration options.
+    :param namespace: The namespace to use for the cache.
+    :param bus: The :class:`sieve_cache.tiered.InvalidationBus` L1
+        invalidations are published on. Other processes only receive them
+        through a bus bridged to a real pub/sub channel.
+    :param l1_expiration_time: Maximum number of seconds a value stays in
+        L1. Defaults to the expiration time of ``backend``. 0 keeps values
+        until they are evicted.
+    :param key_mangler: Mangles keys before they reach the backend.
+        Defaults to SHA-1.
+    :param serializer: A :class:`sieve_cache.serializers.Serializer` used
+        for L2 values instead of the backend's default.
+    :param configs: Additional configuration options.
+    :param backend_arguments: A dictionary of backend-specific arguments.
+    :return: A new TieredSieve instance.
+    """
+    from sieve_cache import tiered
+
+    region = _configure_region(
+        backend,
+        config_prefix=config_prefix,
+        backend_arguments=backend_arguments,
+        key_mangler=key_mangler,
+        serializer=serializer,
+        **configs,
+    )
+    return tiered.TieredSieve(
+        region,
+        namespace=namespace,
+        bus=bus,
+        l1_expiration_time=l1_expiration_time,
+    )
+
+
+def _configure_region(
+    backend,
+    config_prefix="cache.sieve",
+    backend_arguments=None,
+    fast_keys=False,
+    key_mangler=None,
+    serializer=None,
+    **configs,
+):
+    """Create a region configured for ``backend``."""
     if backend not in _BACKENDS:
         raise exceptions.SieveCacheException(
             f"Invalid backend '{backend}'. Must be one of: {_BACKENDS}"
         )
+    if fast_keys and backend not in _LOCAL_BACKENDS:
+        raise exceptions.SieveCacheException(
+            f"fast_keys is only supported by local backends: "
+            f"{_LOCAL_BACKENDS}"
+        )
+    function = (
+        tuple_function_key_generator if fast_keys else function_key_generator
+    )
+    region = create_region(function, serializer=serializer)
     configs = _build_config_opts(
         backend=backend,
         prefix=config_prefix,
@@ -65,10 +231,15 @@ def create_sieve(
     )
     region.configure_from_config(configs, prefix="%s." % config_prefix)
 
-    if region.key_mangler is None:
+    if fast_keys:
+        # NOTE: The backend may have installed its own mangler, which
+        # expects string keys.
+        region.key_mangler = None
+    elif key_mangler is not None:
+        region.key_mangler = key_mangler
+    elif region.key_mangler is None:
         region.key_mangler = _sha1_mangle_key
-
-    return sieve.Sieve(backend=region, namespace=namespace)
+    return region
 
 
 def _build_config_opts(
@@ -114,6 +285,8 @@ def _build_config_opts(
         opts["%s.arguments.%s" % (prefix, arg)] = value
 
     if configs.get("tls_enabled", False):
+        import ssl
+
         tls_cafile = configs["tls_cafile"]
         tls_context = ssl.create_default_context(cafile=tls_cafile)
 
@@ -198,6 +371,19 @@ def _sha1_mangle_key(key):
     return util.sha1_mangle_key(key)
 
 
+def blake2b_mangle_key(key):
+    """Mangle ``key`` into a 32 character BLAKE2b hex digest.
+
+    Like :func:`_sha1_mangle_key`, but with a shorter digest that is
+    cheaper to compute and store.
+    """
+    try:
+        key = key.encode("utf-8", errors="xmlcharrefreplace")
+    except (UnicodeError, AttributeError):
+        pass
+    return hashlib.blake2b(key, digest_size=16).hexdigest()
+
+
 def _key_generate_to_str(s):
     # NOTE: Since we need to stringify all arguments, attempt
     # to stringify and handle the Unicode error explicitly as needed.
@@ -219,7 +405,44 @@ def kwarg_function_key_generator(namespace, fn, to_str=_key_generate_to_str):
     return util.kwarg_function_key_generator(namespace, fn, to_str=to_str)
 
 
-def create_region(function=function_key_generator):
+# NOTE: Separates positional from keyword arguments in tuple keys, like
+# functools.lru_cache does.
+_KWD_MARK = ("sieve_cache.kwd_mark",)
+
+
+def tuple_function_key_generator(namespace, fn, to_str=None):
+    """Return a key generator that builds hashable tuple keys.
+
+    The arguments are used as they are instead of being stringified, so
+    generating a key costs a single tuple allocation. The keys are only
+    meaningful within the process and are meant for local backends.
+
+    :param namespace: The namespace of the keys.
+    :param fn: The function the keys are generated for.
+    :param to_str: Unused; accepted for signature compatibility with
+        :func:`function_key_generator`.
+    """
+    if namespace is None:
+        prefix = "%s:%s" % (fn.__module__, fn.__name__)
+    else:
+        prefix = "%s:%s|%s" % (fn.__module__, fn.__name__, namespace)
+
+    import inspect
+
+    params = inspect.getfullargspec(fn).args
+    has_self = bool(params) and params[0] in ("self", "cls")
+
+    def generate_key(*args, **kwargs):
+        if has_self:
+            args = args[1:]
+        if kwargs:
+            return (prefix, *args) + _KWD_MARK + tuple(kwargs.items())
+        return (prefix, *args)
+
+    return generate_key
+
+
+def create_region(function=function_key_generator, serializer=None):
     """Create a region.
 
     This is just dogpile.backends.make_region, but the key generator has a
@@ -228,9 +451,17 @@ def create_region(function=function_key_generator):
 
     :param function: function used to generate a unique key depending on the
                      arguments of the decorated function.
+    :param serializer: optional :class:`sieve_cache.serializers.Serializer`
+                       replacing the backend's default serialization.
     :returns: The new region.
     :rtype: :class:`dogpile.cache.region.CacheRegion`
 
     """
 
-    return _region.make_region(function_key_generator=function)
+    if serializer is None:
+        return _region.make_region(function_key_generator=function)
+    return _region.make_region(
+        function_key_generator=function,
+        serializer=serializer.dumps,
+        deserializer=serializer.loads,
+    )
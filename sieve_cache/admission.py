@@ -0,0 +1,118 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#  #
+#          http://www.apache.org/licenses/LICENSE-2.0
+#  #
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+
+import typing as ty
+
+__all__ = ["AdmissionPolicy", "TinyLFU"]
+
+DEFAULT_DEPTH = 4
+DEFAULT_SAMPLE_FACTOR = 10
+MAX_COUNT = 15
+
+_MASK32 = 0xFFFFFFFF
+_HALVE = bytes(count >> 1 for count in range(256))
+
+
+class AdmissionPolicy(ty.Protocol):
+    """Decides whether a new key may replace the eviction candidate.
+
+    ``record`` is called on every lookup of a decorated function, hit or
+    miss. ``admit`` is called when a new key would evict an entry.
+    """
+
+    def record(self, key) -> None:
+        ...
+
+    def admit(self, candidate, victim) -> bool:
+        ...
+
+
+class TinyLFU:
+    """Admit a key only if it is requested more often than the victim.
+
+    Frequencies are estimated with a count-min sketch of 4-bit counters.
+    A Bloom filter doorkeeper absorbs the first request of every key, so
+    keys seen once never reach the sketch and are estimated at 1, which
+    never beats a victim that was requested again. After ``capacity *
+    sample_factor`` requests every counter is halved and the doorkeeper is
+    cleared, so old popularity decays.
+
+    Updates are not locked; a lost increment only makes one estimate
+    slightly lower.
+
+    :param capacity: Number of entries of the protected cache. The sketch
+        has a row of counters per hash function, each rounded up to a
+        power of two at least this wide.
+    :param sample_factor: Number of requests per entry between two decays.
+    :param depth: Number of hash functions of the sketch.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        sample_factor: int = DEFAULT_SAMPLE_FACTOR,
+        depth: int = DEFAULT_DEPTH,
+    ):
+        if capacity < 1 or sample_factor < 1 or depth < 1:
+            raise ValueError(
+                "capacity, sample_factor and depth must be greater than 0"
+            )
+        width = 1 << max(4, (capacity - 1).bit_length())
+        self._mask = width - 1
+        self._rows = [bytearray(width) for _ in range(depth)]
+        self._door = bytearray(width * 2)
+        self._door_mask = width * 2 - 1
+        self._sample = capacity * sample_factor
+        self._records = 0
+
+    def _hashes(self, key) -> ty.Tuple[int, int]:
+        h = hash(key)
+        return h & _MASK32, ((h >> 32) & _MASK32) | 1
+
+    def record(self, key) -> None:
+        """Count one request of ``key``."""
+        h1, h2 = self._hashes(key)
+        door, door_mask = self._door, self._door_mask
+        first, second = h1 & door_mask, h2 & door_mask
+        if door[first] and door[second]:
+            mask = self._mask
+            for row, table in enumerate(self._rows):
+                index = (h1 + row * h2) & mask
+                if table[index] < MAX_COUNT:
+                    table[index] += 1
+        else:
+            door[first] = door[second] = 1
+        self._records += 1
+        if self._records >= self._sample:
+            self._decay()
+
+    def estimate(self, key) -> int:
+        """Return the estimated number of recent requests of ``key``."""
+        h1, h2 = self._hashes(key)
+        door_mask = self._door_mask
+        if not (self._door[h1 & door_mask] and self._door[h2 & door_mask]):
+            return 0
+        mask = self._mask
+        return 1 + min(
+            table[(h1 + row * h2) & mask]
+            for row, table in enumerate(self._rows)
+        )
+
+    def admit(self, candidate, victim) -> bool:
+        """Return whether ``candidate`` is more popular than ``victim``."""
+        return self.estimate(candidate) > self.estimate(victim)
+
+    def _decay(self) -> None:
+        for table in self._rows:
+            table[:] = table.translate(_HALVE)
+        self._door[:] = bytes(len(self._door))
+        self._records = 0
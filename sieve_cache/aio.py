@@ -0,0 +1,92 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#  #
+#          http://www.apache.org/licenses/LICENSE-2.0
+#  #
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+from concurrent import futures
+import functools
+import typing as ty
+
+from dogpile.cache import api
+from dogpile.cache import region
+
+__all__ = ["AsyncBackend", "InlineBackend", "ThreadedBackend"]
+
+
+class AsyncBackend(ty.Protocol):
+    """Backend interface used by :meth:`sieve_cache.sieve.Sieve.acache`.
+
+    It mirrors the subset of :class:`dogpile.cache.region.CacheRegion`
+    that the SIEVE wrapper needs, with every call awaitable.
+    """
+
+    async def get(self, key: api.KeyType) -> api.ValuePayload:
+        ...
+
+    async def set(self, key: api.KeyType, value: api.ValuePayload) -> None:
+        ...
+
+    async def delete(self, key: api.KeyType) -> None:
+        ...
+
+
+class InlineBackend:
+    """Call a region directly from the event loop thread.
+
+    This is the default, and the right choice for in-process backends
+    where a call never blocks on I/O.
+    """
+
+    def __init__(self, backend: region.CacheRegion):
+        self._backend = backend
+
+    async def get(self, key: api.KeyType) -> api.ValuePayload:
+        return self._backend.get(key)
+
+    async def set(self, key: api.KeyType, value: api.ValuePayload) -> None:
+        self._backend.set(key, value)
+
+    async def delete(self, key: api.KeyType) -> None:
+        self._backend.delete(key)
+
+
+class ThreadedBackend:
+    """Run a region's calls in an executor, off the event loop thread.
+
+    Use this for network backends such as Redis or memcached.
+
+    :param backend: The region to wrap.
+    :param executor: The executor to run calls in. Defaults to the
+        running loop's default executor.
+    """
+
+    def __init__(
+        self,
+        backend: region.CacheRegion,
+        executor: ty.Optional[futures.Executor] = None,
+    ):
+        self._backend = backend
+        self._executor = executor
+
+    async def _run(self, fn, *args):
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(fn, *args)
+        )
+
+    async def get(self, key: api.KeyType) -> api.ValuePayload:
+        return await self._run(self._backend.get, key)
+
+    async def set(self, key: api.KeyType, value: api.ValuePayload) -> None:
+        await self._run(self._backend.set, key, value)
+
+    async def delete(self, key: api.KeyType) -> None:
+        await self._run(self._backend.delete, key)
@@ -0,0 +1,230 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#  #
+#          http://www.apache.org/licenses/LICENSE-2.0
+#  #
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+"""A SIEVE list of fixed-size entry slots laid out in a flat buffer.
+
+The buffer can be a memory-mapped file or shared memory. It holds a
+header, one record per slot and one data block per slot::
+
+    header   magic, slots, slot_size, head, tail, hand, count
+    records  used, visited, prev, next, key length, value length
+    data     key bytes followed by value bytes
+
+Everything needed to resume eviction lives in the buffer, so reopening it
+restores the list, the visited bits and the hand. Callers serialize
+access; the arena itself does no locking.
+"""
+
+import pickle
+import struct
+import typing as ty
+
+from sieve_cache.common import exceptions
+
+NIL = -1
+
+MAGIC = b"SIEVEAR1"
+_HEADER = struct.Struct("<8sQQqqqQ")
+_HEADER_SIZE = 64
+_RECORD = struct.Struct("<BB6xqqII")
+_LINK = struct.Struct("<q")
+
+# Offsets of the mutable header fields and of the record fields.
+_HEAD, _TAIL, _HAND, _COUNT = 24, 32, 40, 48
+_VISITED, _PREV, _NEXT = 1, 8, 16
+
+
+def loads(data: bytes) -> ty.Any:
+    """Unpickle a value read from a slot.
+
+    A value that cannot be unpickled raises
+    :class:`~sieve_cache.common.exceptions.CantDeserializeException`, so
+    the region treats the slot as a miss instead of failing every call.
+    """
+    try:
+        return pickle.loads(data)
+    except Exception as e:
+        raise exceptions.CantDeserializeException(str(e)) from e
+
+
+class Arena:
+    """Fixed-size slots linked into a SIEVE list inside ``buffer``.
+
+    :param buffer: A writable buffer of at least :meth:`size` bytes.
+    :param slots: Number of slots.
+    :param slot_size: Bytes available for the key and value of a slot.
+    """
+
+    def __init__(self, buffer, slots: int, slot_size: int):
+        if slots < 1 or slot_size < 1:
+            raise ValueError("slots and slot_size must be greater than 0")
+        self.buffer = memoryview(buffer)
+        self.slots = slots
+        self.slot_size = slot_size
+        self._data = _HEADER_SIZE + slots * _RECORD.size
+
+    @staticmethod
+    def size(slots: int, slot_size: int) -> int:
+        """Return the number of bytes an arena of this shape needs."""
+        return _HEADER_SIZE + slots * (_RECORD.size + slot_size)
+
+    def is_formatted(self) -> bool:
+        """Return whether the buffer holds an arena of this shape."""
+        magic, slots, slot_size = _HEADER.unpack_from(self.buffer)[:3]
+        return (magic, slots, slot_size) == (
+            MAGIC,
+            self.slots,
+            self.slot_size,
+        )
+
+    def format(self) -> None:
+        """Initialise an empty arena, discarding any previous content."""
+        self.buffer[: self._data] = bytes(self._data)
+        _HEADER.pack_into(
+            self.buffer, 0, MAGIC, self.slots, self.slot_size, NIL, NIL, NIL, 0
+        )
+
+    def _get(self, offset: int) -> int:
+        return _LINK.unpack_from(self.buffer, offset)[0]
+
+    def _put(self, offset: int, value: int) -> None:
+        _LINK.pack_into(self.buffer, offset, value)
+
+    def _record(self, slot: int) -> int:
+        return _HEADER_SIZE + slot * _RECORD.size
+
+    @property
+    def count(self) -> int:
+        return self._get(_COUNT)
+
+    @property
+    def hand(self) -> int:
+        return self._get(_HAND)
+
+    def used(self) -> ty.Iterator[int]:
+        """Yield the used slots, newest first."""
+        slot = self._get(_HEAD)
+        while slot != NIL:
+            yield slot
+            slot = self._get(self._record(slot) + _NEXT)
+
+    def free(self) -> ty.List[int]:
+        """Return the unused slots."""
+        buffer, size = self.buffer, _RECORD.size
+        return [
+            slot
+            for slot in range(self.slots)
+            if not buffer[_HEADER_SIZE + slot * size]
+        ]
+
+    def key(self, slot: int) -> memoryview:
+        key_len = _RECORD.unpack_from(self.buffer, self._record(slot))[4]
+        start = self._data + slot * self.slot_size
+        return self.buffer[start:start + key_len]
+
+    def value(self, slot: int) -> memoryview:
+        """Return a view of the value of ``slot``, without copying it."""
+        record = _RECORD.unpack_from(self.buffer, self._record(slot))
+        start = self._data + slot * self.slot_size + record[4]
+        return self.buffer[start:start + record[5]]
+
+    def visit(self, slot: int) -> None:
+        self.buffer[self._record(slot) + _VISITED] = 1
+
+    def fits(self, key: bytes, value: bytes) -> bool:
+        return len(key) + len(value) <= self.slot_size
+
+    def write(self, slot: int, key: bytes, value: bytes) -> None:
+        """Store ``key`` and ``value`` in ``slot``.
+
+        A free slot is linked at the head of the list; a used slot keeps
+        its position and visited bit.
+        """
+        start = self._data + slot * self.slot_size
+        self.buffer[start:start + len(key)] = key
+        end = start + len(key) + len(value)
+        self.buffer[start + len(key):end] = value
+
+        offset = self._record(slot)
+        used, visited, prev, next_slot = _RECORD.unpack_from(
+            self.buffer, offset
+        )[:4]
+        if not used:
+            visited, prev, next_slot = 0, NIL, self._get(_HEAD)
+        _RECORD.pack_into(
+            self.buffer,
+            offset,
+            1,
+            visited,
+            prev,
+            next_slot,
+            len(key),
+            len(value),
+        )
+        if not used:
+            if next_slot != NIL:
+                self._put(self._record(next_slot) + _PREV, slot)
+            self._put(_HEAD, slot)
+            if self._get(_TAIL) == NIL:
+                self._put(_TAIL, slot)
+            self._put(_COUNT, self.count + 1)
+
+    def remove(self, slot: int) -> None:
+        """Unlink ``slot`` and mark it free."""
+        offset = self._record(slot)
+        prev = self._get(offset + _PREV)
+        next_slot = self._get(offset + _NEXT)
+        if prev != NIL:
+            self._put(self._record(prev) + _NEXT, next_slot)
+        else:
+            self._put(_HEAD, next_slot)
+        if next_slot != NIL:
+            self._put(self._record(next_slot) + _PREV, prev)
+        else:
+            self._put(_TAIL, prev)
+        if self.hand == slot:
+            self._put(_HAND, prev)
+        self.buffer[offset:offset + _RECORD.size] = bytes(_RECORD.size)
+        self._put(_COUNT, self.count - 1)
+
+    def find_free(self, start: int = 0) -> int:
+        """Return the first unused slot at or after ``start``, wrapping.
+
+        :raises LookupError: If every slot is used.
+        """
+        buffer, size = self.buffer, _RECORD.size
+        for i in range(self.slots):
+            slot = (start + i) % self.slots
+            if not buffer[_HEADER_SIZE + slot * size]:
+                return slot
+        raise LookupError("arena is full")
+
+    def choose(self) -> int:
+        """Move the SIEVE hand to the next victim and return its slot.
+
+        Visited bits passed on the way are cleared. The slot stays linked
+        until :meth:`remove` is called, so its key can still be read.
+        """
+        buffer = self.buffer
+        tail = self._get(_TAIL)
+        slot = self.hand if self.hand != NIL else tail
+        while buffer[self._record(slot) + _VISITED]:
+            buffer[self._record(slot) + _VISITED] = 0
+            prev = self._get(self._record(slot) + _PREV)
+            slot = prev if prev != NIL else tail
+        self._put(_HAND, self._get(self._record(slot) + _PREV))
+        return slot
+
+    def evict(self) -> int:
+        """Free the slot chosen by the SIEVE hand and return it."""
+        slot = self.choose()
+        self.remove(slot)
+        return slot
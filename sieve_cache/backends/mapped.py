@@ -0,0 +1,222 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#  #
+#          http://www.apache.org/licenses/LICENSE-2.0
+#  #
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+import fcntl
+import logging
+import mmap
+import os
+import pickle
+import threading
+import typing as ty
+
+from dogpile.cache import api
+
+from sieve_cache.backends import _arena
+from sieve_cache.common import exceptions
+
+__all__ = ["MmapDriver"]
+
+LOG = logging.getLogger(__name__)
+
+_NO_VALUE = api.NO_VALUE
+
+DEFAULT_SLOTS = 1024
+DEFAULT_SLOT_SIZE = 4096
+
+
+class MmapDriver(api.CacheBackend):
+    """A persistent backend storing entries in a memory-mapped file.
+
+    Entries live in fixed-size slots linked into a SIEVE list that is kept
+    in the file together with the visited bits and the hand, so when the
+    file is full the least valuable entry is replaced, and a process that
+    reopens the file resumes where the previous one stopped. Opening only
+    reads the keys to rebuild the index; values are read from the mapping
+    on first access.
+
+    The file must only be used by one process at a time; it is locked
+    with ``flock`` while open, and opening a locked file raises
+    :class:`sieve_cache.common.exceptions.SieveCacheException`.
+
+    Arguments accepted in the arguments dictionary:
+
+    :param path: path of the cache file. It is created if missing, and
+        reinitialised if it was created with a different ``slots`` or
+        ``slot_size``.
+    :type path: str
+    :param slots: maximum number of entries. Default is 1024.
+    :type slots: int
+    :param slot_size: bytes available for the pickled key and the
+        serialized value of one entry. Larger values are rejected with
+        :class:`sieve_cache.common.exceptions.CantSerializeException`.
+        Default is 4096.
+    :type slot_size: int
+    """
+
+    serializer = staticmethod(pickle.dumps)
+    deserializer = staticmethod(_arena.loads)
+
+    def __init__(self, arguments: api.BackendArguments):
+        self.path = arguments["path"]
+        slots = int(arguments.get("slots", DEFAULT_SLOTS))
+        slot_size = int(arguments.get("slot_size", DEFAULT_SLOT_SIZE))
+        self._lock = threading.Lock()
+
+        size = _arena.Arena.size(slots, slot_size)
+        # NOTE: The descriptor stays open to hold the lock until close().
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(self._fd)
+            raise exceptions.SieveCacheException(
+                f"Cache file {self.path} is already in use"
+            )
+        try:
+            if os.fstat(self._fd).st_size != size:
+                os.ftruncate(self._fd, size)
+            self._mmap = mmap.mmap(self._fd, size)
+        except BaseException:
+            os.close(self._fd)
+            raise
+
+        self._arena = _arena.Arena(self._mmap, slots, slot_size)
+        self._keys: ty.List[ty.Any] = [None] * slots
+        self._index: ty.Dict[ty.Any, int] = {}
+        if self._arena.is_formatted():
+            try:
+                self._load_index()
+            except Exception:
+                LOG.warning("Discarding unreadable cache file %s", self.path)
+                self._arena.format()
+                self._keys = [None] * slots
+                self._index = {}
+        else:
+            self._arena.format()
+        # NOTE: Fill the file from the start.
+        self._free = self._arena.free()[::-1]
+
+    def _load_index(self) -> None:
+        for slot in self._arena.used():
+            key = pickle.loads(self._arena.key(slot))
+            self._keys[slot] = key
+            self._index[key] = slot
+
+    def get(self, key: api.KeyType) -> api.BackendFormatted:
+        """Retrieves the value for a key and marks it visited.
+
+        :param key: dictionary key
+        :returns: value for a key or :data:`dogpile.backends.NO_VALUE`
+            for nonexistent keys.
+        """
+        with self._lock:
+            slot = self._index.get(key)
+            if slot is None:
+                return _NO_VALUE
+            self._arena.visit(slot)
+            return bytes(self._arena.value(slot))
+
+    def get_multi(
+        self, keys: ty.Sequence[api.KeyType]
+    ) -> ty.Sequence[api.BackendFormatted]:
+        """Retrieves the value for a list of keys."""
+        return [self.get(key) for key in keys]
+
+    def set(self, key: api.KeyType, value: api.BackendSetType) -> None:
+        """Set a value in the backends.
+
+        :param key: dictionary key
+        :param value: serialized value to be stored
+        """
+        self.set_multi({key: value})
+
+    def set_multi(
+        self, mapping: ty.Mapping[api.KeyType, api.BackendSetType]
+    ) -> None:
+        """Set multiple values in the backends.
+
+        Values that do not fit in a slot are not stored, and any previous
+        value of their key is removed. The others are stored before
+        :class:`sieve_cache.common.exceptions.CantSerializeException` is
+        raised for them.
+
+        :param mapping: dictionary with key/value pairs
+        """
+        oversized = []
+        with self._lock:
+            for key, value in mapping.items():
+                data = pickle.dumps(key, protocol=pickle.HIGHEST_PROTOCOL)
+                if not self._arena.fits(data, value):
+                    oversized.append(key)
+                    self._remove(key)
+                    continue
+                slot = self._index.get(key)
+                if slot is None:
+                    slot = self._allocate()
+                    self._keys[slot] = key
+                    self._index[key] = slot
+                self._arena.write(slot, data, value)
+        if oversized:
+            raise exceptions.CantSerializeException(
+                f"{len(oversized)} value(s) exceed the slot size of "
+                f"{self._arena.slot_size} bytes"
+            )
+
+    def delete(self, key: api.KeyType) -> None:
+        """Delete a value from the backends.
+
+        :param key: dictionary key
+        """
+        self.delete_multi([key])
+
+    def delete_multi(self, keys: ty.Sequence[api.KeyType]) -> None:
+        """Delete multiple values from the backends.
+
+        :param keys: list of dictionary keys
+        """
+        with self._lock:
+            for key in keys:
+                self._remove(key)
+
+    def flush(self) -> None:
+        """Write dirty pages of the mapping back to the file."""
+        with self._lock:
+            self._mmap.flush()
+
+    def close(self) -> None:
+        """Flush and unmap the file and release its lock."""
+        with self._lock:
+            if not self._mmap.closed:
+                self._arena.buffer.release()
+                self._mmap.flush()
+                self._mmap.close()
+                os.close(self._fd)
+
+    def _allocate(self) -> int:
+        """Return a free slot, evicting with the SIEVE hand if needed.
+
+        The caller must hold ``self._lock``.
+        """
+        if self._free:
+            return self._free.pop()
+        slot = self._arena.evict()
+        del self._index[self._keys[slot]]
+        self._keys[slot] = None
+        return slot
+
+    def _remove(self, key: api.KeyType) -> None:
+        """The caller must hold ``self._lock``."""
+        slot = self._index.pop(key, None)
+        if slot is None:
+            return
+        self._arena.remove(slot)
+        self._keys[slot] = None
+        self._free.append(slot)
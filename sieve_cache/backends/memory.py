@@ -9,7 +9,12 @@
 #  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 #  License for the specific language governing permissions and limitations
 #  under the License.
+import heapq
+import itertools
+import threading
+import time
 import typing as ty
+import weakref
 
 from dogpile.cache import api
 
@@ -19,24 +24,44 @@ __all__ = ["InMemoryDriver"]
 
 _NO_VALUE = api.NO_VALUE
 
+# Maximum number of expired keys drained by a single set.
+_DRAIN_BATCH = 8
+
 
 class InMemoryDriver(api.CacheBackend):
     """A InMemoryDriver that based on dictionary.
 
+    Expired keys are tracked in a min-heap ordered by deadline. Each set
+    drains at most a few expired keys from the top of the heap, so the
+    cost of expiration does not grow with the size of the cache.
+
     Arguments accepted in the arguments dictionary:
 
     :param expiration_time: interval in seconds to indicate maximum
-        time-to-live value for each key in DictCacheBackend.
+        time-to-live value for each key in DictCacheBackend. Fractions of a
+        second are honoured, and deadlines follow a monotonic clock.
         Default expiration_time value is 0, that means that all keys have
-        infinite time-to-live value.
+        infinite time-to-live value. It can be overridden per call with
+        the ``expiration_time`` argument of :meth:`set` and
+        :meth:`set_multi`.
     :type expiration_time: real
+    :param reaper_interval: interval in seconds at which a background
+        daemon thread drains every expired key. Default is 0, that means
+        expired keys are only drained incrementally by ``set`` calls and
+        on access.
+    :type reaper_interval: real
     """
 
     def __init__(self, arguments: api.BackendArguments):
-        super().__init__(arguments)
-
         self.expiration_time = arguments.get("expiration_time", 0)
         self.cache = {}
+        self._expiry: ty.List[ty.Tuple[float, int, api.KeyType]] = []
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+        self.reaper_interval = arguments.get("reaper_interval", 0)
+        if self.reaper_interval > 0:
+            self._start_reaper(self.reaper_interval)
 
     def get(self, key: api.KeyType) -> api.BackendFormatted:
         """Retrieves the value for a key.
@@ -46,7 +71,7 @@ class InMemoryDriver(api.CacheBackend):
             for nonexistent or expired keys.
         """
         (value, timeout) = self.cache.get(key, (_NO_VALUE, 0))
-        if self.expiration_time > 0 and timeutils.utcnow_ts() >= timeout:
+        if timeout and timeutils.monotonic() >= timeout:
             self.cache.pop(key, None)
             return _NO_VALUE
 
@@ -58,28 +83,50 @@ class InMemoryDriver(api.CacheBackend):
         """Retrieves the value for a list of keys."""
         yield from map(self.get, keys)
 
-    def set(self, key: api.KeyType, value: api.BackendSetType) -> None:
+    def set(
+        self,
+        key: api.KeyType,
+        value: api.BackendSetType,
+        expiration_time: ty.Optional[float] = None,
+    ) -> None:
         """Set a value in the backends.
 
         :param key: dictionary key
         :param value: value to be stored
+        :param expiration_time: time-to-live in seconds for this key,
+            overriding the driver's ``expiration_time``. 0 means the key
+            never expires.
         """
-        self.set_multi({key: value})
+        self.set_multi({key: value}, expiration_time=expiration_time)
 
     def set_multi(
-        self, mapping: ty.Mapping[api.KeyType, api.BackendSetType]
+        self,
+        mapping: ty.Mapping[api.KeyType, api.BackendSetType],
+        expiration_time: ty.Optional[float] = None,
     ) -> None:
         """Set multiple values in the backends.
-        Expunges expired keys during each set.
+        Drains a bounded number of expired keys during each set.
 
         :param mapping: dictionary with key/value pairs
+        :param expiration_time: time-to-live in seconds for these keys,
+            overriding the driver's ``expiration_time``. 0 means the keys
+            never expire.
         """
-        self._clear()
-        timeout = 0
-        if self.expiration_time > 0:
-            timeout = timeutils.utcnow_ts() + self.expiration_time
-        for key, value in mapping.items():
-            self.cache[key] = (value, timeout)
+        if expiration_time is None:
+            expiration_time = self.expiration_time
+        now = timeutils.monotonic()
+        timeout = now + expiration_time if expiration_time > 0 else 0
+        with self._lock:
+            if self._expiry:
+                self._drain(now, _DRAIN_BATCH)
+            for key, value in mapping.items():
+                self.cache[key] = (value, timeout)
+                if timeout:
+                    heapq.heappush(
+                        self._expiry, (timeout, next(self._counter), key)
+                    )
+            if timeout:
+                self._compact()
 
     def delete(self, key: api.KeyType) -> None:
         """Delete a value from the backends.
@@ -96,10 +143,56 @@ class InMemoryDriver(api.CacheBackend):
         for key in keys:
             self.cache.pop(key, None)
 
+    def _drain(self, now, limit: ty.Optional[int] = None) -> None:
+        """Expunge up to ``limit`` expired keys from the top of the heap.
+
+        The caller must hold ``self._lock``. Heap entries whose key has
+        since been deleted or set again with a later deadline are
+        discarded without counting towards ``limit``.
+        """
+        expiry = self._expiry
+        while expiry and expiry[0][0] <= now:
+            timeout, _seq, key = heapq.heappop(expiry)
+            entry = self.cache.get(key)
+            if entry is None or entry[1] != timeout:
+                continue
+            # NOTE: delete_multi does not take the lock, so the key may
+            # already be gone.
+            self.cache.pop(key, None)
+            if limit is not None:
+                limit -= 1
+                if limit <= 0:
+                    return
+
+    def _compact(self) -> None:
+        """Rebuild the heap once stale entries outnumber live ones."""
+        if len(self._expiry) <= 2 * len(self.cache) + 64:
+            return
+        self._expiry = [
+            (timeout, next(self._counter), key)
+            for key, (_value, timeout) in self.cache.items()
+            if timeout
+        ]
+        heapq.heapify(self._expiry)
+
     def _clear(self):
         """Expunges expired keys."""
-        now = timeutils.utcnow_ts()
-        for k in list(self.cache):
-            (_val, timeout) = self.cache[k]
-            if 0 < timeout <= now:
-                del self.cache[k]
+        with self._lock:
+            self._drain(timeutils.monotonic())
+
+    def _start_reaper(self, interval) -> None:
+        ref = weakref.ref(self)
+
+        def reap():
+            while True:
+                time.sleep(interval)
+                backend = ref()
+                if backend is None:
+                    return
+                backend._clear()
+                del backend
+
+        thread = threading.Thread(
+            target=reap, name="sieve-cache-reaper", daemon=True
+        )
+        thread.start()
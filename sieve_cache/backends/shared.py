@@ -0,0 +1,445 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#  #
+#          http://www.apache.org/licenses/LICENSE-2.0
+#  #
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+import contextlib
+import fcntl
+import hashlib
+import os
+import pickle
+import struct
+import sys
+import tempfile
+import threading
+import typing as ty
+from multiprocessing import resource_tracker
+from multiprocessing import shared_memory
+
+from dogpile.cache import api
+
+from sieve_cache.backends import _arena
+from sieve_cache.common import exceptions
+
+__all__ = ["SharedMemoryDriver"]
+
+_NO_VALUE = api.NO_VALUE
+
+DEFAULT_NAME = "sieve_cache"
+DEFAULT_SHARDS = 16
+DEFAULT_SLOTS = 4096
+DEFAULT_SLOT_SIZE = 4096
+
+MAGIC = b"SIEVESH1"
+_HEADER = struct.Struct("<8sQQQQ")
+_HEADER_SIZE = 64
+_SHARD_HEADER = struct.Struct("<QQ")
+_SHARD_HEADER_SIZE = 64
+_ENTRY = struct.Struct("<Qq")
+
+_EMPTY = -1
+_TOMBSTONE = -2
+
+
+def _hash(data: bytes) -> int:
+    # NOTE: hash() is salted per process; every worker must agree.
+    digest = hashlib.blake2b(data, digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def _start(digest: int) -> int:
+    # NOTE: The low bits pick the shard, so they are the same for every
+    # key of a shard; probe from the high bits.
+    return digest >> 32
+
+
+class _ShardLocks:
+    """One lock per shard, held across threads and processes.
+
+    Each lock pairs a thread lock with an ``fcntl`` lock on one byte of a
+    lock file. The kernel releases the byte lock if its holder dies, so a
+    crashed worker never leaves a shard locked.
+
+    ``fcntl`` locks never exclude each other within a process, so every
+    driver of a process using the same lock file shares one instance; get
+    it with :func:`_shard_locks`.
+    """
+
+    def __init__(self, path: str, count: int, key: ty.Tuple):
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        # NOTE: The extra lock serialises creating the segment.
+        self._locks = [threading.Lock() for _ in range(count + 1)]
+        self._key = key
+        self._users = 0
+
+    @contextlib.contextmanager
+    def hold(self, index: int):
+        with self._locks[index]:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, index)
+            try:
+                yield
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, index)
+
+    def close(self) -> None:
+        """Release one user; the lock file is closed with the last one."""
+        with _registry_lock:
+            self._users -= 1
+            if self._users:
+                return
+            _registry.pop(self._key, None)
+        os.close(self._fd)
+
+
+_registry: ty.Dict[ty.Tuple, _ShardLocks] = {}
+_registry_lock = threading.Lock()
+
+
+def _shard_locks(path: str, count: int) -> _ShardLocks:
+    # NOTE: Keyed by pid so a forked child does not share the thread locks,
+    # possibly held, of its parent.
+    key = (os.getpid(), os.path.realpath(path), count)
+    with _registry_lock:
+        locks = _registry.get(key)
+        if locks is None:
+            locks = _registry[key] = _ShardLocks(path, count, key)
+        locks._users += 1
+    return locks
+
+
+class _Shard:
+    """A SIEVE arena and the open-addressing index of its keys."""
+
+    def __init__(self, buffer, slots: int, slot_size: int, table: int):
+        self.buffer = buffer
+        self.table = table
+        index_end = _SHARD_HEADER_SIZE + table * _ENTRY.size
+        self.arena = _arena.Arena(buffer[index_end:], slots, slot_size)
+
+    @staticmethod
+    def size(slots: int, slot_size: int, table: int) -> int:
+        return (
+            _SHARD_HEADER_SIZE
+            + table * _ENTRY.size
+            + _arena.Arena.size(slots, slot_size)
+        )
+
+    def format(self) -> None:
+        _SHARD_HEADER.pack_into(self.buffer, 0, 0, 0)
+        self._clear_table()
+        self.arena.format()
+
+    def _clear_table(self) -> None:
+        for pos in range(self.table):
+            self._put(pos, 0, _EMPTY)
+
+    def _entry(self, pos: int) -> ty.Tuple[int, int]:
+        return _ENTRY.unpack_from(
+            self.buffer, _SHARD_HEADER_SIZE + pos * _ENTRY.size
+        )
+
+    def _put(self, pos: int, digest: int, slot: int) -> None:
+        _ENTRY.pack_into(
+            self.buffer, _SHARD_HEADER_SIZE + pos * _ENTRY.size, digest, slot
+        )
+
+    def _probe(self, digest: int, key: bytes) -> ty.Tuple[int, int]:
+        """Find ``key`` in the index.
+
+        :return: The table position and slot of ``key``, or the position
+            where it would be inserted and ``_EMPTY``.
+        """
+        mask = self.table - 1
+        start = _start(digest)
+        insert_at = None
+        for step in range(self.table):
+            pos = (start + step) & mask
+            entry_digest, slot = self._entry(pos)
+            if slot == _EMPTY:
+                return (pos if insert_at is None else insert_at), _EMPTY
+            if slot == _TOMBSTONE:
+                if insert_at is None:
+                    insert_at = pos
+            elif entry_digest == digest and self.arena.key(slot) == key:
+                return pos, slot
+        return insert_at, _EMPTY
+
+    def lookup(self, digest: int, key: bytes) -> int:
+        return self._probe(digest, key)[1]
+
+    def store(self, digest: int, key: bytes, value: bytes) -> None:
+        pos, slot = self._probe(digest, key)
+        if slot != _EMPTY:
+            self.arena.write(slot, key, value)
+            return
+        if self.arena.count >= self.arena.slots:
+            self._unindex(self.arena.choose())
+            # NOTE: Eviction may have turned a tombstone in front of the
+            # insert position into the better candidate; probe again.
+            pos, _slot = self._probe(digest, key)
+        tombstones, cursor = _SHARD_HEADER.unpack_from(self.buffer)
+        slot = self.arena.find_free(cursor)
+        if self._entry(pos)[1] == _TOMBSTONE:
+            tombstones -= 1
+        _SHARD_HEADER.pack_into(
+            self.buffer, 0, tombstones, (slot + 1) % self.arena.slots
+        )
+        self.arena.write(slot, key, value)
+        self._put(pos, digest, slot)
+
+    def discard(self, digest: int, key: bytes) -> None:
+        pos, slot = self._probe(digest, key)
+        if slot != _EMPTY:
+            self.arena.remove(slot)
+            self._tombstone(pos)
+
+    def _unindex(self, slot: int) -> None:
+        """Remove the index entry of ``slot`` and free it."""
+        key = bytes(self.arena.key(slot))
+        pos, _slot = self._probe(_hash(key), key)
+        # NOTE: Free the slot first; a rebuild triggered by the tombstone
+        # reindexes every slot still in use.
+        self.arena.remove(slot)
+        self._tombstone(pos)
+
+    def _tombstone(self, pos: int) -> None:
+        self._put(pos, 0, _TOMBSTONE)
+        tombstones, cursor = _SHARD_HEADER.unpack_from(self.buffer)
+        tombstones += 1
+        if tombstones > self.table // 4:
+            self._rebuild()
+            tombstones = 0
+        _SHARD_HEADER.pack_into(self.buffer, 0, tombstones, cursor)
+
+    def _rebuild(self) -> None:
+        """Reinsert every key to drop the accumulated tombstones."""
+        self._clear_table()
+        mask = self.table - 1
+        for slot in self.arena.used():
+            digest = _hash(bytes(self.arena.key(slot)))
+            pos = _start(digest) & mask
+            while self._entry(pos)[1] != _EMPTY:
+                pos = (pos + 1) & mask
+            self._put(pos, digest, slot)
+
+
+class SharedMemoryDriver(api.CacheBackend):
+    """A backend shared by the processes of one host.
+
+    Entries live in a :mod:`multiprocessing.shared_memory` segment split
+    into shards. Each shard has a fixed number of slots linked into its
+    own SIEVE list and a fixed-size open-addressing index mapping key
+    hashes to slots, so every process finds every entry without a local
+    index. A full shard evicts with its SIEVE hand.
+
+    Shards are locked independently with thread locks plus byte-range
+    ``fcntl`` locks on a lock file, so processes only contend when they
+    touch the same shard. The first process to open the segment creates
+    it; it is not removed when processes exit; call :meth:`unlink` for
+    that.
+
+    Arguments accepted in the arguments dictionary:
+
+    :param name: name of the shared memory segment. Default is
+        ``sieve_cache``.
+    :type name: str
+    :param shards: number of independently locked shards. Default is 16.
+    :type shards: int
+    :param slots: maximum number of entries, split across the shards.
+        Default is 4096.
+    :type slots: int
+    :param slot_size: bytes available for the pickled key and the
+        serialized value of one entry. Larger values are rejected with
+        :class:`sieve_cache.common.exceptions.CantSerializeException`.
+        Default is 4096.
+    :type slot_size: int
+    :param lock_path: path of the lock file. Defaults to a file named
+        after the segment in the temporary directory.
+    :type lock_path: str
+    """
+
+    serializer = staticmethod(pickle.dumps)
+    deserializer = staticmethod(_arena.loads)
+
+    def __init__(self, arguments: api.BackendArguments):
+        self.name = arguments.get("name", DEFAULT_NAME)
+        shards = int(arguments.get("shards", DEFAULT_SHARDS))
+        slots = int(arguments.get("slots", DEFAULT_SLOTS))
+        slot_size = int(arguments.get("slot_size", DEFAULT_SLOT_SIZE))
+        if shards < 1 or slots < shards:
+            raise ValueError("slots must not be less than shards")
+        lock_path = arguments.get("lock_path") or os.path.join(
+            tempfile.gettempdir(), f"{self.name}.lock"
+        )
+
+        per_shard = -(-slots // shards)
+        table = 1 << (2 * per_shard - 1).bit_length()
+        shard_size = _Shard.size(per_shard, slot_size, table)
+        end = _HEADER_SIZE + shards * shard_size
+        shape = (MAGIC, shards, per_shard, slot_size, table)
+
+        self._locks = _shard_locks(lock_path, shards)
+        with self._locks.hold(shards):
+            self._memory, created = self._open(end)
+            self._buffer = self._memory.buf
+            self._shards = [
+                _Shard(
+                    self._buffer[start:start + shard_size],
+                    per_shard,
+                    slot_size,
+                    table,
+                )
+                for start in range(_HEADER_SIZE, end, shard_size)
+            ]
+            if created:
+                for shard in self._shards:
+                    shard.format()
+                _HEADER.pack_into(self._buffer, 0, *shape)
+            elif _HEADER.unpack_from(self._buffer) != shape:
+                self.close()
+                raise exceptions.SieveCacheException(
+                    f"Shared memory segment '{self.name}' exists with a "
+                    f"different shape"
+                )
+
+    def _open(self, size: int):
+        kwargs = {"track": False} if sys.version_info >= (3, 13) else {}
+        try:
+            memory = shared_memory.SharedMemory(
+                self.name, create=True, size=size, **kwargs
+            )
+            created = True
+        except FileExistsError:
+            memory = shared_memory.SharedMemory(self.name, **kwargs)
+            created = False
+        if not kwargs:
+            # NOTE: Before Python 3.13 the resource tracker of every
+            # process that opens the segment unlinks it on exit.
+            resource_tracker.unregister(memory._name, "shared_memory")
+        if memory.size < size:
+            memory.close()
+            raise exceptions.SieveCacheException(
+                f"Shared memory segment '{self.name}' is too small"
+            )
+        return memory, created
+
+    def _locate(self, key: api.KeyType):
+        data = pickle.dumps(key, protocol=pickle.HIGHEST_PROTOCOL)
+        digest = _hash(data)
+        index = digest % len(self._shards)
+        return index, digest, data
+
+    def read(self, key: api.KeyType, fn: ty.Callable[[memoryview], ty.Any]):
+        """Call ``fn`` with a view of the stored bytes of ``key``.
+
+        The view points into shared memory, so nothing is copied. It is
+        only valid while ``fn`` runs, during which the shard is locked.
+
+        :return: The result of ``fn``, or
+            :data:`dogpile.backends.NO_VALUE` if ``key`` is missing.
+        """
+        index, digest, data = self._locate(key)
+        shard = self._shards[index]
+        with self._locks.hold(index):
+            slot = shard.lookup(digest, data)
+            if slot == _EMPTY:
+                return _NO_VALUE
+            shard.arena.visit(slot)
+            view = shard.arena.value(slot)
+            try:
+                return fn(view)
+            finally:
+                view.release()
+
+    def get(self, key: api.KeyType) -> api.BackendFormatted:
+        """Retrieves the value for a key and marks it visited.
+
+        :param key: dictionary key
+        :returns: value for a key or :data:`dogpile.backends.NO_VALUE`
+            for nonexistent keys.
+        """
+        return self.read(key, bytes)
+
+    def get_multi(
+        self, keys: ty.Sequence[api.KeyType]
+    ) -> ty.Sequence[api.BackendFormatted]:
+        """Retrieves the value for a list of keys."""
+        return [self.get(key) for key in keys]
+
+    def set(self, key: api.KeyType, value: api.BackendSetType) -> None:
+        """Set a value in the backends.
+
+        :param key: dictionary key
+        :param value: serialized value to be stored
+        """
+        self.set_multi({key: value})
+
+    def set_multi(
+        self, mapping: ty.Mapping[api.KeyType, api.BackendSetType]
+    ) -> None:
+        """Set multiple values in the backends.
+
+        Values that do not fit in a slot are not stored, and any previous
+        value of their key is removed. The others are stored before
+        :class:`sieve_cache.common.exceptions.CantSerializeException` is
+        raised for them.
+
+        :param mapping: dictionary with key/value pairs
+        """
+        oversized = 0
+        for key, value in mapping.items():
+            index, digest, data = self._locate(key)
+            shard = self._shards[index]
+            with self._locks.hold(index):
+                if shard.arena.fits(data, value):
+                    shard.store(digest, data, value)
+                else:
+                    oversized += 1
+                    shard.discard(digest, data)
+        if oversized:
+            raise exceptions.CantSerializeException(
+                f"{oversized} value(s) exceed the slot size of "
+                f"{self._shards[0].arena.slot_size} bytes"
+            )
+
+    def delete(self, key: api.KeyType) -> None:
+        """Delete a value from the backends.
+
+        :param key: dictionary key
+        """
+        index, digest, data = self._locate(key)
+        with self._locks.hold(index):
+            self._shards[index].discard(digest, data)
+
+    def delete_multi(self, keys: ty.Sequence[api.KeyType]) -> None:
+        """Delete multiple values from the backends.
+
+        :param keys: list of dictionary keys
+        """
+        for key in keys:
+            self.delete(key)
+
+    def close(self) -> None:
+        """Detach from the segment, leaving it for the other processes."""
+        for shard in self._shards:
+            shard.arena.buffer.release()
+            shard.buffer.release()
+        self._shards = []
+        self._buffer.release()
+        self._memory.close()
+        self._locks.close()
+
+    def unlink(self) -> None:
+        """Destroy the segment once every process has closed it."""
+        if sys.version_info < (3, 13):
+            # NOTE: SharedMemory.unlink() unregisters the segment from the
+            # resource tracker, which _open already did; register it again
+            # so the tracker does not report an unknown segment.
+            resource_tracker.register(self._memory._name, "shared_memory")
+        self._memory.unlink()
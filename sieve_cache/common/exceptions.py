@@ -10,12 +10,16 @@
 #  License for the specific language governing permissions and limitations
 #  under the License.
 
+from dogpile.cache import api
+
 
 class SieveCacheException(Exception):
     """Base class for all exceptions in this library."""
 
 
-class CantDeserializeException(SieveCacheException):
+class CantDeserializeException(
+    SieveCacheException, api.CantDeserializeException
+):
     """Exception indicating deserialization failed, and that caching
     should proceed to re-generate a value
     """
@@ -0,0 +1,76 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#  #
+#          http://www.apache.org/licenses/LICENSE-2.0
+#  #
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+import threading
+import typing as ty
+
+__all__ = ["Group"]
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: ty.Optional[BaseException] = None
+
+
+class Group:
+    """Coalesce concurrent calls that share a key.
+
+    The first caller for a key runs the function; callers arriving while
+    it is in flight wait for its result instead of running it again.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: ty.Dict[ty.Any, _Call] = {}
+
+    def do(
+        self,
+        key,
+        fn: ty.Callable[[], ty.Any],
+        timeout: ty.Optional[float] = None,
+    ):
+        """Run ``fn`` once for all concurrent callers of ``key``.
+
+        :param key: The key identifying the call.
+        :param fn: The function to run.
+        :param timeout: Maximum number of seconds a waiting caller blocks
+            on the in-flight call before running ``fn`` itself. ``None``
+            waits forever.
+        :return: The result of ``fn``. If the in-flight call raised, its
+            exception is raised in every waiting caller.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            if not call.done.wait(timeout):
+                return fn()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
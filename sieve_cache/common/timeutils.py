@@ -13,7 +13,11 @@ import calendar
 import datetime
 import time
 
-import iso8601
+# NOTE: Deadlines in the hot path use this float, monotonic clock so they
+# keep sub-second precision and do not move with wall-clock adjustments.
+# ``utcnow.override_time`` does not apply to it; it is a test hook for the
+# wall-clock helpers below only.
+monotonic = time.monotonic
 
 
 def utcnow_ts(microsecond=False):
@@ -45,6 +49,8 @@ def utcnow(with_timezone=False):
         except AttributeError:
             return utcnow.override_time
     if with_timezone:
+        import iso8601
+
         return datetime.datetime.now(tz=iso8601.iso8601.UTC)
     return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
 
@@ -16,9 +16,13 @@ import typing as ty
 from dogpile.cache import api as base
 
 
-@dataclass
+@dataclass(slots=True)
 class Node:
-    """Node class for storing data in a linked list."""
+    """Node class for storing data in a linked list.
+
+    Nodes use ``__slots__`` so they carry no per-instance ``__dict__``; use
+    :meth:`to_dict` to get a plain dictionary.
+    """
 
     value: base.ValuePayload
     key: str
@@ -41,9 +45,6 @@ class Node:
             "prev": self.prev,
         }
 
-    def __dict__(self):
-        return self.to_dict()
-
     def __getitem__(self, item):
         try:
             return getattr(self, item)
@@ -0,0 +1,332 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#  #
+#          http://www.apache.org/licenses/LICENSE-2.0
+#  #
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+"""Share a parent process's Sieve with its worker processes.
+
+:meth:`sieve_cache.sieve.Sieve.serve` starts a :class:`SieveServer` on a
+local :mod:`multiprocessing.connection` socket. Decorated functions called
+in a worker process then ask the parent for the value before computing it
+and send the result back, so each key is computed once for the whole pool
+and the entries live in the parent's partitions, under its limits.
+
+Forked workers find the server through their copy of the ``Sieve``.
+Spawned workers import a fresh one, so they must call :func:`attach`, e.g.
+as the ``initializer`` of a :class:`concurrent.futures.ProcessPoolExecutor`.
+Functions the server does not know, such as those of another ``Sieve``
+with the same namespace, keep using the worker's own cache.
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+import typing as ty
+
+from dogpile.cache import api as base
+
+if ty.TYPE_CHECKING:
+    from multiprocessing import connection
+
+__all__ = ["SieveServer", "attach"]
+
+LOG = logging.getLogger(__name__)
+
+_GET, _SET, _FAIL = "get", "set", "fail"
+
+_attached: ty.Dict[str, ty.Tuple[ty.Any, bytes]] = {}
+_clients: ty.Dict[ty.Tuple[int, ty.Any], "_Client"] = {}
+_clients_lock = threading.Lock()
+
+
+def attach(address, authkey: bytes, namespace: str) -> None:
+    """Route the decorated functions of a namespace to a server.
+
+    :param address: :attr:`SieveServer.address`.
+    :param authkey: :attr:`SieveServer.authkey`.
+    :param namespace: Namespace of the served ``Sieve``. Functions of
+        other namespaces keep using the local lists.
+    """
+    _attached[namespace] = (address, authkey)
+
+
+def remote(
+    server: ty.Optional["SieveServer"], namespace: str
+) -> ty.Optional["_Client"]:
+    """Return the client to use instead of the local lists, if any.
+
+    :param server: The server started by this ``Sieve``, if any. It is
+        only used from processes other than the one running it.
+    :param namespace: Namespace of this ``Sieve``.
+    """
+    if server is not None:
+        if server.pid == os.getpid():
+            return None
+        return _client(server.address, server.authkey)
+    attached = _attached.get(namespace)
+    if attached is not None:
+        return _client(*attached)
+    return None
+
+
+def _client(address, authkey: bytes) -> "_Client":
+    # NOTE: Keyed by pid so a process forked from a worker does not reuse
+    # the connections of its parent.
+    key = (os.getpid(), address)
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.setdefault(key, _Client(address, authkey))
+    return client
+
+
+class _Client:
+    """The worker side: one connection to the server per thread."""
+
+    def __init__(self, address, authkey: bytes):
+        self.address = address
+        self.authkey = authkey
+        self._local = threading.local()
+
+    def _connection(self) -> "connection.Connection":
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            from multiprocessing import connection
+
+            conn = self._local.conn = connection.Client(
+                self.address, authkey=self.authkey
+            )
+        return conn
+
+    def call(self, name: str, key, compute: ty.Callable[[], ty.Any]):
+        """Return the parent's value for ``key``, or compute and publish it.
+
+        When the server cannot be reached, the value is computed and
+        returned uncached. When the server does not know the function,
+        ``NO_VALUE`` is returned without computing it, so the caller can
+        use its own cache instead.
+        """
+        try:
+            conn = self._connection()
+            conn.send((_GET, name, key))
+            found, value = conn.recv()
+        except (OSError, EOFError) as e:
+            LOG.debug("Sieve server %s unavailable: %s", self.address, e)
+            self._local.conn = None
+            return compute()
+        if found is None:
+            return base.NO_VALUE
+        if found:
+            return value
+
+        try:
+            value = compute()
+        except BaseException:
+            self._send(conn, (_FAIL, name, key))
+            raise
+        try:
+            conn.send((_SET, name, key, value))
+        except (OSError, EOFError) as e:
+            LOG.debug("Sieve server %s unavailable: %s", self.address, e)
+            self._local.conn = None
+        except Exception:
+            # NOTE: Connection.send pickles before writing, so a value that
+            # cannot be pickled leaves the connection usable.
+            LOG.debug("Not caching %r: its value cannot be pickled", key)
+            self._send(conn, (_FAIL, name, key))
+        return value
+
+    def _send(self, conn: "connection.Connection", message) -> None:
+        try:
+            conn.send(message)
+        except (OSError, EOFError):
+            self._local.conn = None
+
+
+class SieveServer:
+    """Serve the decorated functions of a ``Sieve`` to worker processes.
+
+    Every connection is handled by its own thread. A ``get`` is answered
+    from the parent's partition of the function; on a miss the worker
+    computes the value and sends it back with a ``set``, which inserts it
+    like a local miss would. Workers missing a key that another worker is
+    computing wait for that result instead of computing it again.
+
+    Hits and misses are counted on the parent's function stats.
+
+    :param memo: The :class:`sieve_cache.sieve.Sieve` to serve.
+    :param address: Address to listen on. Defaults to a new socket in the
+        temporary directory.
+    :param authkey: Key workers must present. Defaults to the authkey of
+        the current process, which ``multiprocessing`` children inherit.
+    :param wait_timeout: Maximum number of seconds a worker waits for a
+        key another worker is computing before computing it itself.
+        ``None`` waits until the other worker publishes or fails.
+    """
+
+    def __init__(
+        self,
+        memo,
+        address=None,
+        authkey: ty.Optional[bytes] = None,
+        wait_timeout: ty.Optional[float] = None,
+    ):
+        from multiprocessing import connection
+
+        self.memo = memo
+        if authkey is None:
+            authkey = bytes(multiprocessing.current_process().authkey)
+        self.authkey = authkey
+        self.wait_timeout = wait_timeout
+        self.pid = os.getpid()
+        self._listener = connection.Listener(address, authkey=authkey)
+        self.address = self._listener.address
+        self._lock = threading.Lock()
+        self._pending: ty.Dict[ty.Tuple[str, ty.Any], threading.Event] = {}
+        self._connections: ty.Set["connection.Connection"] = set()
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._accept, name="sieve-server", daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def initializer(self) -> ty.Callable[..., None]:
+        """Pool initializer attaching spawned workers to this server."""
+        return attach
+
+    @property
+    def initargs(self) -> ty.Tuple[ty.Any, bytes, str]:
+        """Arguments for :attr:`initializer`."""
+        return (self.address, self.authkey, self.memo.namespace)
+
+    def __enter__(self) -> "SieveServer":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Stop serving and drop every connection.
+
+        Workers that are still running compute their values uncached.
+        """
+        from multiprocessing import connection
+
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            connections = list(self._connections)
+        # NOTE: Closing the listener does not interrupt a blocked accept();
+        # connect once so the accept thread sees the flag and exits.
+        try:
+            connection.Client(self.address, authkey=self.authkey).close()
+        except OSError:
+            pass
+        self._thread.join()
+        self._listener.close()
+        for conn in connections:
+            conn.close()
+        if self.memo._server is self:
+            self.memo._server = None
+
+    def _accept(self) -> None:
+        while True:
+            try:
+                conn = self._listener.accept()
+            except multiprocessing.AuthenticationError:
+                LOG.warning("Rejected a sieve client with a wrong authkey")
+                continue
+            except (OSError, EOFError):
+                with self._lock:
+                    if self._closed:
+                        return
+                continue
+            with self._lock:
+                if self._closed:
+                    conn.close()
+                    return
+                self._connections.add(conn)
+            threading.Thread(
+                target=self._handle, args=(conn,), daemon=True
+            ).start()
+
+    def _handle(self, conn: "connection.Connection") -> None:
+        owned: ty.Set[ty.Tuple[str, ty.Any]] = set()
+        try:
+            while True:
+                message = conn.recv()
+                if message[0] == _GET:
+                    conn.send(self._get(message[1], message[2], owned))
+                else:
+                    if message[0] == _SET:
+                        self._set(*message[1:])
+                    self._release(message[1], message[2], owned)
+        except (OSError, EOFError):
+            pass
+        finally:
+            # NOTE: A worker that died mid-computation must not leave the
+            # others waiting for it.
+            for name, key in list(owned):
+                self._release(name, key, owned)
+            with self._lock:
+                self._connections.discard(conn)
+            conn.close()
+
+    def _partition(self, name: str):
+        for partition in list(self.memo._partitions.values()):
+            if partition.name == name:
+                return partition
+        return None
+
+    def _get(
+        self, name: str, key, owned
+    ) -> ty.Tuple[ty.Optional[bool], ty.Any]:
+        partition = self._partition(name)
+        if partition is None:
+            # NOTE: Not one of the served functions; the worker caches it
+            # in its own lists.
+            return None, None
+        # NOTE: Pending computations are tracked by the key the worker
+        # sent, which is also the one it releases them with.
+        versioned = self.memo._key(key)
+        value = self.memo._lookup(partition, versioned)
+        if value is not base.NO_VALUE:
+            return True, value
+        with self._lock:
+            done = self._pending.get((name, key))
+            if done is None:
+                self._pending[(name, key)] = threading.Event()
+                owned.add((name, key))
+                return False, None
+        # NOTE: Another worker is computing the value; wait for it rather
+        # than computing it twice.
+        done.wait(self.wait_timeout)
+        value = self.memo._lookup(partition, versioned, count=False)
+        if value is not base.NO_VALUE:
+            return True, value
+        return False, None
+
+    def _set(self, name: str, key, value) -> None:
+        partition = self._partition(name)
+        if partition is not None:
+            key = self.memo._key(key)
+            index = self.memo._segment_index(key)
+            self.memo._insert(partition, index, key, value)
+
+    def _release(self, name: str, key, owned) -> None:
+        if (name, key) not in owned:
+            return
+        owned.discard((name, key))
+        with self._lock:
+            done = self._pending.pop((name, key), None)
+        if done is not None:
+            done.set()
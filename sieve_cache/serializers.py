@@ -0,0 +1,172 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#  #
+#          http://www.apache.org/licenses/LICENSE-2.0
+#  #
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+"""Value serializers for backends that store bytes.
+
+A serializer is installed on the region with
+:func:`sieve_cache.create_sieve`. Failures raise
+:class:`~sieve_cache.common.exceptions.CantSerializeException` or
+:class:`~sieve_cache.common.exceptions.CantDeserializeException`, which
+make the cache skip the write or treat the read as a miss, so the value is
+recomputed instead of the call failing.
+"""
+
+import pickle
+import struct
+import typing as ty
+import zlib
+
+from sieve_cache.common import exceptions
+
+__all__ = [
+    "Serializer",
+    "PickleSerializer",
+    "MsgpackSerializer",
+    "CompressedSerializer",
+]
+
+_COUNT = struct.Struct("<I")
+_LENGTH = struct.Struct("<Q")
+
+_RAW = b"\x00"
+_COMPRESSED = b"\x01"
+
+
+class Serializer(ty.Protocol):
+    """Turns cached values into bytes and back."""
+
+    def dumps(self, value: ty.Any) -> bytes:
+        ...
+
+    def loads(self, data: bytes) -> ty.Any:
+        ...
+
+
+class PickleSerializer:
+    """Pickle values, keeping large buffers out of the pickle stream.
+
+    With protocol 5, objects that support out-of-band buffers (such as
+    ``bytearray`` or NumPy arrays) hand their memory to the serializer
+    instead of being copied into the pickle. The buffers are appended
+    after the pickle and, on load, passed back as views of the payload
+    without another copy.
+
+    The payload is a buffer count, the length of the pickle and of each
+    buffer, the pickle, then the buffers.
+
+    :param protocol: The pickle protocol. Out-of-band buffers are only
+        used from protocol 5.
+    """
+
+    def __init__(self, protocol: int = 5):
+        self.protocol = protocol
+
+    def dumps(self, value: ty.Any) -> bytes:
+        buffers: ty.List[pickle.PickleBuffer] = []
+        callback = buffers.append if self.protocol >= 5 else None
+        try:
+            data = pickle.dumps(
+                value, protocol=self.protocol, buffer_callback=callback
+            )
+        except (pickle.PicklingError, TypeError, AttributeError) as e:
+            raise exceptions.CantSerializeException(str(e)) from e
+
+        views = [buffer.raw() for buffer in buffers]
+        header = [_COUNT.pack(len(views)), _LENGTH.pack(len(data))]
+        header.extend(_LENGTH.pack(view.nbytes) for view in views)
+        return b"".join([*header, data, *views])
+
+    def loads(self, data: bytes) -> ty.Any:
+        view = memoryview(data)
+        try:
+            (count,) = _COUNT.unpack_from(view)
+            offset = _COUNT.size
+            lengths = []
+            for _ in range(count + 1):
+                lengths.append(_LENGTH.unpack_from(view, offset)[0])
+                offset += _LENGTH.size
+            chunks = []
+            for length in lengths:
+                chunks.append(view[offset:offset + length])
+                offset += length
+            return pickle.loads(chunks[0], buffers=chunks[1:])
+        except Exception as e:
+            raise exceptions.CantDeserializeException(str(e)) from e
+
+
+class MsgpackSerializer:
+    """Serialize values with msgpack.
+
+    Only msgpack types (``None``, booleans, numbers, strings, bytes, lists
+    and dicts) are supported; anything else is not cached. Requires the
+    ``msgpack`` package.
+    """
+
+    def __init__(self):
+        import msgpack
+
+        self._msgpack = msgpack
+
+    def dumps(self, value: ty.Any) -> bytes:
+        try:
+            return self._msgpack.packb(value, use_bin_type=True)
+        except (TypeError, ValueError, OverflowError) as e:
+            raise exceptions.CantSerializeException(str(e)) from e
+
+    def loads(self, data: bytes) -> ty.Any:
+        try:
+            return self._msgpack.unpackb(data, raw=False)
+        except Exception as e:
+            raise exceptions.CantDeserializeException(str(e)) from e
+
+
+class CompressedSerializer:
+    """Compress the output of another serializer above a size threshold.
+
+    Small payloads are stored as they are, since compressing them costs
+    more CPU than it saves. A one byte prefix records which was done.
+
+    :param serializer: The serializer whose output is compressed.
+    :param threshold: Minimum payload size in bytes that is compressed.
+    :param compress: Compression function. Defaults to :func:`zlib.compress`.
+    :param decompress: The matching decompression function.
+    """
+
+    def __init__(
+        self,
+        serializer: Serializer,
+        threshold: int = 1024,
+        compress: ty.Callable[[bytes], bytes] = zlib.compress,
+        decompress: ty.Callable[[bytes], bytes] = zlib.decompress,
+    ):
+        self.serializer = serializer
+        self.threshold = threshold
+        self._compress = compress
+        self._decompress = decompress
+
+    def dumps(self, value: ty.Any) -> bytes:
+        data = self.serializer.dumps(value)
+        if len(data) < self.threshold:
+            return _RAW + data
+        return _COMPRESSED + self._compress(data)
+
+    def loads(self, data: bytes) -> ty.Any:
+        flag, payload = data[:1], data[1:]
+        if flag == _COMPRESSED:
+            try:
+                payload = self._decompress(payload)
+            except Exception as e:
+                raise exceptions.CantDeserializeException(str(e)) from e
+        elif flag != _RAW:
+            raise exceptions.CantDeserializeException(
+                f"Unknown payload flag {flag!r}"
+            )
+        return self.serializer.loads(payload)
@@ -10,128 +10,1466 @@
 #  License for the specific language governing permissions and limitations
 #  under the License.
 
+import itertools
 import logging
+import pickle
+import sys
 import threading
 import typing as ty
+from concurrent import futures
 from functools import wraps
 
 from dogpile.cache import api as base
 from dogpile.cache import region
 
+from sieve_cache import admission as _admission
+from sieve_cache import aio
+from sieve_cache.common import exceptions
+from sieve_cache.common import singleflight
 from sieve_cache import node as _n
+from sieve_cache import pool
+from sieve_cache import stats as _stats
+from sieve_cache import store as _s
 
-__all__ = ["Sieve"]
+if ty.TYPE_CHECKING:
+    import asyncio
 
-_lock = threading.Lock()
+__all__ = ["Sieve"]
 
 LEN_KEY = "sieve_len"
+GENERATION_KEY = "sieve_generation"
 DEFAULT_CACHE_SIZE = 128
 DEFAULT_NAMESPACE = "sieve"
+DEFAULT_SEGMENTS = 1
+DEFAULT_REFRESH_WORKERS = 4
 
 LOG = logging.getLogger(__name__)
 
+_SNAPSHOT_HEADER = {"format": "sieve_cache.snapshot", "version": 1}
+_PICKLE_ERRORS = (pickle.PicklingError, TypeError, AttributeError)
+# NOTE: Pickling backends such as dogpile.cache.memory_pickle raise the
+# pickle errors themselves instead of CantSerializeException.
+_SERIALIZE_ERRORS = (exceptions.CantSerializeException,) + _PICKLE_ERRORS
+
+
+def _function_name(func) -> str:
+    return f"{func.__module__}.{func.__qualname__}"
+
+
+def _is_full(
+    segment: "_Segment", capacity: int, room: ty.Optional[float]
+) -> bool:
+    """Return whether ``segment`` must evict before linking an entry."""
+    return bool(segment.size) and (
+        segment.size >= capacity
+        or (room is not None and segment.weight > room)
+    )
+
+
+def _picklable(obj) -> bool:
+    try:
+        pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+    except _PICKLE_ERRORS:
+        return False
+    return True
+
+
+class _Segment:
+    """An independently locked SIEVE list covering a slice of the keyspace.
+
+    Every segment owns its own ``head``/``tail``/``hand`` slot pointers,
+    node store and lock, so inserts into one segment never wait on another.
+    """
+
+    def __init__(self):
+        self.head = _s.NIL
+        self.tail = _s.NIL
+        self.hand = _s.NIL
+        self.size = 0
+        self.weight = 0.0
+        self.store = _s.NodeStore()
+        self.index: ty.Dict[ty.Any, int] = {}
+        self.lock = threading.Lock()
+        self.flights = singleflight.Group()
+        self.pending: ty.Dict[ty.Any, asyncio.Future] = {}
+        self.refreshing: ty.Set[ty.Any] = set()
+
+
+class _Partition:
+    """The SIEVE segments and limits of one decorated function.
+
+    ``capacities`` and ``weights`` hold each segment's share of the entry
+    and weight budgets. ``name`` identifies the function in snapshots,
+    and ``admission`` is its optional admission policy.
+    """
+
+    __slots__ = (
+        "segments",
+        "capacities",
+        "weights",
+        "weigher",
+        "stats",
+        "name",
+        "admission",
+    )
+
+    def __init__(
+        self,
+        segments: ty.List[_Segment],
+        capacities: ty.List[int],
+        weights: ty.List[ty.Optional[float]],
+        weigher: ty.Optional[ty.Callable[[ty.Any], float]],
+        stats: ty.Optional[_stats.Stats] = None,
+        name: ty.Optional[str] = None,
+        admission: ty.Optional[_admission.AdmissionPolicy] = None,
+    ):
+        self.segments = segments
+        self.capacities = capacities
+        self.weights = weights
+        self.weigher = weigher
+        self.stats = stats
+        self.name = name
+        self.admission = admission
+
+    @property
+    def length(self) -> int:
+        return sum(segment.size for segment in self.segments)
+
+    def weigh(self, value) -> float:
+        return self.weigher(value) if self.weigher is not None else 0
+
 
 class Sieve:
     """Caching is a method of storing temporary data for quick access to keep
     the online world running smoothly. But with limited space comes a critical
     decision: what to keep and discard. This is where eviction algorithms come
     into play.
+
+    :param backend: The dogpile region used to store cached values.
+    :param namespace: The namespace to use for the cache.
+    :param segments: Number of independently locked SIEVE segments the
+        keyspace is sharded into. Each segment gets its own hand, list and
+        an equal share of the ``max_size`` budget.
+    :param sync_metadata: When ``True``, the SIEVE metadata of an entry
+        (visited bit and neighbour keys) is written to the backend next to
+        its value on insert and whenever a hit sets the visited bit. By
+        default only the value is stored and the metadata stays in the
+        local index, so a hit costs a single backend read.
+    :param length_sync_interval: When set, the local entry count is
+        published to the backend every ``length_sync_interval`` inserts or
+        evictions. The local count is always authoritative for the process;
+        by default it is never written to the backend.
+    :param async_backend: The backend used by :meth:`acache`. Defaults to
+        calling ``backend`` inline on the event loop; pass an
+        :class:`sieve_cache.aio.ThreadedBackend` to keep network I/O off
+        the loop thread.
+    :param stats_hook: Optional :class:`sieve_cache.stats.StatsHook`
+        notified of every counter update of this cache and of its
+        decorated functions.
+    :param time_backend: Record the number and latency of backend calls
+        in :attr:`stats`. This costs two clock reads per backend call.
+    :param max_scan: Maximum number of visited bits the hand clears per
+        eviction. When the budget runs out, the node the scan started from
+        is evicted and the hand is left right behind it, so the nodes that
+        were just cleared are the next candidates. The remaining scan work
+        is spread over the following inserts, and an all-hot cache evicts
+        in the same order as an unbounded scan. ``None`` scans until an
+        unvisited node is found.
+    :param adopt: Link an entry that is found in the backend but was not
+        inserted by this process, such as one a persistent backend kept
+        across a restart, into the function's list on its first hit, so
+        it counts towards ``max_size`` and is evicted like the others.
+    :param backend_evicts: The backend bounds its entries and evicts by
+        itself, like ``sieve_cache.shared_memory``. Entries evicted from a
+        function's list are then only unlinked and stay in the backend,
+        where other processes may still hit them, so ``max_size`` only
+        bounds the list of this process.
+    :param local_backend: The backend keeps its entries in this process,
+        so :meth:`clear` deletes the entries it unlinks rather than
+        leaving them to expire.
+    :param refresh_executor: The executor running the background
+        refreshes of :meth:`cache` functions with ``stale_after``. Defaults
+        to a pool of ``DEFAULT_REFRESH_WORKERS`` threads created on first
+        use.
+    :param max_size: Optional ceiling on the total number of entries of
+        this cache. Every decorated function gets its own SIEVE partition
+        bounded by its own ``max_size``, so one function never evicts the
+        entries of another; once the ceiling is reached, an insert evicts
+        from the largest segment of any function instead.
     """
 
     def __init__(
-        self, backend: region.CacheRegion, namespace: str = DEFAULT_NAMESPACE
+        self,
+        backend: region.CacheRegion,
+        namespace: str = DEFAULT_NAMESPACE,
+        segments: int = DEFAULT_SEGMENTS,
+        sync_metadata: bool = False,
+        length_sync_interval: ty.Optional[int] = None,
+        async_backend: ty.Optional[aio.AsyncBackend] = None,
+        stats_hook: ty.Optional[_stats.StatsHook] = None,
+        time_backend: bool = False,
+        max_scan: ty.Optional[int] = None,
+        max_size: ty.Optional[int] = None,
+        adopt: bool = False,
+        backend_evicts: bool = False,
+        local_backend: bool = False,
+        refresh_executor: ty.Optional[futures.Executor] = None,
     ):
-        self.head: ty.Optional[_n.Node] = None
-        self.tail: ty.Optional[_n.Node] = None
-        self.hand: ty.Optional[_n.Node] = None
+        if segments < 1:
+            raise ValueError("segments must be greater than 0")
+        if max_size is not None and max_size < 1:
+            raise ValueError("max_size must be greater than 0")
+        if max_scan is not None and max_scan < 0:
+            raise ValueError("max_scan must not be negative")
+        if length_sync_interval is not None and length_sync_interval < 1:
+            raise ValueError("length_sync_interval must be greater than 0")
+
+        self._segments = [_Segment() for _ in range(segments)]
+        self._partitions: ty.Dict[ty.Callable, _Partition] = {}
+        # NOTE: Number of entries over every list, kept up to date by
+        # _add and _remove so the max_size ceiling is checked without
+        # walking each segment of each function. Without a ceiling it is
+        # not maintained, sparing every insert and removal the lock.
+        self._size = 0
+        self._size_lock = threading.Lock()
+        self.max_size = max_size
+        self.adopt = adopt
+        self.backend_evicts = backend_evicts
+        self.local_backend = local_backend
+        self._server: ty.Optional[pool.SieveServer] = None
+        self._refresh_executor = refresh_executor
+        self._executor_lock = threading.Lock()
+        self._generation_lock = threading.Lock()
+        self._changes = itertools.count(1)
+        self.length_sync_interval = length_sync_interval
+        self.max_scan = max_scan
 
-        self._backend = backend
         self.namespace = namespace
+        # NOTE: Start in the generation of the last clear() of any process,
+        # so the entries it dropped are not read again.
+        try:
+            self._generation = self._stored_generation(backend)
+        except Exception:
+            LOG.warning(
+                "Could not read the cache generation; call "
+                "sync_generation() once the backend is reachable",
+                exc_info=True,
+            )
+            self._generation = 0
+        self.stats_hook = stats_hook
+        self.stats = _stats.Stats(hook=stats_hook, tags=self._tags())
+        if time_backend:
+            backend = _stats.TimedBackend(backend, self.stats)
+        self._backend = backend
+        self._async_backend = async_backend or aio.InlineBackend(backend)
+        self.sync_metadata = sync_metadata
 
     @property
     def _length_key(self) -> str:
         namespace = self.namespace if self.namespace else DEFAULT_NAMESPACE
         return f"{namespace}:{LEN_KEY}"
 
+    @property
+    def _generation_key(self) -> str:
+        namespace = self.namespace if self.namespace else DEFAULT_NAMESPACE
+        return f"{namespace}:{GENERATION_KEY}"
+
     @property
     def length(self) -> int:
         """Return the length of the cache."""
-        key = self._length_key
-        value = self._backend.get(key)
-        if value == base.NO_VALUE or not isinstance(value, int):
-            return 0
-        return int(value)
-
-    @length.setter
-    def length(self, value: int) -> None:
-        key = self._length_key
-        self._backend.set(key, value)
+        if self.max_size is None:
+            return sum(segment.size for segment, _stats in self._lists())
+        return self._size
 
     def __len__(self):
         return self.length
 
-    def _add(self, node: _n.Node) -> None:
-        node.next = self.head
-        node.prev = None
-        if self.head:
-            self.head.prev = node
-        self.head = node
-        if not self.tail:
-            self.tail = node
-
-    def _remove(self, node: _n.Node) -> None:
-        if node.prev:
-            node.prev.next = node.next
-        else:
-            self.head = node.next
-        if node.next:
-            node.next.prev = node.prev
-        else:
-            self.tail = node.prev
-
-    def _evict(self) -> None:
-        """Evict a node from the backends."""
-        obj = self.hand if self.hand else self.tail
-        while obj and obj.visited:
-            obj.visited = False
-            obj = obj.prev if obj.prev else self.tail
-        self.hand = obj.prev if obj.prev else None
-        self._backend.delete(obj.key)
-
-        self._remove(obj)
-        self.length -= 1
-
-    def cache(self, max_size: int = DEFAULT_CACHE_SIZE) -> ty.Callable:
-        """Decorator to backends the result of a function call."""
+    def _tags(self, func=None) -> ty.Dict[str, str]:
+        tags = {"namespace": str(self.namespace)}
+        if func is not None:
+            tags["function"] = _function_name(func)
+        return tags
+
+    def _function_stats(self, func) -> _stats.Stats:
+        return _stats.Stats(
+            hook=self.stats_hook, tags=self._tags(func), parent=self.stats
+        )
+
+    def _count(
+        self,
+        name: str,
+        value: int = 1,
+        stats: ty.Optional[_stats.Stats] = None,
+    ) -> None:
+        """Add ``value`` to the counter of ``stats``.
+
+        Function counters roll up into :attr:`stats`, so events of a
+        decorated function are only recorded on its own counters.
+        """
+        (stats or self.stats).incr(name, value)
+
+    def sync_length(self) -> int:
+        """Publish the local length to the backend and return it."""
+        length = self.length
+        self._backend.set(self._length_key, length)
+        return length
+
+    def _key(self, key):
+        """Return the backend key of ``key`` in the current generation.
+
+        Generation 0 leaves keys unchanged.
+        """
+        generation = self._generation
+        if not generation:
+            return key
+        if isinstance(key, str):
+            return f"{generation}~{key}"
+        return (generation, key)
+
+    def _unkey(self, key):
+        """Return the key :meth:`_key` made ``key`` from.
+
+        :return: The key, or ``None`` if ``key`` is not of the current
+            generation.
+        """
+        generation = self._generation
+        if not generation:
+            return key
+        if isinstance(key, str):
+            prefix = f"{generation}~"
+            return key[len(prefix):] if key.startswith(prefix) else None
+        if isinstance(key, tuple) and len(key) == 2 and key[0] == generation:
+            return key[1]
+        return None
+
+    def clear(self) -> None:
+        """Drop every entry of the namespace.
+
+        The generation number stored in the backend is bumped and prefixed
+        to every key from now on, so entries written before, by any
+        process, are never read again and are left to expire. This costs
+        one backend read and one write whatever the number of entries.
+        The entries this process tracks are unlinked; with a
+        ``local_backend`` they are also deleted with a single
+        ``delete_multi`` so their memory is freed.
+
+        Other processes switch to the new generation when they call
+        :meth:`sync_generation`.
+        """
+        with self._generation_lock:
+            stored = self._stored_generation(self._backend)
+            self._generation = max(self._generation, stored) + 1
+            self._backend.set(self._generation_key, self._generation)
+        self._drop_all()
+
+    def _stored_generation(self, backend: region.CacheRegion) -> int:
+        stored = backend.get(self._generation_key)
+        return 0 if stored is base.NO_VALUE else stored
+
+    def sync_generation(self) -> int:
+        """Switch to the generation of the last :meth:`clear` of any process.
+
+        A new ``Sieve`` starts in the stored generation; call this
+        periodically, or when notified of a clear, in processes sharing a
+        remote backend.
+
+        :return: The current generation.
+        """
+        with self._generation_lock:
+            stored = self._stored_generation(self._backend)
+            if stored <= self._generation:
+                return self._generation
+            self._generation = stored
+        self._drop_all()
+        return stored
+
+    def _drop_all(self) -> None:
+        """Unlink every entry, deleting them from a local backend."""
+        keys = []
+        for segment, _counters in self._lists():
+            with segment.lock:
+                keys.extend(segment.index)
+                # NOTE: Release the slots rather than replacing the store:
+                # lock-free readers may still hold a slot number.
+                for slot in segment.index.values():
+                    segment.store.release(slot)
+                segment.index.clear()
+                segment.head = segment.tail = segment.hand = _s.NIL
+                self._resize(-segment.size)
+                segment.size = 0
+                segment.weight = 0.0
+        # NOTE: Old generation keys are never read again; a remote backend
+        # expires them, which spares every process a mass delete.
+        if self.local_backend:
+            self._delete(keys)
+        if self.length_sync_interval:
+            self.sync_length()
+
+    def delete(self, key) -> bool:
+        """Delete ``key`` from the backend and unlink it.
+
+        :param key: A cache key, as produced by the key generator.
+        :return: ``True`` if ``key`` was linked in this process.
+        """
+        key = self._key(key)
+        linked = self._forget(key)
+        # NOTE: Delete it even if it was not linked here; another process
+        # may have inserted it.
+        self._backend.delete(key)
+        return linked
+
+    def delete_many(self, keys: ty.Iterable[ty.Any]) -> int:
+        """Delete several keys with a single ``delete_multi``.
+
+        :param keys: Cache keys, as produced by the key generator.
+        :return: The number of keys that were linked in this process.
+        """
+        keys = [self._key(key) for key in dict.fromkeys(keys)]
+        linked = sum(self._forget(key) for key in keys)
+        self._delete(keys)
+        return linked
+
+    def _changed(self) -> None:
+        interval = self.length_sync_interval
+        if interval and next(self._changes) % interval == 0:
+            self.sync_length()
+
+    def _segment_index(self, key) -> int:
+        return hash(key) % len(self._segments)
+
+    def _unlink(self, segment: _Segment, key) -> None:
+        """Unlink ``key`` after its value could not be written.
+
+        The caller must hold ``segment.lock``.
+        """
+        slot = segment.index.get(key)
+        if slot is not None:
+            self._remove(segment, slot)
+            self._changed()
+
+    def _segment_lists(self) -> ty.Iterator[ty.List[_Segment]]:
+        """Yield the segments of :meth:`set_many`, then of each function."""
+        yield self._segments
+        for partition in list(self._partitions.values()):
+            yield partition.segments
+
+    def _lists(
+        self,
+    ) -> ty.Iterator[ty.Tuple[_Segment, ty.Optional[_stats.Stats]]]:
+        """Yield every segment of this cache with the stats it counts to."""
+        for segment in self._segments:
+            yield segment, None
+        for partition in list(self._partitions.values()):
+            for segment in partition.segments:
+                yield segment, partition.stats
+
+    def _check_limits(
+        self,
+        max_size: int,
+        max_weight: ty.Optional[float] = None,
+        weigher: ty.Optional[ty.Callable[[ty.Any], float]] = None,
+    ) -> ty.Optional[ty.Callable[[ty.Any], float]]:
+        """Validate the limits of a partition and return its weigher."""
         if max_size < 1:
             raise ValueError("max_size must be greater than 0")
+        if max_size < len(self._segments):
+            raise ValueError("max_size must not be less than segments")
+        if max_weight is not None and max_weight <= 0:
+            raise ValueError("max_weight must be greater than 0")
+        if weigher is not None and max_weight is None:
+            raise ValueError("weigher requires max_weight")
+        if max_weight is not None and weigher is None:
+            return sys.getsizeof
+        return weigher
+
+    def _partition(
+        self,
+        max_size: int,
+        max_weight: ty.Optional[float] = None,
+        weigher: ty.Optional[ty.Callable[[ty.Any], float]] = None,
+        segments: ty.Optional[ty.List[_Segment]] = None,
+        stats: ty.Optional[_stats.Stats] = None,
+        name: ty.Optional[str] = None,
+        admission: ty.Optional[_admission.AdmissionPolicy] = None,
+    ) -> _Partition:
+        """Split the limits across ``segments``, or new segments."""
+        count = len(self._segments)
+        if segments is None:
+            segments = [_Segment() for _ in range(count)]
+        share, extra = divmod(max_size, count)
+        capacities = [share + (1 if i < extra else 0) for i in range(count)]
+        weight = max_weight / count if max_weight is not None else None
+        return _Partition(
+            segments,
+            capacities,
+            [weight] * count,
+            weigher,
+            stats,
+            name,
+            admission,
+        )
+
+    def _record(self, segment: _Segment, slot: int, value) -> _n.Node:
+        """Build the backend record for a slot when syncing metadata.
+
+        Neighbours are referenced by key so that serializing one entry
+        never drags the rest of the list along with it.
+        """
+        store = segment.store
+        next_slot, prev_slot = store.next[slot], store.prev[slot]
+        return _n.Node(
+            value=value,
+            key=store.keys[slot],
+            visited=bool(store.visited[slot]),
+            next=store.keys[next_slot] if next_slot != _s.NIL else None,
+            prev=store.keys[prev_slot] if prev_slot != _s.NIL else None,
+        )
+
+    def _payload(self, segment: _Segment, slot: int, value):
+        """Return what is written to the backend for ``value``."""
+        if self.sync_metadata:
+            return self._record(segment, slot, value)
+        return value
+
+    def _unwrap(self, value):
+        if self.sync_metadata and isinstance(value, _n.Node):
+            return value.value
+        return value
+
+    def _visit(
+        self, segments: ty.List[_Segment], key
+    ) -> ty.Optional[ty.Tuple[_Segment, int]]:
+        """Set the visited bit of ``key`` in ``segments``.
+
+        :return: The segment and slot of ``key`` if the bit was flipped,
+            otherwise ``None``.
+        """
+        segment = segments[self._segment_index(key)]
+        slot = segment.index.get(key)
+        # NOTE: This runs without the segment lock. If the slot is recycled
+        # concurrently, the worst case is a spurious second chance for the
+        # entry that now owns it.
+        if slot is None or segment.store.visited[slot]:
+            return None
+        segment.store.visited[slot] = 1
+        return segment, slot
+
+    def _visit_any(self, key) -> ty.Optional[ty.Tuple[_Segment, int]]:
+        """Set the visited bit of ``key`` in whichever list holds it."""
+        index = self._segment_index(key)
+        for segments in self._segment_lists():
+            if key in segments[index].index:
+                return self._visit(segments, key)
+        return None
+
+    def _load(self, segments: ty.List[_Segment], key):
+        """Read a value from the backend and mark its local slot visited."""
+        value = self._backend.get(key)
+        if value is base.NO_VALUE:
+            return value
+        value = self._unwrap(value)
+        flipped = self._visit(segments, key)
+        if flipped and self.sync_metadata:
+            self._backend.set(key, self._record(*flipped, value))
+        return value
+
+    def _load_stale(
+        self, segments: ty.List[_Segment], key, stale_after: float
+    ) -> ty.Tuple[ty.Any, bool]:
+        """Like :meth:`_load`, also telling whether the value is stale.
+
+        :return: The value and whether it is older than ``stale_after``
+            seconds.
+        """
+        cached = self._backend.get_value_metadata(key)
+        if cached is None:
+            return base.NO_VALUE, False
+        value = self._unwrap(cached.payload)
+        flipped = self._visit(segments, key)
+        if flipped and self.sync_metadata:
+            self._backend.set(key, self._record(*flipped, value))
+        return value, cached.age > stale_after
+
+    def _executor(self) -> futures.Executor:
+        if self._refresh_executor is None:
+            with self._executor_lock:
+                if self._refresh_executor is None:
+                    self._refresh_executor = futures.ThreadPoolExecutor(
+                        DEFAULT_REFRESH_WORKERS,
+                        thread_name_prefix="sieve-refresh",
+                    )
+        return self._refresh_executor
+
+    def _refresh(
+        self, partition: _Partition, key, compute: ty.Callable[[], ty.Any]
+    ) -> None:
+        """Recompute ``key`` in the background unless it already is.
+
+        The refresh joins the segment's flight group, so callers that miss
+        the key meanwhile wait for it instead of computing it again. When
+        it fails, the stale value is kept until the backend expires it.
+        """
+        index = self._segment_index(key)
+        segment = partition.segments[index]
+        with segment.lock:
+            if key in segment.refreshing:
+                return
+            segment.refreshing.add(key)
+
+        def create():
+            value = compute()
+            self._insert(partition, index, key, value)
+            return value
+
+        def refresh():
+            try:
+                segment.flights.do(key, create)
+            except Exception:
+                LOG.warning("Refreshing %r failed", key, exc_info=True)
+            finally:
+                with segment.lock:
+                    segment.refreshing.discard(key)
+
+        try:
+            self._executor().submit(refresh)
+        except RuntimeError:
+            # NOTE: The executor was shut down; serve the stale value.
+            with segment.lock:
+                segment.refreshing.discard(key)
+            return
+        self._count("refreshes", 1, partition.stats)
+
+    def _lookup(self, partition: _Partition, key, count: bool = True):
+        """Read ``key`` for a decorated function like a call would."""
+        if count and partition.admission is not None:
+            partition.admission.record(key)
+        value = self._load(partition.segments, key)
+        if value is base.NO_VALUE:
+            if count:
+                partition.stats.incr("misses")
+            return value
+        if count:
+            partition.stats.incr("hits")
+        if self.adopt:
+            self._delete(self._adopt(partition, key, value))
+        return value
+
+    async def _aload(self, segments: ty.List[_Segment], key):
+        """Async version of :meth:`_load`."""
+        value = await self._async_backend.get(key)
+        if value is base.NO_VALUE:
+            return value
+        value = self._unwrap(value)
+        flipped = self._visit(segments, key)
+        if flipped and self.sync_metadata:
+            await self._async_backend.set(key, self._record(*flipped, value))
+        return value
+
+    def _add(self, segment: _Segment, key, weight: float = 0) -> int:
+        store = segment.store
+        slot = store.allocate(key)
+        store.weights[slot] = weight
+        segment.weight += weight
+        store.next[slot] = segment.head
+        if segment.head != _s.NIL:
+            store.prev[segment.head] = slot
+        segment.head = slot
+        if segment.tail == _s.NIL:
+            segment.tail = slot
+        segment.index[key] = slot
+        segment.size += 1
+        self._resize(1)
+        return slot
+
+    def _remove(self, segment: _Segment, slot: int) -> None:
+        store = segment.store
+        next_slot, prev_slot = store.next[slot], store.prev[slot]
+        if prev_slot != _s.NIL:
+            store.next[prev_slot] = next_slot
+        else:
+            segment.head = next_slot
+        if next_slot != _s.NIL:
+            store.prev[next_slot] = prev_slot
+        else:
+            segment.tail = prev_slot
+        if segment.hand == slot:
+            segment.hand = prev_slot
+        del segment.index[store.keys[slot]]
+        segment.weight -= store.weights[slot]
+        store.release(slot)
+        segment.size -= 1
+        self._resize(-1)
+
+    def _resize(self, delta: int) -> None:
+        """Adjust the entry count checked against ``max_size``."""
+        if self.max_size is not None:
+            with self._size_lock:
+                self._size += delta
+
+    def _choose(
+        self, segment: _Segment, stats: ty.Optional[_stats.Stats] = None
+    ) -> int:
+        """Move the hand to the next victim and return its slot.
+
+        The victim stays linked, so the next call chooses it again unless
+        it is visited in between.
+        """
+        store = segment.store
+        visited, prev = store.visited, store.prev
+        budget = self.max_scan
+        start = obj = segment.hand if segment.hand != _s.NIL else segment.tail
+        scanned = 1
+        while visited[obj]:
+            if budget is not None and scanned > budget:
+                obj = start
+                self._count("forced_evictions", 1, stats)
+                break
+            visited[obj] = 0
+            obj = prev[obj] if prev[obj] != _s.NIL else segment.tail
+            scanned += 1
+        segment.hand = obj
+        self._count("hand_scans", scanned, stats)
+        return obj
+
+    def _evict(
+        self, segment: _Segment, stats: ty.Optional[_stats.Stats] = None
+    ):
+        """Unlink the node chosen by the hand and return its key."""
+        slot = self._choose(segment, stats)
+        key = segment.store.keys[slot]
+        # NOTE: The hand points at the victim, so removing it moves the
+        # hand to the victim's predecessor.
+        self._remove(segment, slot)
+        self._changed()
+        self._count("evictions", 1, stats)
+        return key
+
+    def _link(
+        self, partition: _Partition, index: int, key, weight: float = 0
+    ):
+        """Link ``key`` into its segment, evicting until it fits.
+
+        The caller must hold the segment's lock.
+
+        :return: The slot of ``key``, or ``None`` when its weight exceeds
+            the segment's whole weight budget or the partition's admission
+            policy rejected it and it was not linked, and the list of
+            evicted keys the caller deletes from the backend.
+        """
+        segment, stats = partition.segments[index], partition.stats
+        capacity = partition.capacities[index]
+        max_weight = partition.weights[index]
+        evicted = []
+        slot = segment.index.get(key)
+        if slot is not None:
+            if segment.store.weights[slot] == weight:
+                return slot, evicted
+            # NOTE: Relink an entry whose weight changed so the totals and
+            # the eviction below account for the new weight.
+            self._remove(segment, slot)
+            self._changed()
+        if max_weight is not None and weight > max_weight:
+            if slot is not None:
+                evicted.append(key)
+            self._count("oversized", 1, stats)
+            return None, evicted
+        room = max_weight - weight if max_weight is not None else None
+        admission = partition.admission
+        if (
+            admission is not None
+            and slot is None
+            and _is_full(segment, capacity, room)
+        ):
+            victim = self._choose(segment, stats)
+            if not admission.admit(key, segment.store.keys[victim]):
+                self._count("rejections", 1, stats)
+                return None, evicted
+        victims = []
+        while _is_full(segment, capacity, room):
+            victims.append(self._evict(segment, stats))
+        if self.max_size is not None:
+            victims.extend(self._reclaim(segment, stats))
+        if not self.backend_evicts:
+            evicted.extend(victims)
+        slot = self._add(segment, key, weight)
+        self._changed()
+        self._count("inserts", 1, stats)
+        return slot, evicted
+
+    def _reclaim(
+        self, segment: _Segment, stats: ty.Optional[_stats.Stats] = None
+    ) -> ty.List[ty.Any]:
+        """Evict until there is room for one more entry under the ceiling.
+
+        Entries are taken from the largest segment of the cache, so the
+        functions holding the most entries give way first. ``segment`` is
+        the locked segment being inserted into; other segments are only
+        locked if they are free, and when the largest one is busy the
+        entry is taken from ``segment`` instead. If that is empty too, the
+        ceiling is briefly exceeded rather than waiting.
+
+        :return: The evicted keys.
+        """
+        evicted = []
+        while self._size >= self.max_size:
+            victim, victim_stats = max(
+                self._lists(), key=lambda item: item[0].size
+            )
+            if victim is not segment and victim.lock.acquire(blocking=False):
+                try:
+                    if victim.size:
+                        evicted.append(self._evict(victim, victim_stats))
+                        continue
+                finally:
+                    victim.lock.release()
+            if not segment.size:
+                break
+            evicted.append(self._evict(segment, stats))
+        return evicted
+
+    def _adopt(self, partition: _Partition, key, value) -> ty.List[ty.Any]:
+        """Link ``key`` unless it already is, as if it was just inserted.
+
+        :return: The evicted keys, which the caller deletes.
+        """
+        index = self._segment_index(key)
+        segment = partition.segments[index]
+        if key in segment.index:
+            return []
+        weight = partition.weigh(value)
+        with segment.lock:
+            if key in segment.index:
+                return []
+            _slot, evicted = self._link(partition, index, key, weight)
+        return evicted
+
+    def _delete(self, keys: ty.List[ty.Any]) -> None:
+        if len(keys) == 1:
+            self._backend.delete(keys[0])
+        elif keys:
+            self._backend.delete_multi(keys)
+
+    def _forget(self, key) -> bool:
+        """Unlink ``key`` from whichever list holds it.
+
+        :return: ``True`` if ``key`` was linked in this process.
+        """
+        index = self._segment_index(key)
+        for segments in self._segment_lists():
+            segment = segments[index]
+            with segment.lock:
+                slot = segment.index.get(key)
+                if slot is None:
+                    continue
+                self._remove(segment, slot)
+                self._changed()
+            return True
+        return False
+
+    def _store_many(
+        self,
+        segments: ty.List[_Segment],
+        evicted: ty.List[ty.Any],
+        payloads: ty.Dict[ty.Any, ty.Any],
+    ) -> None:
+        """Delete ``evicted`` and write ``payloads`` in one call each."""
+        if evicted:
+            self._backend.delete_multi(evicted)
+        if not payloads:
+            return
+        try:
+            self._backend.set_multi(payloads)
+        except _SERIALIZE_ERRORS:
+            # NOTE: Retry one by one so a single value that cannot be
+            # serialized does not keep the rest of the batch uncached.
+            for key, payload in payloads.items():
+                try:
+                    self._backend.set(key, payload)
+                except _SERIALIZE_ERRORS:
+                    LOG.debug("Not caching %r: it cannot be serialized", key)
+                    self._unlink_many(segments, [key])
+                except Exception:
+                    self._unlink_many(segments, payloads)
+                    raise
+        except Exception:
+            self._unlink_many(segments, payloads)
+            raise
+
+    def _unlink_many(
+        self, segments: ty.List[_Segment], keys: ty.Iterable[ty.Any]
+    ) -> None:
+        """Unlink ``keys`` after their values could not be written."""
+        for key in keys:
+            segment = segments[self._segment_index(key)]
+            with segment.lock:
+                self._unlink(segment, key)
+
+    def _insert(self, partition: _Partition, index: int, key, value):
+        """Link ``key`` into its segment and write ``value``."""
+        weight = partition.weigh(value)
+        segment = partition.segments[index]
+        with segment.lock:
+            slot, evicted = self._link(partition, index, key, weight)
+            self._delete(evicted)
+            if slot is None:
+                return
+            try:
+                self._backend.set(key, self._payload(segment, slot, value))
+            except _SERIALIZE_ERRORS:
+                LOG.debug("Not caching %r: it cannot be serialized", key)
+                self._unlink(segment, key)
+            except Exception:
+                self._unlink(segment, key)
+                raise
+
+    async def _ainsert(
+        self, partition: _Partition, index: int, key, value
+    ) -> None:
+        """Async version of :meth:`_insert`.
+
+        Only the list update runs under the segment lock. It never awaits,
+        so the event loop is not blocked, and the backend writes are
+        awaited after the lock is released.
+        """
+        weight = partition.weigh(value)
+        segment = partition.segments[index]
+        with segment.lock:
+            slot, evicted = self._link(partition, index, key, weight)
+            if slot is not None:
+                payload = self._payload(segment, slot, value)
+        for old in evicted:
+            await self._async_backend.delete(old)
+        if slot is None:
+            return
+        try:
+            await self._async_backend.set(key, payload)
+        except _SERIALIZE_ERRORS:
+            LOG.debug("Not caching %r: it cannot be serialized", key)
+            with segment.lock:
+                self._unlink(segment, key)
+        except Exception:
+            with segment.lock:
+                self._unlink(segment, key)
+            raise
+
+    def get_many(
+        self, keys: ty.Sequence[ty.Any]
+    ) -> ty.Tuple[ty.Dict[ty.Any, ty.Any], ty.List[ty.Any]]:
+        """Look up several keys in a single backend round trip.
+
+        Hits are marked visited exactly like decorator hits, in the
+        :meth:`set_many` list or the function partition that holds them.
+
+        :param keys: The cache keys to look up.
+        :return: A dictionary of the keys that were found and a list of the
+            distinct keys that missed, in the order they were given.
+        """
+        found, missed, synced = {}, [], {}
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return found, missed
+        stored = [self._key(key) for key in keys]
+        values = self._backend.get_multi(stored)
+        for key, backend_key, value in zip(keys, stored, values):
+            if value is base.NO_VALUE:
+                missed.append(key)
+                continue
+            value = found[key] = self._unwrap(value)
+            flipped = self._visit_any(backend_key)
+            if flipped and self.sync_metadata:
+                synced[backend_key] = self._record(*flipped, value)
+        if synced:
+            self._backend.set_multi(synced)
+        self._count("hits", len(found))
+        self._count("misses", len(missed))
+        return found, missed
+
+    def set_many(
+        self,
+        mapping: ty.Mapping[ty.Any, ty.Any],
+        max_size: int = DEFAULT_CACHE_SIZE,
+        max_weight: ty.Optional[float] = None,
+        weigher: ty.Optional[ty.Callable[[ty.Any], float]] = None,
+    ) -> None:
+        """Insert several entries with one eviction pass per segment.
+
+        Evicted keys are removed with a single ``delete_multi`` and the
+        new values are written with a single ``set_multi``.
+
+        :param mapping: The keys and values to insert.
+        :param max_size: Maximum number of entries to keep.
+        :param max_weight: See :meth:`cache`.
+        :param weigher: See :meth:`cache`.
+        """
+        weigher = self._check_limits(max_size, max_weight, weigher)
+        partition = self._partition(
+            max_size, max_weight, weigher, segments=self._segments
+        )
+        if self._generation:
+            mapping = {self._key(key): value for key, value in mapping.items()}
+        batches: ty.Dict[int, ty.List[ty.Any]] = {}
+        for key in mapping:
+            batches.setdefault(self._segment_index(key), []).append(key)
+
+        evicted, payloads = [], {}
+        for index, keys in batches.items():
+            segment = self._segments[index]
+            weights = [partition.weigh(mapping[key]) for key in keys]
+            with segment.lock:
+                for key, weight in zip(keys, weights):
+                    _slot, old = self._link(partition, index, key, weight)
+                    evicted.extend(old)
+                # NOTE: A large batch can evict its own earlier keys, so
+                # only write the ones that are still linked.
+                for key in keys:
+                    slot = segment.index.get(key)
+                    if slot is not None:
+                        payloads[key] = self._payload(
+                            segment, slot, mapping[key]
+                        )
+        self._store_many(self._segments, evicted, payloads)
+
+    def get_or_create_many(
+        self,
+        keys: ty.Sequence[ty.Any],
+        creator: ty.Callable[[ty.List[ty.Any]], ty.Sequence[ty.Any]],
+        max_size: int = DEFAULT_CACHE_SIZE,
+        max_weight: ty.Optional[float] = None,
+        weigher: ty.Optional[ty.Callable[[ty.Any], float]] = None,
+    ) -> ty.List[ty.Any]:
+        """Look up several keys and compute the misses in bulk.
+
+        :param keys: The cache keys to look up.
+        :param creator: Called once with the list of missed keys; must
+            return their values in the same order.
+        :param max_size: Maximum number of entries to keep.
+        :param max_weight: See :meth:`cache`.
+        :param weigher: See :meth:`cache`.
+        :return: The values for ``keys``, in order.
+        """
+        found, missed = self.get_many(keys)
+        if missed:
+            created = dict(zip(missed, creator(missed)))
+            self.set_many(
+                created,
+                max_size=max_size,
+                max_weight=max_weight,
+                weigher=weigher,
+            )
+            found.update(created)
+        return [found[key] for key in keys]
+
+    def serve(
+        self,
+        address=None,
+        authkey: ty.Optional[bytes] = None,
+        wait_timeout: ty.Optional[float] = None,
+    ) -> pool.SieveServer:
+        """Share the functions decorated with :meth:`cache` with workers.
+
+        Until the returned server is closed, calls of these functions in
+        worker processes look the value up in this process and send the
+        values they compute back to it. See :mod:`sieve_cache.pool`.
+
+        :param address: See :class:`sieve_cache.pool.SieveServer`.
+        :param authkey: See :class:`sieve_cache.pool.SieveServer`.
+        :param wait_timeout: See :class:`sieve_cache.pool.SieveServer`.
+        :return: The running server; it is also a context manager.
+        """
+        if self._server is not None:
+            raise exceptions.SieveCacheException("Sieve is already served")
+        self._server = pool.SieveServer(self, address, authkey, wait_timeout)
+        return self._server
+
+    def dump(self, file: ty.BinaryIO, batch_size: int = 1000) -> int:
+        """Write the entries of this cache and their SIEVE state to ``file``.
+
+        Every list is written oldest entry first, with the visited bit of
+        each entry and the position of the hand, as a stream of pickled
+        batches of ``batch_size`` entries, so only one batch is held in
+        memory at a time. The values of a batch are read with a single
+        ``get_multi``; entries that are no longer in the backend and values
+        that cannot be pickled are skipped. Keys are written without the
+        generation of :meth:`clear` and loaded into the current one.
+
+        :param file: A binary file open for writing.
+        :param batch_size: Number of entries per batch.
+        :return: The number of entries written.
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be greater than 0")
+        file.write(
+            pickle.dumps(_SNAPSHOT_HEADER, protocol=pickle.HIGHEST_PROTOCOL)
+        )
+        lists = [(None, self._segments)]
+        lists.extend(
+            (partition.name, partition.segments)
+            for partition in list(self._partitions.values())
+        )
+        written = 0
+        for name, segments in lists:
+            for segment in segments:
+                with segment.lock:
+                    entries = self._entries(segment)
+                for start in range(0, len(entries), batch_size):
+                    written += self._dump_batch(
+                        file, name, entries[start:start + batch_size]
+                    )
+        return written
+
+    def _entries(
+        self, segment: _Segment
+    ) -> ty.List[ty.Tuple[ty.Any, int, bool]]:
+        """Return ``(key, visited, is_hand)`` for each entry, oldest first.
+
+        The caller must hold ``segment.lock``.
+        """
+        store = segment.store
+        entries = []
+        slot = segment.tail
+        while slot != _s.NIL:
+            entries.append(
+                (store.keys[slot], store.visited[slot], slot == segment.hand)
+            )
+            slot = store.prev[slot]
+        return entries
+
+    def _dump_batch(self, file: ty.BinaryIO, name, entries) -> int:
+        values = self._backend.get_multi([entry[0] for entry in entries])
+        # NOTE: Keys are written without their generation, which only
+        # means something to the backend they were read from.
+        records = [
+            (self._unkey(key), self._unwrap(value), visited, hand)
+            for (key, visited, hand), value in zip(entries, values)
+            if value is not base.NO_VALUE and self._unkey(key) is not None
+        ]
+        try:
+            data = pickle.dumps(
+                (name, records), protocol=pickle.HIGHEST_PROTOCOL
+            )
+        except _PICKLE_ERRORS:
+            records = [record for record in records if _picklable(record)]
+            data = pickle.dumps(
+                (name, records), protocol=pickle.HIGHEST_PROTOCOL
+            )
+        if records:
+            file.write(data)
+        return len(records)
+
+    def load(
+        self,
+        file: ty.BinaryIO,
+        max_size: int = DEFAULT_CACHE_SIZE,
+        max_weight: ty.Optional[float] = None,
+        weigher: ty.Optional[ty.Callable[[ty.Any], float]] = None,
+    ) -> int:
+        """Insert the entries of a snapshot written by :meth:`dump`.
+
+        Entries of a decorated function go to the partition of the
+        function with the same qualified name, so functions must be
+        decorated before loading; entries of functions that are not are
+        skipped. Entries inserted with :meth:`set_many` are inserted with
+        the limits given here. Each batch is linked oldest entry first,
+        restoring the visited bits and the hand, and written with a single
+        ``set_multi``. Keys are resharded, so with a different number of
+        segments the order is only kept within each segment.
+
+        Snapshots are pickles: only load files you trust.
+
+        :param file: A binary file open for reading.
+        :param max_size: See :meth:`set_many`.
+        :param max_weight: See :meth:`set_many`.
+        :param weigher: See :meth:`set_many`.
+        :return: The number of entries loaded.
+        """
+        weigher = self._check_limits(max_size, max_weight, weigher)
+        try:
+            header = pickle.load(file)
+        except (EOFError, pickle.UnpicklingError) as e:
+            raise exceptions.SieveCacheException(
+                "Not a sieve_cache snapshot"
+            ) from e
+        if header != _SNAPSHOT_HEADER:
+            raise exceptions.SieveCacheException(
+                f"Unsupported snapshot header {header!r}"
+            )
+        partitions = {
+            partition.name: partition
+            for partition in list(self._partitions.values())
+        }
+        partitions[None] = self._partition(
+            max_size, max_weight, weigher, segments=self._segments
+        )
+        loaded = 0
+        while True:
+            try:
+                name, records = pickle.load(file)
+            except EOFError:
+                break
+            partition = partitions.get(name)
+            if partition is None:
+                LOG.debug("Skipping snapshot entries of unknown %s", name)
+                continue
+            loaded += self._load_batch(partition, records)
+        return loaded
+
+    def _load_batch(self, partition: _Partition, records) -> int:
+        batches: ty.Dict[int, ty.List[ty.Any]] = {}
+        for key, value, visited, hand in records:
+            key = self._key(key)
+            batches.setdefault(self._segment_index(key), []).append(
+                (key, value, visited, hand)
+            )
+
+        evicted, payloads = [], {}
+        for index, batch in batches.items():
+            segment = partition.segments[index]
+            weights = [partition.weigh(record[1]) for record in batch]
+            with segment.lock:
+                for (key, _value, visited, hand), weight in zip(
+                    batch, weights
+                ):
+                    slot, old = self._link(partition, index, key, weight)
+                    evicted.extend(old)
+                    if slot is not None:
+                        segment.store.visited[slot] = visited
+                        if hand:
+                            segment.hand = slot
+                # NOTE: Linking can evict earlier keys of the batch, so only
+                # write the ones that are still linked.
+                for key, value, _visited, _hand in batch:
+                    slot = segment.index.get(key)
+                    if slot is not None:
+                        payloads[key] = self._payload(segment, slot, value)
+        self._store_many(partition.segments, evicted, payloads)
+        return len(payloads)
+
+    def cache(
+        self,
+        max_size: int = DEFAULT_CACHE_SIZE,
+        wait_timeout: ty.Optional[float] = None,
+        max_weight: ty.Optional[float] = None,
+        weigher: ty.Optional[ty.Callable[[ty.Any], float]] = None,
+        stale_after: ty.Optional[float] = None,
+        admission: ty.Optional[_admission.AdmissionPolicy] = None,
+    ) -> ty.Callable:
+        """Decorator to backends the result of a function call.
+
+        Concurrent misses on the same key are coalesced: one caller runs
+        the function while the others wait for its result. The decorated
+        function gets its own SIEVE partition, a ``stats`` attribute with
+        its own counters, a ``length()`` attribute returning its number
+        of entries and an ``invalidate(*args, **kwargs)`` attribute that
+        deletes the entry for those arguments.
+
+        :param max_size: Maximum number of entries of this function.
+        :param wait_timeout: Maximum number of seconds a caller waits for
+            an in-flight computation of the same key before computing the
+            value itself. ``None`` waits until the computation finishes.
+        :param max_weight: Maximum total weight of the entries to keep, on
+            top of ``max_size``. Values heavier than a segment's share of
+            it are returned but not cached.
+        :param weigher: Returns the weight of a value. Defaults to
+            :func:`sys.getsizeof` when ``max_weight`` is given.
+        :param stale_after: Soft TTL in seconds. A value older than this is
+            still returned at once, and a single background refresh on the
+            ``refresh_executor`` recomputes it. The region's
+            ``expiration_time`` stays the hard TTL, past which callers
+            recompute synchronously, so it should be longer.
+        :param admission: Optional admission policy, such as
+            :class:`sieve_cache.admission.TinyLFU`, consulted before a new
+            entry evicts one, so that one-off keys of a scan do not push
+            out the hot set. Rejected values are returned uncached.
+        """
+        weigher = self._check_limits(max_size, max_weight, weigher)
+        if stale_after is not None and stale_after < 0:
+            raise ValueError("stale_after must not be negative")
 
         def decorator(func) -> ty.Callable:
             key_generator = self._backend.function_key_generator(
                 self.namespace, func
             )
+            stats = self._function_stats(func)
+            partition = self._partition(
+                max_size,
+                max_weight,
+                weigher,
+                stats=stats,
+                name=_function_name(func),
+                admission=admission,
+            )
+            segments = partition.segments
 
             @wraps(func)
             def wrapper(*args, **kwargs):
                 key = key_generator(*args, **kwargs)
-                node = self._backend.get(key)
-                if node:
-                    node.visited = True
-                    self._backend.set(key, node)
-                    return node.value
-
-                result = func(*args, **kwargs)
-                with _lock:
-                    if self._backend.get(key):
+                remote = pool.remote(self._server, self.namespace)
+                if remote is not None:
+                    value = remote.call(
+                        partition.name, key, lambda: func(*args, **kwargs)
+                    )
+                    if value is not base.NO_VALUE:
+                        return value
+                if self._generation:
+                    key = self._key(key)
+                if admission is not None:
+                    admission.record(key)
+                if stale_after is None:
+                    value = self._load(segments, key)
+                else:
+                    value, stale = self._load_stale(segments, key, stale_after)
+                    if stale:
+                        stats.incr("stale_hits")
+                        self._refresh(
+                            partition, key, lambda: func(*args, **kwargs)
+                        )
+                if value is not base.NO_VALUE:
+                    stats.incr("hits")
+                    if self.adopt:
+                        self._delete(self._adopt(partition, key, value))
+                    return value
+                stats.incr("misses")
+
+                index = self._segment_index(key)
+                segment = segments[index]
+
+                def create():
+                    # NOTE: A flight for this key may have finished between
+                    # our miss and joining the group; reuse its value.
+                    if key in segment.index:
+                        value = self._load(segments, key)
+                        if value is not base.NO_VALUE:
+                            return value
+                    result = func(*args, **kwargs)
+                    self._insert(partition, index, key, result)
+                    return result
+
+                return segment.flights.do(key, create, wait_timeout)
+
+            def invalidate(*args, **kwargs) -> bool:
+                return self.delete(key_generator(*args, **kwargs))
+
+            wrapper.stats = stats
+            wrapper.length = lambda: partition.length
+            wrapper.invalidate = invalidate
+            self._partitions[wrapper] = partition
+            return wrapper
+
+        return decorator
+
+    def acache(
+        self,
+        max_size: int = DEFAULT_CACHE_SIZE,
+        wait_timeout: ty.Optional[float] = None,
+        max_weight: ty.Optional[float] = None,
+        weigher: ty.Optional[ty.Callable[[ty.Any], float]] = None,
+        admission: ty.Optional[_admission.AdmissionPolicy] = None,
+    ) -> ty.Callable:
+        """Decorator to backends the result of a coroutine function.
+
+        The wrapped coroutine is awaited and its result is cached.
+        Concurrent awaits of a missing key on the same event loop share a
+        single in-flight computation. The decorated function gets its own
+        partition and ``stats``, ``length`` and ``invalidate`` attributes
+        like :meth:`cache`; ``invalidate`` is synchronous.
+
+        :param max_size: Maximum number of entries of this function.
+        :param wait_timeout: Maximum number of seconds a caller waits for
+            an in-flight computation of the same key before computing the
+            value itself. ``None`` waits until the computation finishes.
+        :param max_weight: Maximum total weight of the entries to keep, on
+            top of ``max_size``. Values heavier than a segment's share of
+            it are returned but not cached.
+        :param weigher: Returns the weight of a value. Defaults to
+            :func:`sys.getsizeof` when ``max_weight`` is given.
+        :param admission: See :meth:`cache`.
+        """
+        import asyncio
+
+        weigher = self._check_limits(max_size, max_weight, weigher)
+
+        def decorator(func) -> ty.Callable:
+            if not asyncio.iscoroutinefunction(func):
+                raise TypeError("acache can only decorate coroutine functions")
+            key_generator = self._backend.function_key_generator(
+                self.namespace, func
+            )
+            stats = self._function_stats(func)
+            partition = self._partition(
+                max_size,
+                max_weight,
+                weigher,
+                stats=stats,
+                name=_function_name(func),
+                admission=admission,
+            )
+            segments = partition.segments
+
+            async def create(index, key, args, kwargs):
+                result = await func(*args, **kwargs)
+                await self._ainsert(partition, index, key, result)
+                return result
+
+            @wraps(func)
+            async def wrapper(*args, **kwargs):
+                key = key_generator(*args, **kwargs)
+                if self._generation:
+                    key = self._key(key)
+                if admission is not None:
+                    admission.record(key)
+                value = await self._aload(segments, key)
+                if value is not base.NO_VALUE:
+                    stats.incr("hits")
+                    if self.adopt:
+                        for old in self._adopt(partition, key, value):
+                            await self._async_backend.delete(old)
+                    return value
+                stats.incr("misses")
+
+                index = self._segment_index(key)
+                pending = segments[index].pending
+                loop = asyncio.get_running_loop()
+                future = pending.get(key)
+                if future is not None and future.get_loop() is loop:
+                    try:
+                        return await asyncio.wait_for(
+                            asyncio.shield(future), wait_timeout
+                        )
+                    except asyncio.TimeoutError:
                         pass
-                    elif len(self) >= max_size:
-                        self._evict()
-                    node = _n.Node(key=key, value=result, visited=False)
-                    self._add(node)
-                    self.length += 1
-                    self._backend.set(key, node)
+                    except asyncio.CancelledError:
+                        # NOTE: Only recompute when the in-flight caller was
+                        # cancelled, not when this caller was.
+                        if not future.cancelled():
+                            raise
+                    return await create(index, key, args, kwargs)
+
+                future = pending[key] = loop.create_future()
+                try:
+                    result = await create(index, key, args, kwargs)
+                except asyncio.CancelledError:
+                    future.cancel()
+                    raise
+                except BaseException as e:
+                    future.set_exception(e)
+                    # NOTE: Mark the exception as retrieved so asyncio does
+                    # not log it when nobody else was waiting.
+                    future.exception()
+                    raise
+                else:
+                    future.set_result(result)
+                finally:
+                    if pending.get(key) is future:
+                        del pending[key]
                 return result
 
+            def invalidate(*args, **kwargs) -> bool:
+                return self.delete(key_generator(*args, **kwargs))
+
+            wrapper.stats = stats
+            wrapper.length = lambda: partition.length
+            wrapper.invalidate = invalidate
+            self._partitions[wrapper] = partition
             return wrapper
 
         return decorator
@@ -0,0 +1,165 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#  #
+#          http://www.apache.org/licenses/LICENSE-2.0
+#  #
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+
+import threading
+import time
+import typing as ty
+
+__all__ = ["FIELDS", "Stats", "StatsHook", "TimedBackend"]
+
+FIELDS = (
+    "hits",
+    "misses",
+    "inserts",
+    "evictions",
+    "forced_evictions",
+    "hand_scans",
+    "oversized",
+    "rejections",
+    "stale_hits",
+    "refreshes",
+    "backend_calls",
+    "backend_seconds",
+)
+
+
+class StatsHook(ty.Protocol):
+    """Receives every counter update as it happens.
+
+    Implement this to forward events to Prometheus, StatsD or any other
+    metrics system.
+    """
+
+    def incr(
+        self, name: str, value: float, tags: ty.Mapping[str, str]
+    ) -> None:
+        ...
+
+    def timing(
+        self, name: str, seconds: float, tags: ty.Mapping[str, str]
+    ) -> None:
+        ...
+
+
+class Stats:
+    """Counters that are updated without locks and merged on read.
+
+    Each thread increments its own shard, so updates never contend; a
+    :meth:`snapshot` sums the shards of every thread that ever recorded.
+
+    :param fields: The counter names.
+    :param hook: Optional :class:`StatsHook` notified of every update.
+    :param tags: Tags passed to ``hook`` with every update.
+    :param parent: Optional :class:`Stats` whose snapshots include the
+        totals of this one, so an update only has to be recorded once.
+    """
+
+    def __init__(
+        self,
+        fields: ty.Sequence[str] = FIELDS,
+        hook: ty.Optional[StatsHook] = None,
+        tags: ty.Optional[ty.Mapping[str, str]] = None,
+        parent: ty.Optional["Stats"] = None,
+    ):
+        self.fields = tuple(fields)
+        self.hook = hook
+        self.tags = dict(tags or {})
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards: ty.List[ty.Dict[str, float]] = []
+        self._children: ty.List[Stats] = []
+        if parent is not None:
+            with parent._lock:
+                parent._children.append(self)
+
+    def _new_shard(self) -> ty.Dict[str, float]:
+        shard = self._local.shard = dict.fromkeys(self.fields, 0)
+        with self._lock:
+            self._shards.append(shard)
+        return shard
+
+    def incr(self, name: str, value: float = 1) -> None:
+        """Add ``value`` to the counter ``name``."""
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._new_shard()
+        shard[name] += value
+        if self.hook is not None:
+            self.hook.incr(name, value, self.tags)
+
+    def timing(self, seconds: float) -> None:
+        """Record the latency of one backend call."""
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._new_shard()
+        shard["backend_calls"] += 1
+        shard["backend_seconds"] += seconds
+        if self.hook is not None:
+            self.hook.timing("backend", seconds, self.tags)
+
+    def snapshot(self) -> ty.Dict[str, float]:
+        """Return the current totals of every counter.
+
+        The totals include the snapshots of every child :class:`Stats`.
+        """
+        with self._lock:
+            shards = list(self._shards)
+            children = list(self._children)
+        totals = dict.fromkeys(self.fields, 0)
+        for shard in shards + [child.snapshot() for child in children]:
+            for name, value in list(shard.items()):
+                totals[name] += value
+        return totals
+
+
+class TimedBackend:
+    """Proxy a region and record the latency of each backend call.
+
+    Attributes other than the timed calls are passed through.
+    """
+
+    def __init__(self, backend, stats: Stats):
+        self._wrapped = backend
+        self._stats = stats
+
+    def __getattr__(self, name):
+        return getattr(self._wrapped, name)
+
+    def _timed(self, fn, *args):
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self._stats.timing(time.perf_counter() - start)
+
+    def get(self, key):
+        return self._timed(self._wrapped.get, key)
+
+    def get_multi(self, keys):
+        return self._timed(self._wrapped.get_multi, keys)
+
+    def get_value_metadata(self, key):
+        return self._timed(self._wrapped.get_value_metadata, key)
+
+    def set(self, key, value):
+        return self._timed(self._wrapped.set, key, value)
+
+    def set_multi(self, mapping):
+        return self._timed(self._wrapped.set_multi, mapping)
+
+    def delete(self, key):
+        return self._timed(self._wrapped.delete, key)
+
+    def delete_multi(self, keys):
+        return self._timed(self._wrapped.delete_multi, keys)
@@ -0,0 +1,65 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#  #
+#          http://www.apache.org/licenses/LICENSE-2.0
+#  #
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+
+import array
+import typing as ty
+
+__all__ = ["NIL", "NodeStore"]
+
+NIL = -1
+
+
+class NodeStore:
+    """Struct-of-arrays storage for the nodes of a SIEVE list.
+
+    A node is identified by its slot number. ``next`` and ``prev`` are
+    signed integer arrays holding neighbouring slot numbers (``NIL`` when
+    there is none), ``visited`` holds one byte per slot, ``weights`` the
+    weight of each entry and ``keys`` the cache key of each slot. Released
+    slots are recycled through a free list, so the arrays only ever grow to
+    the peak number of entries.
+    """
+
+    __slots__ = ("keys", "next", "prev", "visited", "weights", "_free")
+
+    def __init__(self):
+        self.keys: ty.List[ty.Any] = []
+        self.next = array.array("q")
+        self.prev = array.array("q")
+        self.visited = bytearray()
+        self.weights = array.array("d")
+        self._free: ty.List[int] = []
+
+    def __len__(self) -> int:
+        return len(self.keys) - len(self._free)
+
+    def allocate(self, key) -> int:
+        """Return a free slot initialised for ``key``."""
+        if self._free:
+            slot = self._free.pop()
+            self.keys[slot] = key
+            self.next[slot] = NIL
+            self.prev[slot] = NIL
+            self.visited[slot] = 0
+            self.weights[slot] = 0
+            return slot
+        self.keys.append(key)
+        self.next.append(NIL)
+        self.prev.append(NIL)
+        self.visited.append(0)
+        self.weights.append(0)
+        return len(self.keys) - 1
+
+    def release(self, slot: int) -> None:
+        """Return ``slot`` to the free list."""
+        self.keys[slot] = None
+        self._free.append(slot)
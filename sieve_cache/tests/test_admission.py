@@ -0,0 +1,60 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#  #
+#          http://www.apache.org/licenses/LICENSE-2.0
+#  #
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+
+
+from unittest import TestCase
+
+from sieve_cache import admission
+
+
+class TestTinyLFU(TestCase):
+    def test_doorkeeper_absorbs_first_request(self):
+        policy = admission.TinyLFU(64)
+
+        self.assertEqual(0, policy.estimate("a"))
+        policy.record("a")
+        self.assertEqual(1, policy.estimate("a"))
+        policy.record("a")
+        policy.record("a")
+        self.assertEqual(3, policy.estimate("a"))
+
+    def test_counters_saturate(self):
+        policy = admission.TinyLFU(64, sample_factor=100)
+        for _ in range(50):
+            policy.record("a")
+
+        self.assertEqual(1 + admission.MAX_COUNT, policy.estimate("a"))
+
+    def test_admits_only_more_popular_candidates(self):
+        policy = admission.TinyLFU(64)
+        for _ in range(3):
+            policy.record("hot")
+        policy.record("once")
+
+        self.assertFalse(policy.admit("once", "hot"))
+        self.assertFalse(policy.admit("never", "once"))
+        self.assertTrue(policy.admit("hot", "once"))
+
+    def test_decay_halves_counts_and_clears_doorkeeper(self):
+        policy = admission.TinyLFU(1, sample_factor=16)
+        for _ in range(15):
+            policy.record("a")
+        self.assertEqual(15, policy.estimate("a"))
+
+        policy.record("a")
+        self.assertEqual(0, policy.estimate("a"))
+        policy.record("a")
+        self.assertEqual(1 + admission.MAX_COUNT // 2, policy.estimate("a"))
+
+    def test_rejects_invalid_sizes(self):
+        with self.assertRaises(ValueError):
+            admission.TinyLFU(0)
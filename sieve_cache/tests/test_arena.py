@@ -0,0 +1,109 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#  #
+#          http://www.apache.org/licenses/LICENSE-2.0
+#  #
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+
+
+from unittest import TestCase
+
+from sieve_cache.backends import _arena
+
+
+class TestArena(TestCase):
+    def _make_arena(self, slots=3, slot_size=16):
+        buffer = bytearray(_arena.Arena.size(slots, slot_size))
+        arena = _arena.Arena(buffer, slots, slot_size)
+        arena.format()
+        return arena, buffer
+
+    def test_format(self):
+        arena, _buffer = self._make_arena()
+
+        self.assertTrue(arena.is_formatted())
+        self.assertEqual(0, arena.count)
+        self.assertEqual([0, 1, 2], arena.free())
+        self.assertFalse(_arena.Arena(bytearray(4096), 3, 8).is_formatted())
+
+    def test_write_links_at_head(self):
+        arena, _buffer = self._make_arena()
+
+        arena.write(0, b"a", b"1")
+        arena.write(2, b"b", b"22")
+
+        self.assertEqual([2, 0], list(arena.used()))
+        self.assertEqual([1], arena.free())
+        self.assertEqual(b"b", bytes(arena.key(2)))
+        self.assertEqual(b"22", bytes(arena.value(2)))
+        self.assertEqual(2, arena.count)
+
+    def test_overwrite_keeps_position_and_visited_bit(self):
+        arena, _buffer = self._make_arena()
+        arena.write(0, b"a", b"1")
+        arena.write(1, b"b", b"2")
+        arena.visit(0)
+
+        arena.write(0, b"a", b"333")
+
+        self.assertEqual([1, 0], list(arena.used()))
+        self.assertEqual(b"333", bytes(arena.value(0)))
+        self.assertEqual(1, arena.evict())
+        self.assertEqual([0], list(arena.used()))
+
+    def test_evict_gives_visited_slots_a_second_chance(self):
+        arena, _buffer = self._make_arena()
+        for slot, key in enumerate((b"a", b"b", b"c")):
+            arena.write(slot, key, b"")
+        arena.visit(0)
+
+        self.assertEqual(1, arena.evict())
+        self.assertEqual(2, arena.hand)
+        self.assertEqual([2, 0], list(arena.used()))
+
+    def test_state_survives_reopening_the_buffer(self):
+        arena, buffer = self._make_arena()
+        for slot, key in enumerate((b"a", b"b", b"c")):
+            arena.write(slot, key, b"")
+        arena.visit(0)
+        arena.evict()
+
+        reopened = _arena.Arena(buffer, 3, 16)
+
+        self.assertTrue(reopened.is_formatted())
+        self.assertEqual([2, 0], list(reopened.used()))
+        self.assertEqual(2, reopened.hand)
+        self.assertEqual(2, reopened.evict())
+        self.assertEqual([0], list(reopened.used()))
+
+    def test_fits(self):
+        arena, _buffer = self._make_arena(slot_size=4)
+
+        self.assertTrue(arena.fits(b"ab", b"cd"))
+        self.assertFalse(arena.fits(b"ab", b"cde"))
+
+    def test_find_free_wraps(self):
+        arena, _buffer = self._make_arena()
+        arena.write(1, b"a", b"")
+        arena.write(2, b"b", b"")
+
+        self.assertEqual(0, arena.find_free(1))
+        arena.write(0, b"c", b"")
+        with self.assertRaises(LookupError):
+            arena.find_free()
+
+    def test_choose_keeps_victim_linked(self):
+        arena, _buffer = self._make_arena()
+        arena.write(0, b"a", b"")
+        arena.write(1, b"b", b"")
+
+        slot = arena.choose()
+
+        self.assertEqual(0, slot)
+        self.assertEqual(b"a", bytes(arena.key(slot)))
+        self.assertEqual(2, arena.count)
@@ -0,0 +1,79 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#  #
+#          http://www.apache.org/licenses/LICENSE-2.0
+#  #
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+
+
+import subprocess
+import sys
+from unittest import TestCase
+
+# NOTE: The package's own import time, excluding dogpile.cache, relative to
+# that of dogpile.cache measured in the same process. The lazy tree costs a
+# third of dogpile.cache and the eager one one and a half times it.
+IMPORT_BUDGET_RATIO = 1.0
+IMPORT_RUNS = 3
+
+LAZY_MODULES = (
+    "asyncio",
+    "iso8601",
+    "multiprocessing.connection",
+    "pymemcache",
+    "ssl",
+    "sieve_cache.sieve",
+    "sieve_cache.tiered",
+)
+
+
+def _run(code, *options):
+    return subprocess.run(
+        [sys.executable, *options, "-c", code],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+
+
+class TestImportTime(TestCase):
+    def _import_ratio(self):
+        result = _run("import sieve_cache", "-X", "importtime")
+
+        cumulative = {}
+        for line in result.stderr.splitlines():
+            fields = line.split("|")
+            if len(fields) == 3 and fields[1].strip().isdigit():
+                cumulative.setdefault(fields[2].strip(), int(fields[1]))
+        self.assertIn("sieve_cache", cumulative, result.stderr)
+        self.assertIn("dogpile.cache", cumulative, result.stderr)
+        baseline = cumulative["dogpile.cache"]
+        return (cumulative["sieve_cache"] - baseline) / baseline
+
+    def test_import_is_under_budget(self):
+        # NOTE: The fastest of a few runs filters out scheduling noise.
+        ratio = min(self._import_ratio() for _ in range(IMPORT_RUNS))
+
+        self.assertLess(ratio, IMPORT_BUDGET_RATIO)
+
+    def test_heavy_dependencies_are_not_imported(self):
+        result = _run(
+            "import sys, sieve_cache; "
+            f"print([m for m in {LAZY_MODULES!r} if m in sys.modules])"
+        )
+
+        self.assertEqual("[]", result.stdout.strip())
+
+    def test_submodules_load_on_access(self):
+        result = _run(
+            "import sieve_cache; "
+            "print(sieve_cache.sieve.Sieve.__name__, "
+            "'sieve' in dir(sieve_cache))"
+        )
+
+        self.assertEqual("Sieve True", result.stdout.strip())
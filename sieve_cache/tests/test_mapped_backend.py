@@ -0,0 +1,195 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#  #
+#          http://www.apache.org/licenses/LICENSE-2.0
+#  #
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+
+
+import os
+import tempfile
+from unittest import TestCase
+
+from dogpile.cache import api
+
+import sieve_cache
+from sieve_cache.backends import mapped
+from sieve_cache.common import exceptions
+
+
+class TestMmapDriver(TestCase):
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "cache.sieve")
+
+    def _open(self, **arguments):
+        arguments.setdefault("slots", 3)
+        arguments.setdefault("slot_size", 64)
+        backend = mapped.MmapDriver({"path": self.path, **arguments})
+        self.addCleanup(backend.close)
+        return backend
+
+    def test_set_get_delete(self):
+        backend = self._open()
+
+        backend.set("a", b"1")
+        backend.set_multi({"b": b"2", "a": b"3"})
+
+        self.assertEqual(
+            [b"3", b"2", api.NO_VALUE], backend.get_multi(["a", "b", "c"])
+        )
+        backend.delete("a")
+        self.assertIs(api.NO_VALUE, backend.get("a"))
+
+    def test_full_file_evicts_with_sieve(self):
+        backend = self._open()
+        backend.set_multi({"a": b"1", "b": b"2", "c": b"3"})
+        backend.get("a")
+
+        backend.set("d", b"4")
+
+        self.assertEqual(b"1", backend.get("a"))
+        self.assertIs(api.NO_VALUE, backend.get("b"))
+        self.assertEqual(b"4", backend.get("d"))
+
+    def test_reopen_restores_entries_and_sieve_state(self):
+        backend = self._open()
+        backend.set_multi({"a": b"1", "b": b"2", "c": b"3"})
+        backend.get("a")
+        backend.close()
+
+        reopened = self._open()
+        reopened.set("d", b"4")
+
+        self.assertEqual(b"1", reopened.get("a"))
+        self.assertIs(api.NO_VALUE, reopened.get("b"))
+        self.assertEqual(b"3", reopened.get("c"))
+
+    def test_open_file_is_locked(self):
+        backend = self._open()
+        backend.set("a", b"1")
+
+        with self.assertRaises(exceptions.SieveCacheException):
+            mapped.MmapDriver({"path": self.path, "slots": 3})
+        self.assertEqual(b"1", backend.get("a"))
+
+        backend.close()
+        self.assertEqual(b"1", self._open().get("a"))
+
+    def test_tuple_keys(self):
+        backend = self._open()
+        backend.set(("module:load", 1, "x"), b"1")
+        backend.close()
+
+        self.assertEqual(b"1", self._open().get(("module:load", 1, "x")))
+
+    def test_oversized_value_is_rejected(self):
+        backend = self._open(slot_size=32)
+        backend.set("a", b"1")
+
+        with self.assertRaises(exceptions.CantSerializeException):
+            backend.set_multi({"a": b"x" * 64, "b": b"2"})
+
+        self.assertIs(api.NO_VALUE, backend.get("a"))
+        self.assertEqual(b"2", backend.get("b"))
+
+    def test_corrupt_value_is_a_miss(self):
+        region = sieve_cache.create_region()
+        region.configure(
+            "sieve_cache.mmap", arguments={"path": self.path, "slots": 3}
+        )
+        self.addCleanup(region.backend.close)
+        region.backend.set("a", b'{"ct": 0, "v": 2}|garbage')
+
+        self.assertIs(api.NO_VALUE, region.get("a"))
+        self.assertEqual(1, region.get_or_create("a", lambda: 1))
+        self.assertEqual(1, region.get("a"))
+
+    def test_shape_change_discards_file(self):
+        backend = self._open()
+        backend.set("a", b"1")
+        backend.close()
+
+        self.assertIs(api.NO_VALUE, self._open(slots=4).get("a"))
+
+    def test_corrupt_file_is_discarded(self):
+        backend = self._open()
+        backend.set("a", b"1")
+        backend.close()
+        with open(self.path, "r+b") as f:
+            f.seek(mapped._arena.Arena.size(3, 0))
+            f.write(b"\xff" * 3 * 64)
+
+        backend = self._open()
+        self.assertIs(api.NO_VALUE, backend.get("a"))
+        backend.set("b", b"2")
+        self.assertEqual(b"2", backend.get("b"))
+
+
+class TestMmapSieve(TestCase):
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "cache.sieve")
+
+    def _make_sieve(self):
+        memo = sieve_cache.create_sieve(
+            backend="sieve_cache.mmap",
+            backend_arguments={"path": self.path, "slots": 16},
+        )
+        self.addCleanup(memo._backend.backend.close)
+        return memo
+
+    def test_warm_restart_reuses_and_adopts_entries(self):
+        memo = self._make_sieve()
+        calls = []
+
+        def load(number):
+            calls.append(number)
+            return {"number": number}
+
+        cached = memo.cache(max_size=2)(load)
+        for number in (1, 2):
+            cached(number)
+        memo._backend.backend.close()
+
+        restarted = self._make_sieve()
+        cached = restarted.cache(max_size=2)(load)
+
+        self.assertEqual({"number": 1}, cached(1))
+        self.assertEqual({"number": 2}, cached(2))
+        self.assertEqual([1, 2], calls)
+        self.assertEqual(2, cached.length())
+
+        cached(3)
+        self.assertEqual(2, cached.length())
+        self.assertEqual(1, cached.stats.snapshot()["evictions"])
+
+    def test_warm_restart_after_clear(self):
+        memo = self._make_sieve()
+        calls = []
+
+        def load(number):
+            calls.append(number)
+            return number
+
+        memo.clear()
+        cached = memo.cache(max_size=2)(load)
+        for number in (1, 2):
+            cached(number)
+        memo._backend.backend.close()
+
+        restarted = self._make_sieve()
+        cached = restarted.cache(max_size=2)(load)
+        cached(1)
+        cached(2)
+
+        self.assertEqual([1, 2], calls)
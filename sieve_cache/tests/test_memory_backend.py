@@ -10,20 +10,21 @@
 #  License for the specific language governing permissions and limitations
 #  under the License.
 
+import datetime
+import time
 from unittest import TestCase
 from unittest import mock
 
 from dogpile.cache import api
 
 from sieve_cache.backends.memory import InMemoryDriver
+from sieve_cache.common import timeutils
 
 
 class TestInMemoryDriver(TestCase):
-    def _make_backend(self, expiration_time):
-        backend = InMemoryDriver.__new__(InMemoryDriver)
-        backend.expiration_time = expiration_time
-        backend.cache = {}
-        return backend
+    def _make_backend(self, expiration_time, **arguments):
+        arguments["expiration_time"] = expiration_time
+        return InMemoryDriver(arguments)
 
     def test_set_and_get_without_expiration(self):
         backend = self._make_backend(expiration_time=0)
@@ -50,7 +51,7 @@ class TestInMemoryDriver(TestCase):
         backend = self._make_backend(expiration_time=10)
 
         with mock.patch(
-            "sieve_cache.backends.memory.timeutils.utcnow_ts"
+            "sieve_cache.backends.memory.timeutils.monotonic"
         ) as now:
             now.return_value = 100
             backend.set("a", 1)
@@ -66,7 +67,7 @@ class TestInMemoryDriver(TestCase):
         backend = self._make_backend(expiration_time=10)
 
         with mock.patch(
-            "sieve_cache.backends.memory.timeutils.utcnow_ts"
+            "sieve_cache.backends.memory.timeutils.monotonic"
         ) as now:
             now.return_value = 100
             backend.set("old", "value")
@@ -76,3 +77,141 @@ class TestInMemoryDriver(TestCase):
 
         self.assertIn("new", backend.cache)
         self.assertNotIn("old", backend.cache)
+
+    def test_set_drains_a_bounded_number_of_expired_keys(self):
+        backend = self._make_backend(expiration_time=10)
+
+        with mock.patch(
+            "sieve_cache.backends.memory.timeutils.monotonic"
+        ) as now:
+            now.return_value = 100
+            backend.set_multi({i: i for i in range(20)})
+
+            now.return_value = 500
+            backend.set("new", "value")
+            self.assertEqual(13, len(backend.cache))
+
+            backend.set("newer", "value")
+            backend.set("newest", "value")
+            self.assertEqual(["new", "newer", "newest"], list(backend.cache))
+
+    def test_reset_key_is_not_expired_by_stale_deadline(self):
+        backend = self._make_backend(expiration_time=10)
+
+        with mock.patch(
+            "sieve_cache.backends.memory.timeutils.monotonic"
+        ) as now:
+            now.return_value = 100
+            backend.set("a", 1)
+            now.return_value = 105
+            backend.set("a", 2)
+
+            now.return_value = 112
+            backend.set("b", 3)
+
+            self.assertEqual(2, backend.get("a"))
+            self.assertEqual(3, backend.get("b"))
+
+    def test_drain_tolerates_concurrent_delete(self):
+        backend = self._make_backend(expiration_time=10)
+
+        class Racing(dict):
+            def get(self, key, default=None):
+                entry = super().get(key, default)
+                # NOTE: Another thread deletes the key right after it is
+                # read.
+                backend.delete(key)
+                return entry
+
+        with mock.patch(
+            "sieve_cache.backends.memory.timeutils.monotonic"
+        ) as now:
+            now.return_value = 100
+            backend.set("a", 1)
+            backend.cache = Racing(backend.cache)
+
+            now.return_value = 200
+            backend._clear()
+
+        self.assertEqual({}, backend.cache)
+
+    def test_expiry_heap_is_compacted(self):
+        backend = self._make_backend(expiration_time=1000)
+
+        for _ in range(100):
+            backend.set_multi({"a": 1, "b": 2})
+
+        self.assertLessEqual(len(backend._expiry), 2 * 2 + 64)
+
+    def test_reaper_thread_expunges_expired_keys(self):
+        backend = self._make_backend(expiration_time=10, reaper_interval=0.01)
+
+        with mock.patch(
+            "sieve_cache.backends.memory.timeutils.monotonic"
+        ) as now:
+            now.return_value = 100
+            backend.set("a", 1)
+            now.return_value = 500
+            deadline = time.monotonic() + 5
+            while "a" in backend.cache and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+        self.assertNotIn("a", backend.cache)
+
+    def test_sub_second_expiration(self):
+        backend = self._make_backend(expiration_time=0.5)
+
+        with mock.patch(
+            "sieve_cache.backends.memory.timeutils.monotonic"
+        ) as now:
+            now.return_value = 100.2
+            backend.set("a", 1)
+
+            now.return_value = 100.6
+            self.assertEqual(1, backend.get("a"))
+
+            now.return_value = 100.7
+            self.assertEqual(api.NO_VALUE, backend.get("a"))
+
+    def test_wall_clock_override_does_not_expire_keys(self):
+        backend = self._make_backend(expiration_time=10)
+        backend.set("a", 1)
+
+        timeutils.utcnow.override_time = datetime.datetime(2100, 1, 1)
+        self.addCleanup(setattr, timeutils.utcnow, "override_time", None)
+
+        self.assertEqual(1, backend.get("a"))
+
+    def test_per_key_expiration_overrides_default(self):
+        backend = self._make_backend(expiration_time=100)
+
+        with mock.patch(
+            "sieve_cache.backends.memory.timeutils.monotonic"
+        ) as now:
+            now.return_value = 10.0
+            backend.set("short", 1, expiration_time=1.5)
+            backend.set_multi({"forever": 2}, expiration_time=0)
+            backend.set("default", 3)
+
+            now.return_value = 12.0
+            self.assertEqual(api.NO_VALUE, backend.get("short"))
+            self.assertEqual(2, backend.get("forever"))
+            self.assertEqual(3, backend.get("default"))
+
+            now.return_value = 1000.0
+            self.assertEqual(2, backend.get("forever"))
+            self.assertEqual(api.NO_VALUE, backend.get("default"))
+
+    def test_per_key_expiration_without_default(self):
+        backend = self._make_backend(expiration_time=0)
+
+        with mock.patch(
+            "sieve_cache.backends.memory.timeutils.monotonic"
+        ) as now:
+            now.return_value = 10.0
+            backend.set("a", 1, expiration_time=5)
+            backend.set("b", 2)
+
+            now.return_value = 20.0
+            self.assertEqual(api.NO_VALUE, backend.get("a"))
+            self.assertEqual(2, backend.get("b"))
@@ -10,6 +10,7 @@
 #  License for the specific language governing permissions and limitations
 #  under the License.
 
+import pickle
 from unittest import TestCase
 
 from sieve_cache.node import Node
@@ -27,15 +28,27 @@ class TestNode(TestCase):
         self.assertEqual(123, payload["value"][0]["value"])
         self.assertEqual("raw", payload["value"][1])
 
-    def test_dict_method_returns_serialized_payload(self):
+    def test_to_dict_returns_serialized_payload(self):
         node = Node(value=1, key="k", next="n", prev="p")
 
-        payload = node.__dict__()
+        payload = node.to_dict()
 
         self.assertEqual("k", payload["key"])
         self.assertEqual("n", payload["next"])
         self.assertEqual("p", payload["prev"])
 
+    def test_node_has_no_instance_dict(self):
+        node = Node(value=1, key="k")
+
+        self.assertFalse(hasattr(node, "__dict__"))
+        with self.assertRaises(AttributeError):
+            node.extra = True
+
+    def test_node_round_trips_through_pickle(self):
+        node = Node(value=[1, 2], key="k", visited=True, next="n")
+
+        self.assertEqual(node, pickle.loads(pickle.dumps(node)))
+
     def test_getitem_and_setitem(self):
         node = Node(value=1, key="k")
 
@@ -0,0 +1,201 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#  #
+#          http://www.apache.org/licenses/LICENSE-2.0
+#  #
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+
+
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent import futures
+from unittest import TestCase
+
+import sieve_cache
+from sieve_cache import pool
+
+LOG_ENV = "SIEVE_CACHE_TEST_POOL_LOG"
+
+MEMO = sieve_cache.create_sieve(backend="sieve_cache.memory")
+
+
+@MEMO.cache(max_size=64)
+def square(number):
+    # NOTE: Record every computation, whichever process runs it.
+    with open(os.environ[LOG_ENV], "a", encoding="utf-8") as f:
+        f.write(f"{number}\n")
+    return number * number
+
+
+class TestSieveServer(TestCase):
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.log = os.path.join(directory.name, "calls.log")
+        os.environ[LOG_ENV] = self.log
+        self.addCleanup(os.environ.pop, LOG_ENV)
+
+    def _computed(self):
+        try:
+            with open(self.log, encoding="utf-8") as f:
+                return sorted(int(line) for line in f)
+        except FileNotFoundError:
+            return []
+
+    def _map(self, context, numbers, max_workers=2, **kwargs):
+        with futures.ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context(context),
+            **kwargs,
+        ) as executor:
+            return list(executor.map(square, numbers))
+
+    def test_forked_workers_share_the_parent_cache(self):
+        numbers = list(range(8)) * 4
+        with MEMO.serve():
+            results = self._map("fork", numbers)
+
+        self.assertEqual([n * n for n in numbers], results)
+        self.assertEqual(list(range(8)), self._computed())
+        self.assertIsNone(MEMO._server)
+
+    def test_spawned_workers_attach_with_the_initializer(self):
+        square(10)
+        hits = square.stats.snapshot()["hits"]
+        with MEMO.serve() as server:
+            # NOTE: A single worker asks for the second 11 after publishing
+            # the first, so it is a hit rather than a wait on the first.
+            results = self._map(
+                "spawn",
+                [10, 11, 11],
+                max_workers=1,
+                initializer=server.initializer,
+                initargs=server.initargs,
+            )
+
+        self.assertEqual([100, 121, 121], results)
+        self.assertEqual([10, 11], self._computed())
+        self.assertEqual(hits + 2, square.stats.snapshot()["hits"])
+
+    def test_client_publishes_and_coalesces(self):
+        name = MEMO._partitions[square].name
+        key = MEMO._backend.function_key_generator(
+            MEMO.namespace, square.__wrapped__
+        )(20)
+        started, release = threading.Event(), threading.Event()
+        calls = []
+
+        def slow():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return "slow"
+
+        class Pending(threading.Event):
+            def __init__(self):
+                super().__init__()
+                self.waiting = threading.Event()
+
+            def wait(self, timeout=None):
+                self.waiting.set()
+                return super().wait(timeout)
+
+        with MEMO.serve() as server:
+            client = pool._Client(server.address, server.authkey)
+            leader = threading.Thread(
+                target=client.call, args=(name, key, slow)
+            )
+            leader.start()
+            started.wait(5)
+            # NOTE: Watch the leader's pending computation so the waiter is
+            # known to be blocked on it before the leader publishes.
+            pending = Pending()
+            with server._lock:
+                server._pending[(name, key)] = pending
+            executor = futures.ThreadPoolExecutor(1)
+            self.addCleanup(executor.shutdown)
+            waiter = executor.submit(
+                client.call, name, key, lambda: "duplicate"
+            )
+            self.assertTrue(pending.waiting.wait(5))
+            release.set()
+            leader.join(5)
+
+            self.assertEqual("slow", waiter.result(5))
+            self.assertEqual([1], calls)
+            self.assertEqual("slow", square(20))
+
+    def test_failed_computation_is_released_after_clear(self):
+        name = MEMO._partitions[square].name
+        key = MEMO._backend.function_key_generator(
+            MEMO.namespace, square.__wrapped__
+        )(21)
+        MEMO.clear()
+
+        def fail():
+            raise ValueError("boom")
+
+        with MEMO.serve() as server:
+            leader = pool._Client(server.address, server.authkey)
+            with self.assertRaises(ValueError):
+                leader.call(name, key, fail)
+            follower = pool._Client(server.address, server.authkey)
+            executor = futures.ThreadPoolExecutor(1)
+            self.addCleanup(executor.shutdown)
+            result = executor.submit(
+                follower.call, name, key, lambda: "computed"
+            )
+            self.assertEqual("computed", result.result(5))
+
+            # NOTE: The server handles the messages of a connection in
+            # order, so this get is answered after the set is stored.
+            result = executor.submit(follower.call, name, key, lambda: None)
+            self.assertEqual("computed", result.result(5))
+            self.assertEqual({}, server._pending)
+
+    def test_attachment_is_scoped_to_the_namespace(self):
+        self.addCleanup(pool._attached.clear)
+        pool.attach("address", b"key", MEMO.namespace)
+
+        self.assertIsNotNone(pool.remote(None, MEMO.namespace))
+        self.assertIsNone(pool.remote(None, "other"))
+
+    def test_unknown_function_uses_the_local_cache(self):
+        other = sieve_cache.create_sieve(backend="sieve_cache.memory")
+        calls = []
+
+        @other.cache(max_size=4)
+        def double(number):
+            calls.append(number)
+            return number * 2
+
+        with MEMO.serve() as server:
+            self.addCleanup(pool._attached.clear)
+            # NOTE: As in a spawned worker, where the initializer routes
+            # every Sieve of the served namespace to the server.
+            pool.attach(*server.initargs)
+            self.assertEqual(4, double(2))
+            self.assertEqual(4, double(2))
+
+        self.assertEqual([2], calls)
+        self.assertEqual(1, double.length())
+
+    def test_unreachable_server_computes_uncached(self):
+        client = pool._Client(
+            os.path.join(tempfile.gettempdir(), "missing.sock"), b"key"
+        )
+
+        self.assertEqual(1, client.call("name", "key", lambda: 1))
+
+    def test_serve_twice_is_rejected(self):
+        with MEMO.serve():
+            with self.assertRaises(sieve_cache.exceptions.SieveCacheException):
+                MEMO.serve()
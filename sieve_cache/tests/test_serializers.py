@@ -0,0 +1,180 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#  #
+#          http://www.apache.org/licenses/LICENSE-2.0
+#  #
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+
+
+import pickle
+import threading
+import unittest
+from unittest import TestCase
+
+from dogpile.cache import api
+
+import sieve_cache
+from sieve_cache.common import exceptions
+from sieve_cache import serializers
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+class TestPickleSerializer(TestCase):
+    def test_round_trip(self):
+        serializer = serializers.PickleSerializer()
+        value = {"a": [1, 2.5, "x"], "b": None}
+
+        self.assertEqual(value, serializer.loads(serializer.dumps(value)))
+
+    def test_buffers_are_kept_out_of_band(self):
+        serializer = serializers.PickleSerializer()
+        value = pickle.PickleBuffer(bytearray(b"x" * 4096))
+
+        data = serializer.dumps(value)
+        loaded = serializer.loads(data)
+
+        self.assertEqual(1, int.from_bytes(data[:4], "little"))
+        # NOTE: The buffer is handed back as a view of the payload.
+        self.assertIsInstance(loaded, memoryview)
+        self.assertEqual(b"x" * 4096, bytes(loaded))
+
+    def test_older_protocol(self):
+        serializer = serializers.PickleSerializer(protocol=4)
+        value = bytearray(b"abc")
+
+        data = serializer.dumps(value)
+
+        self.assertEqual(0, int.from_bytes(data[:4], "little"))
+        self.assertEqual(value, serializer.loads(data))
+
+    def test_unpicklable_value(self):
+        serializer = serializers.PickleSerializer()
+
+        with self.assertRaises(exceptions.CantSerializeException):
+            serializer.dumps(threading.Lock())
+
+    def test_corrupt_payload(self):
+        serializer = serializers.PickleSerializer()
+
+        with self.assertRaises(api.CantDeserializeException):
+            serializer.loads(b"garbage")
+
+
+@unittest.skipIf(msgpack is None, "msgpack is not installed")
+class TestMsgpackSerializer(TestCase):
+    def test_round_trip(self):
+        serializer = serializers.MsgpackSerializer()
+        value = {"a": [1, 2.5, "x"], "b": b"raw"}
+
+        self.assertEqual(value, serializer.loads(serializer.dumps(value)))
+
+    def test_unsupported_value(self):
+        serializer = serializers.MsgpackSerializer()
+
+        with self.assertRaises(exceptions.CantSerializeException):
+            serializer.dumps(object())
+
+
+class TestCompressedSerializer(TestCase):
+    def test_compresses_above_threshold(self):
+        serializer = serializers.CompressedSerializer(
+            serializers.PickleSerializer(), threshold=64
+        )
+        small, large = "x", "x" * 10_000
+
+        small_data = serializer.dumps(small)
+        large_data = serializer.dumps(large)
+
+        self.assertEqual(b"\x00", small_data[:1])
+        self.assertEqual(b"\x01", large_data[:1])
+        self.assertLess(len(large_data), 1000)
+        self.assertEqual(small, serializer.loads(small_data))
+        self.assertEqual(large, serializer.loads(large_data))
+
+    def test_corrupt_payload(self):
+        serializer = serializers.CompressedSerializer(
+            serializers.PickleSerializer()
+        )
+
+        with self.assertRaises(exceptions.CantDeserializeException):
+            serializer.loads(b"\x01garbage")
+        with self.assertRaises(exceptions.CantDeserializeException):
+            serializer.loads(b"\x07garbage")
+
+
+class TestSieveSerialization(TestCase):
+    def _make_sieve(self):
+        return sieve_cache.create_sieve(
+            backend="dogpile.cache.memory",
+            serializer=serializers.CompressedSerializer(
+                serializers.PickleSerializer()
+            ),
+        )
+
+    def test_values_are_stored_serialized(self):
+        memo = self._make_sieve()
+        calls = []
+
+        @memo.cache(max_size=4)
+        def load(number):
+            calls.append(number)
+            return [number] * 3
+
+        self.assertEqual([1, 1, 1], load(1))
+        self.assertEqual([1, 1, 1], load(1))
+
+        self.assertEqual([1], calls)
+        stored = list(memo._backend.backend._cache.values())
+        self.assertTrue(all(isinstance(value, bytes) for value in stored))
+
+    def test_unserializable_value_is_not_cached(self):
+        memo = self._make_sieve()
+        lock = threading.Lock()
+        calls = []
+
+        @memo.cache(max_size=4)
+        def load(number):
+            calls.append(number)
+            return lock
+
+        self.assertIs(lock, load(1))
+        self.assertIs(lock, load(1))
+
+        self.assertEqual([1, 1], calls)
+        self.assertEqual(0, load.length())
+
+    def test_corrupt_value_is_recomputed(self):
+        memo = self._make_sieve()
+        calls = []
+
+        @memo.cache(max_size=4)
+        def load(number):
+            calls.append(number)
+            return number
+
+        load(1)
+        backend = memo._backend.backend
+        for key in list(backend._cache):
+            backend._cache[key] = b'{"ct": 0, "v": 2}|\x07'
+
+        self.assertEqual(1, load(1))
+        self.assertEqual([1, 1], calls)
+
+    def test_set_many_skips_unserializable_values(self):
+        memo = self._make_sieve()
+
+        memo.set_many({"a": 1, "b": threading.Lock(), "c": 3})
+
+        found, missed = memo.get_many(["a", "b", "c"])
+        self.assertEqual({"a": 1, "c": 3}, found)
+        self.assertEqual(["b"], missed)
+        self.assertEqual(2, memo.length)
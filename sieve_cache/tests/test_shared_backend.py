@@ -0,0 +1,277 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#  #
+#          http://www.apache.org/licenses/LICENSE-2.0
+#  #
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+
+
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import uuid
+from unittest import TestCase
+
+from dogpile.cache import api
+
+import sieve_cache
+from sieve_cache.backends import shared
+from sieve_cache.common import exceptions
+
+
+def _worker(arguments, start, count):
+    backend = shared.SharedMemoryDriver(arguments)
+    try:
+        for number in range(start, start + count):
+            backend.set(("key", number), str(number).encode())
+    finally:
+        backend.close()
+
+
+class TestSharedMemoryDriver(TestCase):
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.arguments = {
+            "name": f"sieve-test-{uuid.uuid4().hex[:12]}",
+            "lock_path": os.path.join(directory.name, "cache.lock"),
+            "shards": 1,
+            "slots": 3,
+            "slot_size": 64,
+        }
+
+    def _open(self, **arguments):
+        backend = shared.SharedMemoryDriver({**self.arguments, **arguments})
+        self.addCleanup(backend.close)
+        return backend
+
+    def _create(self, **arguments):
+        backend = self._open(**arguments)
+        self.addCleanup(backend.unlink)
+        return backend
+
+    def test_set_get_delete(self):
+        backend = self._create()
+
+        backend.set("a", b"1")
+        backend.set_multi({"b": b"2", "a": b"3"})
+
+        self.assertEqual(
+            [b"3", b"2", api.NO_VALUE], backend.get_multi(["a", "b", "c"])
+        )
+        backend.delete("a")
+        self.assertIs(api.NO_VALUE, backend.get("a"))
+
+    def test_full_shard_evicts_with_sieve(self):
+        backend = self._create()
+        backend.set_multi({"a": b"1", "b": b"2", "c": b"3"})
+        backend.get("a")
+
+        backend.set("d", b"4")
+
+        self.assertEqual(b"1", backend.get("a"))
+        self.assertIs(api.NO_VALUE, backend.get("b"))
+        self.assertEqual(b"3", backend.get("c"))
+        self.assertEqual(b"4", backend.get("d"))
+
+    def test_churn_keeps_index_consistent(self):
+        backend = self._create(shards=4, slots=16)
+        for number in range(500):
+            backend.set(number, str(number).encode())
+            if number % 3:
+                backend.delete(number - 1)
+
+        found = [n for n in range(500) if backend.get(n) is not api.NO_VALUE]
+        self.assertIn(499, found)
+        self.assertLessEqual(len(found), 16)
+        for number in found:
+            self.assertEqual(str(number).encode(), backend.get(number))
+
+    def test_rebuild_skips_removed_slot(self):
+        backend = self._create()
+        backend.set_multi({"a": b"1", "b": b"2", "c": b"3"})
+
+        # NOTE: The third tombstone exceeds a quarter of the 8 entry index
+        # and rebuilds it.
+        backend.delete_multi(["a", "b", "c"])
+
+        shard = backend._shards[0]
+        self.assertEqual(0, shard.arena.count)
+        self.assertEqual(
+            [],
+            [
+                shard._entry(pos)
+                for pos in range(shard.table)
+                if shard._entry(pos)[1] >= 0
+            ],
+        )
+
+    def test_read_is_zero_copy(self):
+        backend = self._create()
+        backend.set("a", b"value")
+
+        self.assertEqual(
+            (memoryview, b"val"),
+            backend.read("a", lambda view: (type(view), bytes(view[:3]))),
+        )
+        self.assertIs(api.NO_VALUE, backend.read("b", bytes))
+
+    def test_oversized_value_is_rejected(self):
+        backend = self._create(slot_size=32)
+        backend.set("a", b"1")
+
+        with self.assertRaises(exceptions.CantSerializeException):
+            backend.set_multi({"a": b"x" * 64, "b": b"2"})
+
+        self.assertIs(api.NO_VALUE, backend.get("a"))
+        self.assertEqual(b"2", backend.get("b"))
+
+    def test_corrupt_value_is_a_miss(self):
+        region = sieve_cache.create_region()
+        region.configure("sieve_cache.shared_memory", arguments=self.arguments)
+        self.addCleanup(region.backend.unlink)
+        self.addCleanup(region.backend.close)
+        region.backend.set("a", b'{"ct": 0, "v": 2}|garbage')
+
+        self.assertIs(api.NO_VALUE, region.get("a"))
+        self.assertEqual(1, region.get_or_create("a", lambda: 1))
+        self.assertEqual(1, region.get("a"))
+
+    def test_second_backend_attaches(self):
+        backend = self._create()
+        backend.set("a", b"1")
+
+        other = self._open()
+        self.assertEqual(b"1", other.get("a"))
+        other.set("b", b"2")
+        self.assertEqual(b"2", backend.get("b"))
+
+    def test_backends_of_one_process_share_locks(self):
+        self.arguments.update(shards=2, slots=16)
+        backends = [self._create(), self._open()]
+        errors = []
+        # NOTE: Switch threads often so unserialised updates interleave.
+        self.addCleanup(sys.setswitchinterval, sys.getswitchinterval())
+        sys.setswitchinterval(1e-5)
+
+        def churn(backend, offset):
+            try:
+                for number in range(500):
+                    key = (offset, number % 50)
+                    backend.set(key, str(number).encode())
+                    if number % 3 == 0:
+                        backend.delete((offset, (number + 7) % 50))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [
+            threading.Thread(target=churn, args=(backends[n % 2], n))
+            for n in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual([], errors)
+        self.assertIs(backends[0]._locks, backends[1]._locks)
+        for shard in backends[0]._shards:
+            self.assertLessEqual(shard.arena.count, shard.arena.slots)
+
+    def test_shape_mismatch_is_rejected(self):
+        self._create()
+
+        with self.assertRaises(exceptions.SieveCacheException):
+            shared.SharedMemoryDriver({**self.arguments, "slots": 4})
+
+    def test_processes_share_entries(self):
+        self.arguments.update(shards=4, slots=256)
+        backend = self._create()
+        context = multiprocessing.get_context("spawn")
+        workers = [
+            context.Process(target=_worker, args=(self.arguments, start, 50))
+            for start in (0, 50)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(timeout=60)
+            self.assertEqual(0, worker.exitcode)
+
+        for number in range(100):
+            self.assertEqual(
+                str(number).encode(), backend.get(("key", number))
+            )
+
+    def test_unlink_keeps_resource_tracker_quiet(self):
+        code = (
+            "from sieve_cache.backends import shared; "
+            f"backend = shared.SharedMemoryDriver({self.arguments!r}); "
+            "backend.close(); backend.unlink()"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            check=True,
+            text=True,
+        )
+
+        self.assertEqual("", result.stderr)
+
+
+class TestSharedMemorySieve(TestCase):
+    def _create_sieve(self, **arguments):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        memo = sieve_cache.create_sieve(
+            backend="sieve_cache.shared_memory",
+            backend_arguments={
+                "name": f"sieve-test-{uuid.uuid4().hex[:12]}",
+                "lock_path": os.path.join(directory.name, "cache.lock"),
+                **arguments,
+            },
+        )
+        backend = memo._backend.backend
+        self.addCleanup(backend.unlink)
+        self.addCleanup(backend.close)
+        return memo
+
+    def test_decorated_function_uses_shared_memory(self):
+        memo = self._create_sieve(slots=64)
+        calls = []
+
+        @memo.cache()
+        def load(number):
+            calls.append(number)
+            return {"number": number}
+
+        self.assertEqual({"number": 1}, load(1))
+        self.assertEqual({"number": 1}, load(1))
+        self.assertEqual([1], calls)
+
+    def test_local_evictions_keep_shared_entries(self):
+        memo = self._create_sieve(shards=1, slots=64)
+        calls = []
+
+        @memo.cache(max_size=8)
+        def load(number):
+            calls.append(number)
+            return number
+
+        for number in range(40):
+            load(number)
+        for number in range(40):
+            load(number)
+
+        self.assertEqual(list(range(40)), calls)
+        self.assertEqual(8, load.length())
+        self.assertEqual(32, load.stats.snapshot()["evictions"])
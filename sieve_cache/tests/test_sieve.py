@@ -10,16 +10,48 @@
 #  License for the specific language governing permissions and limitations
 #  under the License.
 
+import asyncio
+import functools
+import io
 import logging
+import sys
+import threading
+from concurrent import futures
+from unittest import IsolatedAsyncioTestCase
 from unittest import TestCase
+from unittest import mock
+
+from dogpile.cache import api
 
 import sieve_cache
+from sieve_cache import admission
+from sieve_cache import aio
 from sieve_cache import create_region
+from sieve_cache import node
 from sieve_cache import sieve
 
 logging.basicConfig(level=logging.DEBUG)
 
 
+def load_key(memo, func, *args):
+    generator = memo._backend.function_key_generator(
+        memo.namespace, func.__wrapped__
+    )
+    return generator(*args)
+
+
+def memory_region():
+    region = create_region()
+    region.configure(backend="dogpile.cache.memory")
+    return region
+
+
+def make_sieve(region=None, **kwargs):
+    if region is None:
+        region = memory_region()
+    return sieve.Sieve(backend=region, **kwargs)
+
+
 class TestSieve(TestCase):
     def test_create_sieve_rejects_invalid_backend(self):
         with self.assertRaises(sieve_cache.exceptions.SieveCacheException):
@@ -38,6 +70,17 @@ class TestSieve(TestCase):
         self.assertEqual(50, get_value(5))
         self.assertEqual(1, calls["count"])
 
+    def test_create_sieve_with_memory_backend(self):
+        memo = sieve_cache.create_sieve(backend="sieve_cache.memory")
+
+        @memo.cache(max_size=2)
+        def load(number):
+            return number
+
+        for number in (1, 2, 1, 3):
+            self.assertEqual(number, load(number))
+        self.assertEqual(2, len(memo))
+
     def test_sieve_eviction_gives_second_chance_to_visited_node(self):
         memo = sieve_cache.create_sieve(backend="dogpile.cache.memory")
         calls = {1: 0, 2: 0, 3: 0}
@@ -69,14 +112,1276 @@ class TestSieve(TestCase):
                 return "x"
 
     def test_cache_length_is_namespaced(self):
+        region = memory_region()
+
+        cache_a = make_sieve(region, namespace="a")
+        cache_b = make_sieve(region, namespace="b")
+
+        @cache_a.cache(max_size=8)
+        def load_a(number):
+            return number
+
+        @cache_b.cache(max_size=8)
+        def load_b(number):
+            return number
+
+        for number in range(4):
+            load_a(number)
+        load_b(1)
+
+        self.assertEqual(4, cache_a.sync_length())
+        self.assertEqual(1, cache_b.sync_length())
+        self.assertEqual(4, region.get("a:sieve_len"))
+        self.assertEqual(1, region.get("b:sieve_len"))
+
+    def test_length_is_tracked_locally(self):
+        region = memory_region()
+        memo = make_sieve(region)
+
+        @memo.cache(max_size=2)
+        def load(number):
+            return number
+
+        with mock.patch.object(region, "get", wraps=region.get) as get:
+            for number in range(5):
+                load(number)
+            self.assertEqual(2, len(memo))
+
+        self.assertEqual(5, get.call_count)
+        self.assertIs(api.NO_VALUE, region.get("sieve:sieve_len"))
+
+    def test_length_sync_interval_publishes_in_batches(self):
+        region = memory_region()
+        memo = make_sieve(region, length_sync_interval=3)
+
+        @memo.cache(max_size=8)
+        def load(number):
+            return number
+
+        load(1)
+        load(2)
+        self.assertIs(api.NO_VALUE, region.get("sieve:sieve_len"))
+        load(3)
+        self.assertEqual(3, region.get("sieve:sieve_len"))
+
+    def test_sieve_rejects_non_positive_length_sync_interval(self):
+        with self.assertRaises(ValueError):
+            make_sieve(length_sync_interval=0)
+
+    def test_sieve_rejects_non_positive_segments(self):
+        with self.assertRaises(ValueError):
+            make_sieve(segments=0)
+
+    def test_cache_rejects_max_size_smaller_than_segments(self):
+        memo = make_sieve(segments=4)
+
+        with self.assertRaises(ValueError):
+
+            @memo.cache(max_size=2)
+            def too_small():
+                return "x"
+
+    def test_segmented_cache_respects_per_segment_capacity(self):
+        memo = make_sieve(segments=4)
+
+        @memo.cache(max_size=8)
+        def load(number):
+            return number
+
+        for number in range(100):
+            self.assertEqual(number, load(number))
+
+        sizes = [segment.size for segment in memo._partitions[load].segments]
+        self.assertEqual(8, memo.length)
+        self.assertEqual(8, sum(sizes))
+        self.assertTrue(all(size <= 2 for size in sizes))
+
+    def test_sieve_instances_do_not_share_locks(self):
+        region = memory_region()
+        cache_a = make_sieve(region, namespace="a")
+        cache_b = make_sieve(region, namespace="b")
+
+        @cache_b.cache(max_size=4)
+        def load(number):
+            return number
+
+        with cache_a._segments[0].lock:
+            self.assertEqual(1, load(1))
+
+    def test_cache_hit_does_not_write_to_backend(self):
+        region = memory_region()
+        memo = make_sieve(region)
+
+        @memo.cache(max_size=4)
+        def load(number):
+            return number
+
+        load(1)
+        with mock.patch.object(region, "set") as backend_set:
+            self.assertEqual(1, load(1))
+            self.assertEqual(1, load(1))
+
+        backend_set.assert_not_called()
+        segment = memo._partitions[load].segments[0]
+        slot = segment.index[load_key(memo, load, 1)]
+        self.assertEqual(1, segment.store.visited[slot])
+
+    def test_cache_stores_falsy_values(self):
+        memo = sieve_cache.create_sieve(backend="dogpile.cache.memory")
+        calls = {"count": 0}
+
+        @memo.cache(max_size=4)
+        def load(number):
+            calls["count"] += 1
+            return 0
+
+        self.assertEqual(0, load(1))
+        self.assertEqual(0, load(1))
+        self.assertEqual(1, calls["count"])
+
+    def test_unpicklable_value_is_recomputed(self):
+        memo = sieve_cache.create_sieve(backend="dogpile.cache.memory_pickle")
+        lock = threading.Lock()
+
+        @memo.cache(max_size=4)
+        def load(number):
+            return lock
+
+        self.assertIs(lock, load(1))
+        self.assertIs(lock, load(1))
+        self.assertEqual(0, load.length())
+
+    def test_failed_write_is_unlinked(self):
+        region = memory_region()
+        memo = make_sieve(region)
+
+        @memo.cache(max_size=4)
+        def load(number):
+            return number
+
+        with mock.patch.object(
+            region, "set", side_effect=RuntimeError("down")
+        ):
+            with self.assertRaises(RuntimeError):
+                load(1)
+
+        self.assertEqual(0, load.length())
+        self.assertEqual(2, load(2))
+        self.assertEqual(1, load.length())
+
+    def test_sync_metadata_stores_node_records(self):
+        region = memory_region()
+        memo = make_sieve(region, sync_metadata=True)
+
+        @memo.cache(max_size=4)
+        def load(number):
+            return number * 2
+
+        load(1)
+        load(2)
+        self.assertEqual(4, load(2))
+
+        first = region.get(load_key(memo, load, 1))
+        second = region.get(load_key(memo, load, 2))
+        self.assertIsInstance(second, node.Node)
+        self.assertEqual(4, second.value)
+        self.assertTrue(second.visited)
+        self.assertEqual(first.key, second.next)
+        self.assertFalse(first.visited)
+
+    def test_evicted_slots_are_reused(self):
+        memo = make_sieve()
+
+        @memo.cache(max_size=3)
+        def load(number):
+            return number
+
+        for number in range(50):
+            load(number)
+
+        store = memo._partitions[load].segments[0].store
+        self.assertEqual(3, len(store))
+        self.assertEqual(3, len(store.keys))
+
+    def test_concurrent_misses_compute_once(self):
+        memo = sieve_cache.create_sieve(backend="dogpile.cache.memory")
+        started = threading.Event()
+        release = threading.Event()
+        calls = {"count": 0}
+
+        @memo.cache(max_size=4)
+        def load(number):
+            calls["count"] += 1
+            started.set()
+            release.wait()
+            return number
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(load(7)))
+            for _ in range(8)
+        ]
+        threads[0].start()
+        started.wait()
+        for thread in threads[1:]:
+            thread.start()
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual([7] * 8, results)
+        self.assertEqual(1, calls["count"])
+        self.assertEqual(1, len(memo))
+
+
+class TestAsyncSieve(IsolatedAsyncioTestCase):
+    def test_acache_rejects_plain_functions(self):
+        memo = make_sieve()
+
+        with self.assertRaises(TypeError):
+
+            @memo.acache(max_size=4)
+            def not_async():
+                return "x"
+
+    async def test_acache_caches_awaited_result(self):
+        memo = make_sieve()
+        calls = {"count": 0}
+
+        @memo.acache(max_size=4)
+        async def load(number):
+            calls["count"] += 1
+            return number * 10
+
+        self.assertEqual(50, await load(5))
+        self.assertEqual(50, await load(5))
+        self.assertEqual(1, calls["count"])
+        self.assertEqual(1, len(memo))
+
+    async def test_acache_evicts_with_sieve(self):
+        memo = make_sieve()
+        calls = {1: 0, 2: 0, 3: 0}
+
+        @memo.acache(max_size=2)
+        async def load(number):
+            calls[number] += 1
+            return number
+
+        for number in (1, 2, 1, 3, 1, 2):
+            self.assertEqual(number, await load(number))
+
+        self.assertEqual({1: 1, 2: 2, 3: 1}, calls)
+        self.assertEqual(2, len(memo))
+
+    async def test_acache_coalesces_concurrent_awaits(self):
+        memo = make_sieve()
+        release = asyncio.Event()
+        calls = {"count": 0}
+
+        @memo.acache(max_size=4)
+        async def load(number):
+            calls["count"] += 1
+            await release.wait()
+            return number
+
+        tasks = [asyncio.create_task(load(3)) for _ in range(5)]
+        await asyncio.sleep(0)
+        release.set()
+
+        self.assertEqual([3] * 5, await asyncio.gather(*tasks))
+        self.assertEqual(1, calls["count"])
+
+    async def test_acache_waiter_recomputes_after_timeout(self):
+        memo = make_sieve()
+        release = asyncio.Event()
+        calls = {"count": 0}
+
+        @memo.acache(max_size=4, wait_timeout=0.01)
+        async def load(number):
+            calls["count"] += 1
+            if calls["count"] == 1:
+                await release.wait()
+            return number
+
+        leader = asyncio.create_task(load(3))
+        await asyncio.sleep(0)
+        self.assertEqual(3, await load(3))
+        release.set()
+        self.assertEqual(3, await leader)
+        self.assertEqual(2, calls["count"])
+
+    async def test_acache_propagates_errors_to_waiters(self):
+        memo = make_sieve()
+        release = asyncio.Event()
+
+        @memo.acache(max_size=4)
+        async def load(number):
+            await release.wait()
+            raise RuntimeError("boom")
+
+        tasks = [asyncio.create_task(load(1)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        self.assertTrue(all(isinstance(r, RuntimeError) for r in results))
+        self.assertEqual(0, len(memo))
+
+    async def test_acache_uses_async_backend(self):
+        region = memory_region()
+        backend = aio.ThreadedBackend(region)
+        memo = make_sieve(region, async_backend=backend)
+
+        @memo.acache(max_size=4)
+        async def load(number):
+            return number
+
+        with mock.patch.object(
+            backend, "set", wraps=backend.set
+        ) as backend_set:
+            self.assertEqual(1, await load(1))
+            self.assertEqual(1, await load(1))
+
+        backend_set.assert_called_once()
+        self.assertEqual(1, region.get(load_key(memo, load, 1)))
+
+
+class TestSieveBatch(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.region = memory_region()
+        self.memo = make_sieve(self.region)
+
+    def test_get_many_reports_hits_and_misses(self):
+        self.memo.set_many({"a": 1, "b": 0})
+
+        with mock.patch.object(
+            self.region, "get_multi", wraps=self.region.get_multi
+        ) as get_multi:
+            found, missed = self.memo.get_many(["a", "b", "c", "a"])
+
+        get_multi.assert_called_once_with(["a", "b", "c"])
+        self.assertEqual({"a": 1, "b": 0}, found)
+        self.assertEqual(["c"], missed)
+        segment = self.memo._segments[0]
+        self.assertEqual(1, segment.store.visited[segment.index["a"]])
+
+    def test_get_many_visits_function_entries(self):
+        @self.memo.cache(max_size=4)
+        def load(number):
+            return number
+
+        load(1)
+        key = load_key(self.memo, load, 1)
+
+        found, _missed = self.memo.get_many([key])
+
+        self.assertEqual({key: 1}, found)
+        segment = self.memo._partitions[load].segments[0]
+        self.assertEqual(1, segment.store.visited[segment.index[key]])
+
+    def test_set_many_uses_single_backend_calls(self):
+        self.memo.set_many({"a": 1, "b": 2}, max_size=3)
+
+        with mock.patch.object(
+            self.region, "set_multi", wraps=self.region.set_multi
+        ) as set_multi, mock.patch.object(
+            self.region, "delete_multi", wraps=self.region.delete_multi
+        ) as delete_multi:
+            self.memo.set_many({"c": 3, "d": 4, "e": 5}, max_size=3)
+
+        set_multi.assert_called_once()
+        delete_multi.assert_called_once_with(["a", "b"])
+        self.assertEqual(3, len(self.memo))
+        found, missed = self.memo.get_many(["a", "b", "c", "d", "e"])
+        self.assertEqual({"c": 3, "d": 4, "e": 5}, found)
+        self.assertEqual(["a", "b"], missed)
+
+    def test_set_many_larger_than_capacity_keeps_newest(self):
+        self.memo.set_many({key: key for key in "abcde"}, max_size=2)
+
+        self.assertEqual(2, len(self.memo))
+        found, _missed = self.memo.get_many(list("abcde"))
+        self.assertEqual({"d": "d", "e": "e"}, found)
+
+    def test_get_or_create_many_computes_misses_once(self):
+        self.memo.set_many({"a": "A"})
+        creator = mock.Mock(side_effect=lambda keys: [k.upper() for k in keys])
+
+        values = self.memo.get_or_create_many(["a", "b", "c"], creator)
+
+        self.assertEqual(["A", "B", "C"], values)
+        creator.assert_called_once_with(["b", "c"])
+        self.assertEqual(
+            ["A", "B", "C"],
+            self.memo.get_or_create_many(["a", "b", "c"], creator),
+        )
+        creator.assert_called_once()
+
+    def test_set_many_failure_unlinks_the_batch(self):
+        with mock.patch.object(
+            self.region, "set_multi", side_effect=RuntimeError("down")
+        ):
+            with self.assertRaises(RuntimeError):
+                self.memo.set_many({"a": 1, "b": 2})
+
+        self.assertEqual(0, len(self.memo))
+
+    def test_set_many_skips_unpicklable_values(self):
         region = create_region()
-        region.configure(backend="dogpile.cache.memory")
+        region.configure(backend="dogpile.cache.memory_pickle")
+        memo = make_sieve(region)
+
+        memo.set_many({"a": 1, "b": threading.Lock()})
+
+        self.assertEqual(1, len(memo))
+        self.assertEqual(({"a": 1}, ["b"]), memo.get_many(["a", "b"]))
+
+
+class TestSieveStats(TestCase):
+    def test_counters_per_function_and_per_sieve(self):
+        memo = make_sieve()
+
+        @memo.cache(max_size=2)
+        def load(number):
+            return number
+
+        @memo.cache(max_size=2)
+        def other(number):
+            return number
+
+        for number in (1, 2, 1, 3):
+            load(number)
+        other(1)
+
+        snapshot = load.stats.snapshot()
+        self.assertEqual(1, snapshot["hits"])
+        self.assertEqual(3, snapshot["misses"])
+        self.assertEqual(3, snapshot["inserts"])
+        self.assertEqual(1, snapshot["evictions"])
+        self.assertEqual(2, snapshot["hand_scans"])
+
+        totals = memo.stats.snapshot()
+        self.assertEqual(4, totals["misses"])
+        self.assertEqual(4, totals["inserts"])
+
+    def test_batch_calls_are_counted_on_the_sieve(self):
+        memo = make_sieve()
+
+        memo.set_many({"a": 1})
+        memo.get_many(["a", "b"])
 
-        cache_a = sieve.Sieve(backend=region, namespace="a")
-        cache_b = sieve.Sieve(backend=region, namespace="b")
+        snapshot = memo.stats.snapshot()
+        self.assertEqual(1, snapshot["hits"])
+        self.assertEqual(1, snapshot["misses"])
+        self.assertEqual(1, snapshot["inserts"])
 
-        cache_a.length = 4
-        cache_b.length = 1
+    def test_time_backend_records_backend_calls(self):
+        memo = make_sieve(time_backend=True)
 
-        self.assertEqual(4, cache_a.length)
-        self.assertEqual(1, cache_b.length)
+        @memo.cache(max_size=2)
+        def load(number):
+            return number
+
+        load(1)
+        load(1)
+
+        snapshot = memo.stats.snapshot()
+        self.assertEqual(3, snapshot["backend_calls"])
+        self.assertGreater(snapshot["backend_seconds"], 0)
+
+    def test_stats_hook_is_tagged_with_function(self):
+        hook = mock.Mock()
+        memo = make_sieve(stats_hook=hook)
+
+        @memo.cache(max_size=2)
+        def load(number):
+            return number
+
+        load(1)
+
+        tags = hook.incr.call_args_list[0][0][2]
+        self.assertEqual("sieve", tags["namespace"])
+        self.assertTrue(tags["function"].endswith("load"))
+
+
+class TestSieveScanBudget(TestCase):
+    def test_rejects_negative_max_scan(self):
+        with self.assertRaises(ValueError):
+            make_sieve(max_scan=-1)
+
+    def test_max_scan_bounds_hand_walk_on_all_hot_cache(self):
+        memo = make_sieve(max_scan=2)
+
+        @memo.cache(max_size=10)
+        def load(number):
+            return number
+
+        for number in range(10):
+            load(number)
+        for number in range(10):
+            load(number)
+        load(10)
+
+        snapshot = load.stats.snapshot()
+        self.assertEqual(1, snapshot["evictions"])
+        self.assertEqual(1, snapshot["forced_evictions"])
+        self.assertEqual(3, snapshot["hand_scans"])
+        # The scan cleared the two oldest entries and evicted the first of
+        # them, as an unbounded scan would have.
+        segment = memo._partitions[load].segments[0]
+        keys = {
+            load_key(memo, load, number): number for number in range(11)
+        }
+        cleared = sorted(
+            keys[segment.store.keys[slot]]
+            for slot in segment.index.values()
+            if not segment.store.visited[slot]
+        )
+        self.assertEqual([1, 10], cleared)
+        self.assertNotIn(load_key(memo, load, 0), segment.index)
+
+    def test_cleared_bits_carry_over_to_next_insert(self):
+        memo = make_sieve(max_scan=2)
+
+        @memo.cache(max_size=10)
+        def load(number):
+            return number
+
+        for number in range(10):
+            load(number)
+        for number in range(10):
+            load(number)
+        load(10)
+        load(11)
+
+        snapshot = load.stats.snapshot()
+        self.assertEqual(2, snapshot["evictions"])
+        self.assertEqual(1, snapshot["forced_evictions"])
+        self.assertEqual(4, snapshot["hand_scans"])
+        segment = memo._partitions[load].segments[0]
+        self.assertNotIn(load_key(memo, load, 1), segment.index)
+
+    def test_unbounded_scan_clears_every_bit(self):
+        memo = make_sieve()
+
+        @memo.cache(max_size=10)
+        def load(number):
+            return number
+
+        for number in range(10):
+            load(number)
+        for number in range(10):
+            load(number)
+        load(10)
+
+        snapshot = load.stats.snapshot()
+        self.assertEqual(0, snapshot["forced_evictions"])
+        self.assertEqual(11, snapshot["hand_scans"])
+
+    def test_all_hot_eviction_order_matches_unbounded_scan(self):
+        survivors = []
+        for max_scan in (None, 3):
+            memo = make_sieve(max_scan=max_scan)
+
+            @memo.cache(max_size=16)
+            def load(number):
+                return number
+
+            for number in range(16):
+                load(number)
+            for number in range(16):
+                load(number)
+            for number in range(16, 24):
+                load(number)
+            segment = memo._partitions[load].segments[0]
+            survivors.append(set(segment.index))
+
+        self.assertEqual(survivors[0], survivors[1])
+
+
+class TestSieveWeight(TestCase):
+    def test_rejects_invalid_weight_options(self):
+        memo = make_sieve()
+        with self.assertRaises(ValueError):
+            memo.cache(max_weight=0)
+        with self.assertRaises(ValueError):
+            memo.cache(weigher=len)
+
+    def test_max_weight_defaults_to_getsizeof(self):
+        memo = make_sieve()
+        load = memo.cache(max_weight=10**6)(lambda value: value)
+
+        load("abc")
+
+        segment = memo._partitions[load].segments[0]
+        self.assertEqual(
+            sys.getsizeof("abc"), segment.store.weights[segment.head]
+        )
+        self.assertEqual(sys.getsizeof("abc"), segment.weight)
+
+    def test_evicts_until_value_fits(self):
+        memo = make_sieve()
+
+        @memo.cache(max_size=10, max_weight=10, weigher=len)
+        def load(value):
+            return value
+
+        load("aaaa")
+        load("bbbb")
+        load("cccccccc")
+
+        segment = memo._partitions[load].segments[0]
+        self.assertEqual(1, memo.length)
+        self.assertEqual(8, segment.weight)
+        self.assertNotIn(load_key(memo, load, "aaaa"), segment.index)
+        self.assertNotIn(load_key(memo, load, "bbbb"), segment.index)
+        self.assertIs(
+            api.NO_VALUE,
+            memo._backend.get(load_key(memo, load, "aaaa")),
+        )
+        self.assertEqual(2, load.stats.snapshot()["evictions"])
+
+    def test_oversized_value_is_not_cached(self):
+        memo = make_sieve()
+        calls = []
+
+        @memo.cache(max_size=10, max_weight=4, weigher=len)
+        def load(value):
+            calls.append(value)
+            return value
+
+        load("ab")
+        self.assertEqual("abcdef", load("abcdef"))
+        self.assertEqual("abcdef", load("abcdef"))
+
+        self.assertEqual(["ab", "abcdef", "abcdef"], calls)
+        self.assertEqual(1, memo.length)
+        self.assertEqual(2, load.stats.snapshot()["oversized"])
+
+    def test_set_many_tracks_weight(self):
+        memo = make_sieve()
+
+        memo.set_many(
+            {"a": "x" * 3, "b": "x" * 3, "c": "x" * 3},
+            max_weight=7,
+            weigher=len,
+        )
+
+        self.assertEqual(2, memo.length)
+        self.assertEqual(6, memo._segments[0].weight)
+        self.assertIs(api.NO_VALUE, memo._backend.get("a"))
+        self.assertEqual("xxx", memo._backend.get("c"))
+
+    def test_changed_weight_relinks_entry(self):
+        memo = make_sieve()
+
+        memo.set_many({"a": "xx"}, max_weight=10, weigher=len)
+        memo.set_many({"a": "xxxxx"}, max_weight=10, weigher=len)
+
+        segment = memo._segments[0]
+        self.assertEqual(1, memo.length)
+        self.assertEqual(5, segment.weight)
+        self.assertEqual("xxxxx", memo._backend.get("a"))
+
+    def test_replacing_with_oversized_value_drops_entry(self):
+        memo = make_sieve()
+
+        memo.set_many({"a": "xx"}, max_weight=4, weigher=len)
+        memo.set_many({"a": "xxxxxx"}, max_weight=4, weigher=len)
+
+        self.assertEqual(0, memo.length)
+        self.assertEqual(0, memo._segments[0].weight)
+        self.assertIs(api.NO_VALUE, memo._backend.get("a"))
+
+
+class TestAsyncSieveWeight(IsolatedAsyncioTestCase):
+    async def test_acache_respects_max_weight(self):
+        memo = make_sieve()
+
+        @memo.acache(max_size=10, max_weight=6, weigher=len)
+        async def load(value):
+            return value
+
+        await load("aaa")
+        await load("bbb")
+        await load("cccc")
+        self.assertEqual("toolong", await load("toolong"))
+
+        self.assertEqual(1, memo.length)
+        self.assertEqual(4, memo._partitions[load].segments[0].weight)
+        snapshot = load.stats.snapshot()
+        self.assertEqual(2, snapshot["evictions"])
+        self.assertEqual(1, snapshot["oversized"])
+
+
+class TestSievePartitions(TestCase):
+    def test_rejects_non_positive_max_size(self):
+        with self.assertRaises(ValueError):
+            make_sieve(max_size=0)
+
+    def test_functions_do_not_evict_each_other(self):
+        memo = make_sieve()
+
+        @memo.cache(max_size=2)
+        def noisy(number):
+            return number
+
+        @memo.cache(max_size=4)
+        def critical(number):
+            return number
+
+        for number in range(4):
+            critical(number)
+        for number in range(100):
+            noisy(number)
+
+        self.assertEqual(2, noisy.length())
+        self.assertEqual(4, critical.length())
+        self.assertEqual(6, memo.length)
+        self.assertEqual(0, critical.stats.snapshot()["evictions"])
+        self.assertEqual(98, noisy.stats.snapshot()["evictions"])
+
+    def test_global_ceiling_evicts_from_largest_partition(self):
+        memo = make_sieve(max_size=4)
+
+        @memo.cache(max_size=10)
+        def big(number):
+            return number
+
+        @memo.cache(max_size=10)
+        def small(number):
+            return number
+
+        for number in range(4):
+            big(number)
+        small(0)
+        small(1)
+
+        self.assertEqual(4, memo.length)
+        self.assertEqual(2, big.length())
+        self.assertEqual(2, small.length())
+        self.assertEqual(2, big.stats.snapshot()["evictions"])
+        self.assertIs(
+            api.NO_VALUE, memo._backend.get(load_key(memo, big, 0))
+        )
+
+    def test_entry_count_is_only_kept_with_a_ceiling(self):
+        memo = make_sieve()
+        memo._size_lock = mock.MagicMock()
+
+        @memo.cache(max_size=2)
+        def load(number):
+            return number
+
+        for number in range(5):
+            load(number)
+
+        self.assertEqual(2, memo.length)
+        memo._size_lock.__enter__.assert_not_called()
+
+    def test_global_ceiling_falls_back_to_own_segment(self):
+        memo = make_sieve(max_size=2)
+
+        @memo.cache(max_size=10)
+        def first(number):
+            return number
+
+        @memo.cache(max_size=10)
+        def second(number):
+            return number
+
+        first(0)
+        second(0)
+        with memo._partitions[first].segments[0].lock:
+            first_size = first.length()
+            second(1)
+            second(2)
+
+        self.assertEqual(first_size, first.length())
+        self.assertEqual(1, second.length())
+        self.assertEqual(2, memo.length)
+
+    def test_length_is_counted_across_partitions(self):
+        memo = make_sieve(max_size=6, segments=2)
+
+        @memo.cache(max_size=4)
+        def first(number):
+            return number
+
+        @memo.cache(max_size=4)
+        def second(number):
+            return number
+
+        for number in range(10):
+            first(number)
+            second(number)
+        memo.delete(load_key(memo, first, 9))
+
+        sizes = sum(segment.size for segment, _ in memo._lists())
+        self.assertEqual(sizes, memo.length)
+        self.assertLessEqual(memo.length, 6)
+        memo.clear()
+        self.assertEqual(0, memo.length)
+
+
+def _double(number):
+    return number * 2
+
+
+class TestSieveSnapshot(TestCase):
+    def test_restores_entries_visited_bits_and_hand(self):
+        memo = make_sieve()
+        load = memo.cache(max_size=3)(_double)
+        for number in (1, 2, 3, 1, 4):
+            load(number)
+        snapshot = io.BytesIO()
+
+        self.assertEqual(3, memo.dump(snapshot))
+
+        restored = make_sieve()
+        cached = restored.cache(max_size=3)(_double)
+        snapshot.seek(0)
+        self.assertEqual(3, restored.load(snapshot))
+
+        old = memo._partitions[load].segments[0]
+        new = restored._partitions[cached].segments[0]
+        self.assertEqual(memo._entries(old), restored._entries(new))
+
+        # NOTE: Both caches now evict the same entries.
+        for number in (4, 2, 5):
+            self.assertEqual(load(number), cached(number))
+        self.assertEqual(memo._entries(old), restored._entries(new))
+        self.assertEqual(1, cached.stats.snapshot()["hits"])
+
+    def test_loads_set_many_entries_with_one_set_multi(self):
+        memo = make_sieve()
+        memo.set_many({"a": 1, "b": 2, "c": 3})
+        snapshot = io.BytesIO()
+        memo.dump(snapshot, batch_size=2)
+
+        restored = make_sieve()
+        snapshot.seek(0)
+        with mock.patch.object(
+            restored._backend, "set_multi", wraps=restored._backend.set_multi
+        ) as set_multi, mock.patch.object(
+            restored._backend, "set", wraps=restored._backend.set
+        ) as set_one:
+            self.assertEqual(3, restored.load(snapshot))
+
+        self.assertEqual(2, set_multi.call_count)
+        set_one.assert_not_called()
+        self.assertEqual(
+            ({"a": 1, "b": 2, "c": 3}, []),
+            restored.get_many(["a", "b", "c"]),
+        )
+
+    def test_load_respects_limits(self):
+        memo = make_sieve()
+        memo.set_many({number: number for number in range(10)}, max_size=10)
+        snapshot = io.BytesIO()
+        memo.dump(snapshot)
+
+        restored = make_sieve()
+        snapshot.seek(0)
+        self.assertEqual(4, restored.load(snapshot, max_size=4))
+        self.assertEqual(4, restored.length)
+
+    def test_skips_unknown_functions_and_missing_values(self):
+        memo = make_sieve()
+        load = memo.cache(max_size=4)(_double)
+        load(1)
+        load(2)
+        memo._backend.delete(load_key(memo, load, 1))
+        snapshot = io.BytesIO()
+
+        self.assertEqual(1, memo.dump(snapshot))
+
+        restored = make_sieve()
+        snapshot.seek(0)
+        self.assertEqual(0, restored.load(snapshot))
+        self.assertEqual(0, restored.length)
+
+    def test_skips_values_that_cannot_be_pickled(self):
+        memo = make_sieve()
+        memo.set_many({"a": 1, "b": threading.Lock()})
+        snapshot = io.BytesIO()
+
+        self.assertEqual(1, memo.dump(snapshot))
+
+    def test_rejects_other_files(self):
+        memo = make_sieve()
+
+        with self.assertRaises(sieve_cache.exceptions.SieveCacheException):
+            memo.load(io.BytesIO(b"not a snapshot"))
+
+    def test_keys_are_dumped_without_generation(self):
+        memo = make_sieve()
+        load = memo.cache(max_size=3)(_double)
+        memo.clear()
+        for number in (1, 2, 3):
+            load(number)
+        snapshot = io.BytesIO()
+        memo.dump(snapshot)
+
+        restored = make_sieve()
+        restored.clear()
+        restored.clear()
+        cached = restored.cache(max_size=3)(_double)
+        snapshot.seek(0)
+        self.assertEqual(3, restored.load(snapshot))
+
+        for number in (1, 2, 3):
+            self.assertEqual(number * 2, cached(number))
+        self.assertEqual(3, cached.stats.snapshot()["hits"])
+        self.assertEqual(3, restored.length)
+
+
+class _ManualExecutor(futures.Executor):
+    def __init__(self):
+        self.tasks = []
+
+    def submit(self, fn, *args, **kwargs):
+        self.tasks.append(functools.partial(fn, *args, **kwargs))
+        return futures.Future()
+
+    def run(self):
+        tasks, self.tasks = self.tasks, []
+        for task in tasks:
+            task()
+
+
+class TestSieveStaleWhileRevalidate(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.now = 1000.0
+        patcher = mock.patch("time.time", side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.executor = _ManualExecutor()
+        region = create_region()
+        region.configure(backend="dogpile.cache.memory", expiration_time=60)
+        self.memo = make_sieve(region, refresh_executor=self.executor)
+        self.calls = []
+
+        @self.memo.cache(max_size=4, stale_after=10)
+        def load(number):
+            self.calls.append(number)
+            return (number, len(self.calls))
+
+        self.load = load
+
+    def test_fresh_value_is_not_refreshed(self):
+        self.load(1)
+        self.now += 5
+
+        self.assertEqual((1, 1), self.load(1))
+        self.assertEqual([], self.executor.tasks)
+
+    def test_stale_value_is_served_and_refreshed_once(self):
+        self.load(1)
+        self.now += 20
+
+        self.assertEqual((1, 1), self.load(1))
+        self.assertEqual((1, 1), self.load(1))
+        self.assertEqual(1, len(self.executor.tasks))
+
+        self.executor.run()
+        self.assertEqual((1, 2), self.load(1))
+        self.assertEqual([1, 1], self.calls)
+        stats = self.load.stats.snapshot()
+        self.assertEqual(2, stats["stale_hits"])
+        self.assertEqual(1, stats["refreshes"])
+
+    def test_hard_ttl_recomputes_synchronously(self):
+        self.load(1)
+        self.now += 61
+
+        self.assertEqual((1, 2), self.load(1))
+        self.assertEqual([], self.executor.tasks)
+
+    def test_failed_refresh_keeps_stale_value(self):
+        self.load(1)
+        self.now += 20
+
+        with mock.patch.object(
+            self.memo, "_insert", side_effect=RuntimeError("boom")
+        ):
+            self.load(1)
+            self.executor.run()
+
+        # NOTE: The next stale hit schedules a new refresh.
+        self.assertEqual((1, 1), self.load(1))
+        self.assertEqual(1, len(self.executor.tasks))
+
+    def test_rejects_negative_stale_after(self):
+        with self.assertRaises(ValueError):
+            self.memo.cache(stale_after=-1)
+
+
+class TestSieveAdmission(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.memo = make_sieve()
+        self.calls = []
+        policy = admission.TinyLFU(64)
+        ids = {}
+        # NOTE: Give every key counters of its own; the salted hash() can
+        # make scan keys share the counters of the hot ones.
+        policy._hashes = lambda key: (
+            ids.setdefault(key, len(ids)),
+            64 + ids[key],
+        )
+
+        @self.memo.cache(max_size=2, admission=policy)
+        def load(number):
+            self.calls.append(number)
+            return number
+
+        self.load = load
+
+    def test_scan_does_not_evict_hot_keys(self):
+        for _ in range(3):
+            self.load(1)
+            self.load(2)
+        for number in range(100, 110):
+            self.assertEqual(number, self.load(number))
+        self.calls.clear()
+
+        self.load(1)
+        self.load(2)
+
+        self.assertEqual([], self.calls)
+        stats = self.load.stats.snapshot()
+        self.assertEqual(10, stats["rejections"])
+        self.assertEqual(0, stats["evictions"])
+
+    def test_repeated_key_is_admitted(self):
+        self.load(1)
+        self.load(2)
+        for _ in range(3):
+            self.load(3)
+
+        self.calls.clear()
+        self.load(3)
+
+        self.assertEqual([], self.calls)
+        self.assertEqual(1, self.load.stats.snapshot()["evictions"])
+
+
+class TestSieveInvalidation(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.region = memory_region()
+        self.memo = make_sieve(self.region, length_sync_interval=1)
+        self.calls = []
+
+        @self.memo.cache(max_size=8)
+        def load(number):
+            self.calls.append(number)
+            return number
+
+        self.load = load
+
+    def test_invalidate_by_arguments(self):
+        self.load(1)
+        self.load(2)
+
+        self.assertTrue(self.load.invalidate(1))
+        self.assertFalse(self.load.invalidate(1))
+        self.load(1)
+        self.load(2)
+
+        self.assertEqual([1, 2, 1], self.calls)
+        self.assertEqual(2, self.load.length())
+
+    def test_delete_keeps_length_in_sync(self):
+        self.load(1)
+        key = load_key(self.memo, self.load, 1)
+
+        self.assertTrue(self.memo.delete(key))
+
+        self.assertIs(api.NO_VALUE, self.region.get(key))
+        self.assertEqual(0, self.memo.length)
+        self.assertEqual(0, self.region.get(self.memo._length_key))
+
+    def test_delete_many_uses_one_backend_call(self):
+        for number in range(3):
+            self.load(number)
+        keys = [load_key(self.memo, self.load, n) for n in (0, 1, 5)]
+
+        with mock.patch.object(
+            self.region, "delete_multi", wraps=self.region.delete_multi
+        ) as delete_multi:
+            self.assertEqual(2, self.memo.delete_many(keys))
+
+        delete_multi.assert_called_once_with(keys)
+        self.assertEqual(1, self.memo.length)
+
+    def test_clear_bumps_generation_with_one_write(self):
+        for number in range(3):
+            self.load(number)
+        self.memo.set_many({"a": 1})
+
+        with mock.patch.object(
+            self.region, "set", wraps=self.region.set
+        ) as set_one:
+            self.memo.clear()
+
+        set_one.assert_any_call(self.memo._generation_key, 1)
+        self.assertEqual(0, self.memo.length)
+        self.assertEqual(({}, ["a"]), self.memo.get_many(["a"]))
+
+        self.load(0)
+        self.load(0)
+        self.assertEqual([0, 1, 2, 0], self.calls)
+        self.memo.set_many({"a": 2})
+        self.assertEqual(({"a": 2}, []), self.memo.get_many(["a"]))
+
+    def test_clear_only_deletes_from_local_backends(self):
+        for number in range(3):
+            self.load(number)
+        key = load_key(self.memo, self.load, 0)
+
+        with mock.patch.object(
+            self.region, "delete_multi", wraps=self.region.delete_multi
+        ) as delete_multi:
+            self.memo.clear()
+
+        delete_multi.assert_not_called()
+        self.assertEqual(0, self.region.get(key))
+
+        self.memo.local_backend = True
+        self.load(0)
+        key = self.memo._key(load_key(self.memo, self.load, 0))
+        self.memo.clear()
+        self.assertIs(api.NO_VALUE, self.region.get(key))
+
+    def test_other_processes_sync_the_generation(self):
+        other = make_sieve(self.region)
+        calls = []
+
+        @other.cache(max_size=8)
+        def load(number):
+            calls.append(number)
+            return number
+
+        load(1)
+        self.memo.clear()
+
+        self.assertEqual(1, other.sync_generation())
+        self.assertEqual(0, load.length())
+        load(1)
+        self.assertEqual([1, 1], calls)
+        self.assertEqual(1, other.sync_generation())
+
+    def test_new_sieve_starts_in_the_stored_generation(self):
+        self.load(1)
+        self.memo.clear()
+        later = make_sieve(self.region)
+        calls = []
+
+        @later.cache(max_size=8)
+        def load(number):
+            calls.append(number)
+            return number
+
+        load(1)
+        load(1)
+
+        self.assertEqual(1, later._generation)
+        self.assertEqual([1], calls)
+
+    def test_clear_with_tuple_keys(self):
+        memo = sieve_cache.create_sieve(
+            backend="sieve_cache.memory", fast_keys=True
+        )
+
+        @memo.cache(max_size=4)
+        def load(number):
+            self.calls.append(number)
+            return number
+
+        load(1)
+        memo.clear()
+        load(1)
+        load(1)
+
+        self.assertEqual([1, 1], self.calls)
+        self.assertEqual(1, memo.length)
+
+
+class TestKeyGeneration(TestCase):
+    def test_tuple_keys_use_arguments_as_is(self):
+        def load(number, text):
+            return number
+
+        generate = sieve_cache.tuple_function_key_generator("ns", load)
+
+        key = generate(1, "a")
+        self.assertEqual((f"{__name__}:load|ns", 1, "a"), key)
+        self.assertNotEqual(key, generate("1", "a"))
+        self.assertNotEqual(generate(1, text="a"), generate(1, "a"))
+        self.assertEqual(generate(1, text="a"), generate(1, text="a"))
+
+    def test_tuple_keys_skip_self(self):
+        class Loader:
+            def load(self, number):
+                return number
+
+        generate = sieve_cache.tuple_function_key_generator(
+            None, Loader.load
+        )
+
+        self.assertEqual(generate(Loader(), 1), generate(Loader(), 1))
+
+    def test_fast_keys_cache_without_mangling(self):
+        memo = sieve_cache.create_sieve(
+            backend="sieve_cache.memory", fast_keys=True
+        )
+        calls = []
+
+        @memo.cache(max_size=4)
+        def load(number, scale=1):
+            calls.append(number)
+            return number * scale
+
+        self.assertEqual(6, load(2, scale=3))
+        self.assertEqual(6, load(2, scale=3))
+        self.assertEqual(2, load(2))
+
+        self.assertEqual([2, 2], calls)
+        self.assertIsNone(memo._backend.key_mangler)
+        self.assertIn(
+            (f"{__name__}:load", 2), memo._backend.backend.cache
+        )
+
+    def test_fast_keys_reject_remote_backends(self):
+        with self.assertRaises(sieve_cache.exceptions.SieveCacheException):
+            sieve_cache.create_sieve(
+                backend="dogpile.cache.pymemcache", fast_keys=True
+            )
+
+    def test_default_keys_are_sha1_mangled(self):
+        memo = sieve_cache.create_sieve(backend="dogpile.cache.memory")
+
+        self.assertIs(
+            sieve_cache._sha1_mangle_key, memo._backend.key_mangler
+        )
+
+    def test_blake2b_mangler(self):
+        memo = sieve_cache.create_sieve(
+            backend="dogpile.cache.memory",
+            key_mangler=sieve_cache.blake2b_mangle_key,
+        )
+
+        @memo.cache(max_size=4)
+        def load(number):
+            return number
+
+        self.assertEqual(1, load(1))
+        self.assertEqual(1, load(1))
+        key = sieve_cache.blake2b_mangle_key("ns|1")
+        self.assertEqual(32, len(key))
+        self.assertEqual(key, sieve_cache.blake2b_mangle_key(b"ns|1"))
+        self.assertEqual(1, load.stats.snapshot()["hits"])
@@ -0,0 +1,113 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#  #
+#          http://www.apache.org/licenses/LICENSE-2.0
+#  #
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+
+import threading
+from unittest import TestCase
+
+from sieve_cache.common import singleflight
+
+
+class TestGroup(TestCase):
+    def _start_leader(self, group, key, fn):
+        results = []
+        thread = threading.Thread(
+            target=lambda: results.append(group.do(key, fn))
+        )
+        thread.start()
+        return thread, results
+
+    def test_waiters_receive_leader_result(self):
+        group = singleflight.Group()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def slow():
+            calls.append(1)
+            started.set()
+            release.wait()
+            return "value"
+
+        leader, leader_results = self._start_leader(group, "k", slow)
+        started.wait()
+
+        results = []
+        waiters = [
+            threading.Thread(
+                target=lambda: results.append(group.do("k", slow))
+            )
+            for _ in range(4)
+        ]
+        for waiter in waiters:
+            waiter.start()
+        release.set()
+        for thread in [leader, *waiters]:
+            thread.join()
+
+        self.assertEqual(1, len(calls))
+        self.assertEqual(["value"], leader_results)
+        self.assertEqual(["value"] * 4, results)
+
+    def test_waiter_computes_after_timeout(self):
+        group = singleflight.Group()
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow():
+            started.set()
+            release.wait()
+            return "leader"
+
+        leader, _results = self._start_leader(group, "k", slow)
+        started.wait()
+
+        self.assertEqual(
+            "waiter", group.do("k", lambda: "waiter", timeout=0.01)
+        )
+        release.set()
+        leader.join()
+
+    def test_leader_error_is_raised_in_waiters(self):
+        group = singleflight.Group()
+        started = threading.Event()
+        release = threading.Event()
+        errors = []
+
+        def failing():
+            started.set()
+            release.wait()
+            raise RuntimeError("boom")
+
+        def call():
+            try:
+                group.do("k", failing)
+            except RuntimeError as e:
+                errors.append(e)
+
+        leader = threading.Thread(target=call)
+        leader.start()
+        started.wait()
+        waiter = threading.Thread(target=call)
+        waiter.start()
+        release.set()
+        leader.join()
+        waiter.join()
+
+        self.assertEqual(2, len(errors))
+        self.assertIs(errors[0], errors[1])
+
+    def test_keys_are_released_after_call(self):
+        group = singleflight.Group()
+
+        self.assertEqual(1, group.do("k", lambda: 1))
+        self.assertEqual(2, group.do("k", lambda: 2))
+        self.assertEqual({}, group._calls)
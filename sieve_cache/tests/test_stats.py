@@ -0,0 +1,98 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#  #
+#          http://www.apache.org/licenses/LICENSE-2.0
+#  #
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+
+import threading
+from unittest import TestCase
+from unittest import mock
+
+from sieve_cache import stats
+
+
+class TestStats(TestCase):
+    def test_snapshot_merges_thread_shards(self):
+        counters = stats.Stats()
+
+        def work():
+            for _ in range(1000):
+                counters.incr("hits")
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        counters.incr("misses", 2)
+
+        snapshot = counters.snapshot()
+        self.assertEqual(4000, snapshot["hits"])
+        self.assertEqual(2, snapshot["misses"])
+        self.assertEqual(5, len(counters._shards))
+
+    def test_snapshot_includes_children(self):
+        parent = stats.Stats()
+        child = stats.Stats(parent=parent)
+
+        parent.incr("hits")
+        child.incr("hits", 2)
+        child.incr("evictions")
+
+        self.assertEqual(3, parent.snapshot()["hits"])
+        self.assertEqual(1, parent.snapshot()["evictions"])
+        self.assertEqual(2, child.snapshot()["hits"])
+
+    def test_hook_receives_updates_with_tags(self):
+        hook = mock.Mock()
+        counters = stats.Stats(hook=hook, tags={"namespace": "a"})
+
+        counters.incr("hits")
+        counters.timing(0.5)
+
+        hook.incr.assert_called_once_with("hits", 1, {"namespace": "a"})
+        hook.timing.assert_called_once_with(
+            "backend", 0.5, {"namespace": "a"}
+        )
+        snapshot = counters.snapshot()
+        self.assertEqual(1, snapshot["backend_calls"])
+        self.assertEqual(0.5, snapshot["backend_seconds"])
+
+    def test_custom_fields(self):
+        counters = stats.Stats(fields=("lookups",))
+
+        counters.incr("lookups")
+
+        self.assertEqual({"lookups": 1}, counters.snapshot())
+
+
+class TestTimedBackend(TestCase):
+    def test_records_calls_and_passes_attributes_through(self):
+        backend = mock.Mock()
+        backend.get.return_value = "value"
+        counters = stats.Stats()
+        timed = stats.TimedBackend(backend, counters)
+
+        self.assertEqual("value", timed.get("k"))
+        timed.set_multi({"k": 1})
+        timed.delete("k")
+
+        self.assertIs(backend.key_mangler, timed.key_mangler)
+        self.assertEqual(3, counters.snapshot()["backend_calls"])
+
+    def test_records_failed_calls(self):
+        backend = mock.Mock()
+        backend.get.side_effect = RuntimeError
+        counters = stats.Stats()
+        timed = stats.TimedBackend(backend, counters)
+
+        with self.assertRaises(RuntimeError):
+            timed.get("k")
+
+        self.assertEqual(1, counters.snapshot()["backend_calls"])
@@ -0,0 +1,50 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#  #
+#          http://www.apache.org/licenses/LICENSE-2.0
+#  #
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+
+from unittest import TestCase
+
+from sieve_cache.store import NIL
+from sieve_cache.store import NodeStore
+
+
+class TestNodeStore(TestCase):
+    def test_allocate_initialises_slot(self):
+        store = NodeStore()
+
+        slot = store.allocate("a")
+
+        self.assertEqual(0, slot)
+        self.assertEqual("a", store.keys[slot])
+        self.assertEqual(NIL, store.next[slot])
+        self.assertEqual(NIL, store.prev[slot])
+        self.assertEqual(0, store.visited[slot])
+        self.assertEqual(1, len(store))
+
+    def test_release_recycles_slots(self):
+        store = NodeStore()
+        first = store.allocate("a")
+        store.allocate("b")
+        store.next[first] = 1
+        store.visited[first] = 1
+        store.weights[first] = 5
+
+        store.release(first)
+        self.assertEqual(1, len(store))
+        self.assertIsNone(store.keys[first])
+
+        reused = store.allocate("c")
+        self.assertEqual(first, reused)
+        self.assertEqual("c", store.keys[reused])
+        self.assertEqual(NIL, store.next[reused])
+        self.assertEqual(0, store.visited[reused])
+        self.assertEqual(0, store.weights[reused])
+        self.assertEqual(2, len(store.keys))
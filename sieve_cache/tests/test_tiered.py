@@ -0,0 +1,123 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#  #
+#          http://www.apache.org/licenses/LICENSE-2.0
+#  #
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+
+from unittest import TestCase
+from unittest import mock
+
+import sieve_cache
+from sieve_cache import create_region
+from sieve_cache import tiered
+
+
+class TestTieredSieve(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.remote = create_region()
+        self.remote.configure(backend="dogpile.cache.memory")
+
+    def test_l1_hit_does_not_touch_l2(self):
+        memo = tiered.TieredSieve(self.remote)
+        calls = {"count": 0}
+
+        @memo.cache(max_size=4)
+        def load(number):
+            calls["count"] += 1
+            return number * 2
+
+        self.assertEqual(4, load(2))
+        with mock.patch.object(self.remote, "get") as remote_get:
+            self.assertEqual(4, load(2))
+
+        remote_get.assert_not_called()
+        self.assertEqual(1, calls["count"])
+        self.assertEqual(
+            {"lookups": 2, "l1_hits": 1, "l2_hits": 0, "misses": 1},
+            memo.stats,
+        )
+
+    def test_l1_miss_populates_from_l2(self):
+        bus = tiered.InvalidationBus()
+        first = tiered.TieredSieve(self.remote, bus=bus)
+        second = tiered.TieredSieve(self.remote, bus=bus)
+        calls = {"count": 0}
+
+        def load(number):
+            calls["count"] += 1
+            return number
+
+        load_first = first.cache(max_size=4)(load)
+        load_second = second.cache(max_size=4)(load)
+
+        self.assertEqual(1, load_first(1))
+        self.assertEqual(1, load_second(1))
+        self.assertEqual(1, load_second(1))
+
+        self.assertEqual(1, calls["count"])
+        self.assertEqual(
+            {"lookups": 2, "l1_hits": 1, "l2_hits": 1, "misses": 0},
+            second.stats,
+        )
+        self.assertEqual({"l1": 0.5, "l2": 1.0}, second.hit_ratios())
+
+    def test_invalidate_propagates_to_every_l1(self):
+        bus = tiered.InvalidationBus()
+        first = tiered.TieredSieve(self.remote, bus=bus)
+        second = tiered.TieredSieve(self.remote, bus=bus)
+        values = {"value": "old"}
+
+        def load(number):
+            return values["value"]
+
+        load_first = first.cache(max_size=4)(load)
+        load_second = second.cache(max_size=4)(load)
+        self.assertEqual("old", load_first(1))
+        self.assertEqual("old", load_second(1))
+
+        values["value"] = "new"
+        load_first.invalidate(1)
+
+        self.assertEqual("new", load_second(1))
+        self.assertEqual("new", load_first(1))
+        self.assertEqual(1, len(first.l1))
+        self.assertEqual(1, len(second.l1))
+
+    def test_l1_is_bounded_by_sieve(self):
+        memo = tiered.TieredSieve(self.remote)
+
+        @memo.cache(max_size=2)
+        def load(number):
+            return number
+
+        for number in range(10):
+            load(number)
+
+        self.assertEqual(2, len(memo.l1))
+        self.assertEqual(0.0, memo.hit_ratios()["l2"])
+
+    def test_create_tiered_sieve(self):
+        memo = sieve_cache.create_tiered_sieve(
+            backend="dogpile.cache.memory", l1_expiration_time=30
+        )
+
+        @memo.cache(max_size=2)
+        def load(number):
+            return number
+
+        self.assertEqual(3, load(3))
+        self.assertEqual(3, load(3))
+        self.assertEqual(30, memo.l1._backend.backend.expiration_time)
+
+    def test_l1_expires_with_l2_by_default(self):
+        memo = sieve_cache.create_tiered_sieve(backend="dogpile.cache.memory")
+
+        self.assertEqual(600, memo.l2.expiration_time)
+        self.assertEqual(600, memo.l1._backend.backend.expiration_time)
@@ -55,3 +55,12 @@ class TestTimeutils(TestCase):
 
         self.assertEqual(first, timeutils.utcnow())
         self.assertEqual(second, timeutils.utcnow())
+
+    def test_monotonic_ignores_override_time(self):
+        timeutils.utcnow.override_time = datetime.datetime(2000, 1, 1)
+
+        first = timeutils.monotonic()
+        second = timeutils.monotonic()
+
+        self.assertIsInstance(first, float)
+        self.assertLessEqual(first, second)
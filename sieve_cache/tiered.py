@@ -0,0 +1,189 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#  #
+#          http://www.apache.org/licenses/LICENSE-2.0
+#  #
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+
+import threading
+import typing as ty
+from functools import wraps
+
+from dogpile.cache import api as base
+from dogpile.cache import region
+
+from sieve_cache import sieve
+from sieve_cache import stats as _stats
+
+__all__ = ["InvalidationBus", "TieredSieve"]
+
+L1_BACKEND = "sieve_cache.memory"
+TIER_FIELDS = ("lookups", "l2_hits", "misses")
+
+
+def _ratio(hits: int, total: int) -> float:
+    return hits / total if total else 0.0
+
+
+class InvalidationBus:
+    """In-process stand-in for a pub/sub channel carrying invalidations.
+
+    Every :class:`TieredSieve` sharing a bus drops a key from its L1 when
+    another one publishes it. A bridge to a real pub/sub channel only
+    needs to provide the same ``subscribe`` and ``publish`` methods.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: ty.List[ty.Callable[[ty.Any], None]] = []
+
+    def subscribe(self, callback: ty.Callable[[ty.Any], None]) -> None:
+        """Call ``callback(key)`` for every published key."""
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def publish(self, key) -> None:
+        """Deliver ``key`` to every subscriber."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            callback(key)
+
+
+class TieredSieve:
+    """A bounded in-process SIEVE L1 in front of a remote region as L2.
+
+    L1 hits never leave the process. L1 misses read through to L2, and
+    only L2 misses call the decorated function, whose result is written to
+    both tiers.
+
+    :param remote: The region used as L2, e.g. one configured with
+        ``dogpile.cache.redis`` or ``dogpile.cache.pymemcache``.
+    :param namespace: The namespace to use for the cache.
+    :param bus: The bus invalidations are published on. Defaults to a
+        private :class:`InvalidationBus`, which only reaches this
+        ``TieredSieve``; L1s of other processes or hosts only see
+        invalidations through a bus bridged to a real pub/sub channel,
+        and otherwise serve stale values until they expire.
+    :param l1_expiration_time: Maximum number of seconds a value stays in
+        L1, bounding how stale it can get when an invalidation is missed.
+        Defaults to the ``expiration_time`` of ``remote``. 0 keeps values
+        until they are evicted.
+    :param sieve_options: Additional :class:`sieve_cache.sieve.Sieve`
+        options for the L1.
+    """
+
+    def __init__(
+        self,
+        remote: region.CacheRegion,
+        namespace: str = sieve.DEFAULT_NAMESPACE,
+        bus: ty.Optional[InvalidationBus] = None,
+        l1_expiration_time: ty.Optional[float] = None,
+        **sieve_options,
+    ):
+        if l1_expiration_time is None:
+            l1_expiration_time = remote.expiration_time or 0
+        local = region.make_region(
+            function_key_generator=remote.function_key_generator
+        )
+        local.configure(
+            L1_BACKEND,
+            arguments={"expiration_time": l1_expiration_time},
+        )
+        self.l1 = sieve.Sieve(
+            backend=local,
+            namespace=namespace,
+            local_backend=True,
+            **sieve_options,
+        )
+        self.l2 = remote
+        self.bus = bus if bus is not None else InvalidationBus()
+        self.bus.subscribe(self.l1.delete)
+        self._tiers = _stats.Stats(
+            fields=TIER_FIELDS,
+            hook=self.l1.stats_hook,
+            tags={"namespace": str(namespace), "cache": "tiered"},
+        )
+
+    @property
+    def namespace(self) -> str:
+        return self.l1.namespace
+
+    @property
+    def stats(self) -> ty.Dict[str, int]:
+        """Return the hit counters of each tier."""
+        tiers = self._tiers.snapshot()
+        return {
+            "lookups": tiers["lookups"],
+            "l1_hits": tiers["lookups"] - tiers["l2_hits"] - tiers["misses"],
+            "l2_hits": tiers["l2_hits"],
+            "misses": tiers["misses"],
+        }
+
+    def hit_ratios(self) -> ty.Dict[str, float]:
+        """Return the hit ratio of each tier.
+
+        The L2 ratio is relative to the lookups that reached L2.
+        """
+        stats = self.stats
+        l2_lookups = stats["l2_hits"] + stats["misses"]
+        return {
+            "l1": _ratio(stats["l1_hits"], stats["lookups"]),
+            "l2": _ratio(stats["l2_hits"], l2_lookups),
+        }
+
+    def delete(self, key) -> None:
+        """Delete ``key`` from L2 and from every L1 on the bus."""
+        self.l2.delete(key)
+        self.bus.publish(key)
+
+    def cache(
+        self,
+        max_size: int = sieve.DEFAULT_CACHE_SIZE,
+        wait_timeout: ty.Optional[float] = None,
+    ) -> ty.Callable:
+        """Decorator to backends the result of a function call in both tiers.
+
+        The decorated function gets an ``invalidate(*args, **kwargs)``
+        attribute that deletes the entry for those arguments everywhere.
+
+        :param max_size: Maximum number of entries to keep in L1.
+        :param wait_timeout: See :meth:`sieve_cache.sieve.Sieve.cache`.
+        """
+
+        def decorator(func) -> ty.Callable:
+            key_generator = self.l2.function_key_generator(
+                self.namespace, func
+            )
+
+            @wraps(func)
+            def read_through(*args, **kwargs):
+                key = key_generator(*args, **kwargs)
+                value = self.l2.get(key)
+                if value is not base.NO_VALUE:
+                    self._tiers.incr("l2_hits")
+                    return value
+                self._tiers.incr("misses")
+                value = func(*args, **kwargs)
+                self.l2.set(key, value)
+                return value
+
+            cached = self.l1.cache(max_size, wait_timeout)(read_through)
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                self._tiers.incr("lookups")
+                return cached(*args, **kwargs)
+
+            def invalidate(*args, **kwargs):
+                self.delete(key_generator(*args, **kwargs))
+
+            wrapper.invalidate = invalidate
+            return wrapper
+
+        return decorator